@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AdsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'crm.ads'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, FloatField, QuerySet, Sum
+from django.db.models.functions import Cast
+
+from ...models import Ads
+from ...service import collect_campaign_stats, get_ads_statistic
+from ....core.synthetic import SyntheticDataGenerator
+
+
+def get_legacy_ads_statistic() -> QuerySet:
+    """Функция возвращает прежний запрос статистики с соединением всех таблиц."""
+    return (Ads.objects.values('name')
+            .annotate(leads_count=Count('lead', distinct=True),
+                      customers_count=Count('customer', distinct=True),
+                      ads_budget=Sum('budget', distinct=True),
+                      ads_profit=Sum('customer__contract__cost', distinct=True))
+            .annotate(profit=(Cast('ads_profit', FloatField())
+                              / Cast('ads_budget', FloatField()))))
+
+
+class Command(BaseCommand):
+    """
+    Команда сравнивает время построения статистики рекламных кампаний
+    прежним запросом, запросом на подзапросах и чтением таблицы счетчиков
+    на синтетических данных.
+
+    Данные создаются внутри транзакции и откатываются после замеров.
+    """
+
+    help = 'Benchmark of the ads statistic query on a synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=1_000_000)
+        parser.add_argument('--ads', type=int, default=100)
+        parser.add_argument('--customers-share', type=float, default=0.2)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skip-legacy', action='store_true',
+                            help='Do not run the legacy join query')
+        parser.add_argument('--timeout', type=int, default=300,
+                            help='Statement timeout in seconds (PostgreSQL only)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.populate(options)
+            queries = {'counters': get_ads_statistic, 'subquery': collect_campaign_stats}
+            if not options['skip_legacy']:
+                queries['legacy'] = get_legacy_ads_statistic
+            for name, get_queryset in queries.items():
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    try:
+                        self.run_query(get_queryset(), options['timeout'])
+                    except DatabaseError:
+                        self.stdout.write(f'{name}: timed out after {options["timeout"]}s')
+                        break
+                    timings.append(time.perf_counter() - started)
+                else:
+                    self.stdout.write(f'{name}: best {min(timings):.3f}s, '
+                                      f'avg {sum(timings) / len(timings):.3f}s')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def run_query(queryset: QuerySet, timeout: int):
+        """Метод выполняет запрос в точке сохранения с ограничением времени выполнения."""
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL statement_timeout = %s', [timeout * 1000])
+            list(queryset)
+
+    def populate(self, options):
+        """Метод заполняет базу синтетическими рекламными кампаниями, лидами и клиентами."""
+        generator = SyntheticDataGenerator(options['seed'], batch_size=options['batch_size'])
+        counts = generator.generate(products=1, ads=options['ads'], leads=options['leads'],
+                                    customers_share=options['customers_share'])
+        self.stdout.write(f'Generated {counts["leads"]} leads in {counts["ads"]} ads')
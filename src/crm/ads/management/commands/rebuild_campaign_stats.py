@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...service import find_campaign_stats_drift, rebuild_campaign_stats
+
+
+class Command(BaseCommand):
+    """
+    Команда сверяет счетчики CampaignStats с исходными таблицами,
+    выводит расхождения и пересчитывает счетчики с нуля.
+    """
+
+    help = 'Verify drift of campaign counters and rebuild them from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift, exit with an error if any is found')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drift = find_campaign_stats_drift()
+        for ads_id, field, saved, actual in drift:
+            self.stdout.write(f'ads {ads_id}: {field} stored={saved} actual={actual}')
+        self.stdout.write(f'Drifted values: {len(drift)}')
+
+        if options['check']:
+            if drift:
+                raise CommandError('Campaign counters drifted, run without --check to rebuild')
+            return
+
+        with transaction.atomic():
+            rebuilt = rebuild_campaign_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters of {rebuilt} campaigns'))
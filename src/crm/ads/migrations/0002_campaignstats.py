@@ -0,0 +1,53 @@
+# Generated by Django 4.2.10 on 2026-10-18 17:39
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def populate_campaign_stats(apps, schema_editor):
+    Ads = apps.get_model('ads', 'Ads')
+    CampaignStats = apps.get_model('ads', 'CampaignStats')
+    Lead = apps.get_model('leads', 'Lead')
+    Customer = apps.get_model('customers', 'Customer')
+    Contract = apps.get_model('contracts', 'Contract')
+
+    leads = dict(Lead.objects.values_list('ads').annotate(Count('pk')).order_by())
+    customers = dict(Customer.objects.values_list('ads').annotate(Count('pk')).order_by())
+    contracts = {ads_id: (count, revenue) for ads_id, count, revenue in
+                 Contract.objects.values_list('ads').annotate(Count('pk'), Sum('cost')).order_by()}
+    CampaignStats.objects.bulk_create(
+        CampaignStats(ads_id=ads_id,
+                      leads_count=leads.get(ads_id, 0),
+                      active_customers_count=customers.get(ads_id, 0),
+                      contracts_count=contracts.get(ads_id, (0, 0))[0],
+                      revenue=contracts.get(ads_id, (0, 0))[1])
+        for ads_id in Ads.objects.values_list('pk', flat=True).iterator())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0001_initial'),
+        ('contracts', '0001_initial'),
+        ('customers', '0001_initial'),
+        ('leads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignStats',
+            fields=[
+                ('ads', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='ads.ads', verbose_name='Рекламная кампания')),
+                ('leads_count', models.IntegerField(default=0, verbose_name='Количество лидов')),
+                ('active_customers_count', models.IntegerField(default=0, verbose_name='Количество активных клиентов')),
+                ('contracts_count', models.IntegerField(default=0, verbose_name='Количество контрактов')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Сумма контрактов')),
+            ],
+            options={
+                'verbose_name': 'статистика рекламной кампании',
+                'verbose_name_plural': 'статистика рекламных кампаний',
+            },
+        ),
+        migrations.RunPython(populate_campaign_stats, migrations.RunPython.noop),
+    ]
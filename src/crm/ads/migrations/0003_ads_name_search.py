@@ -0,0 +1,16 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:05
+
+from django.db import migrations
+
+from ...core.db.search import AddSearchIndexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0002_campaignstats'),
+    ]
+
+    operations = [
+        AddSearchIndexes(model_name='ads', full_text=['name'], trigram=['name']),
+    ]
@@ -1,13 +1,14 @@
-from django import forms
-
+from ..core.forms import BatchedModelChoiceField, BatchedModelForm
+from ..core.widgets import AutocompleteSelect
 from ..products.models import Product
 
 
-class MixinProductForm(forms.ModelForm):
+class MixinProductForm(BatchedModelForm):
     """Класс миксина формы, включающий услуги."""
 
-    product = forms.ModelChoiceField(
+    product = BatchedModelChoiceField(
         queryset=Product.objects.all(),
         empty_label="Услуга не выбрана",
-        label='Услуга'
+        label='Услуга',
+        widget=AutocompleteSelect('crm.products:products_autocomplete'),
     )
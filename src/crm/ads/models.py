@@ -44,3 +44,35 @@ class Ads(models.Model):
 
     def __str__(self) -> str:
         return str(self.name)
+
+
+class CampaignStats(models.Model):
+    """
+    Класс модели счетчиков рекламной кампании.
+
+    Счетчики поддерживаются инкрементально сигналами (см. signals.py)
+    и пересчитываются командой rebuild_campaign_stats.
+    """
+
+    ads = models.OneToOneField(
+        Ads,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Рекламная кампания')
+    leads_count = models.IntegerField(default=0, verbose_name='Количество лидов')
+    active_customers_count = models.IntegerField(default=0,
+                                                 verbose_name='Количество активных клиентов')
+    contracts_count = models.IntegerField(default=0, verbose_name='Количество контрактов')
+    revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name='Сумма контрактов')
+
+    class Meta:
+        verbose_name = 'статистика рекламной кампании'
+        verbose_name_plural = 'статистика рекламных кампаний'
+
+    def __str__(self) -> str:
+        return f"Статистика кампании № {self.pk}"
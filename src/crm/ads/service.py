@@ -0,0 +1,116 @@
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db.models import (DecimalField, Exists, F, FloatField, Func, IntegerField,
+                              OuterRef, QuerySet, Subquery, Value)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import Ads, CampaignStats
+from ..contracts.models import Contract
+from ..customers.models import Customer
+from ..leads.models import Lead
+
+MONEY_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+STATS_FIELDS = ('leads_count', 'active_customers_count', 'contracts_count', 'revenue')
+
+
+def aggregate_subquery(queryset: QuerySet, function: str, field: str, output_field, default):
+    """
+    Функция возвращает коррелированный подзапрос, вычисляющий агрегат
+    function по полю field для строк queryset (без GROUP BY по внешней таблице).
+    """
+    queryset = (queryset.order_by()
+                .annotate(value=Func(F(field), function=function, output_field=output_field))
+                .values('value'))
+    return Coalesce(Subquery(queryset, output_field=output_field),
+                    Value(default, output_field=output_field))
+
+
+def collect_campaign_stats(ads_ids: Optional[Iterable[int]] = None) -> QuerySet:
+    """
+    Функция вычисляет значения счетчиков CampaignStats по исходным таблицам.
+
+    Каждый счетчик считается отдельным коррелированным подзапросом по
+    индексу внешнего ключа, поэтому стоимость запроса линейна по числу
+    лидов, клиентов и контрактов, а не по их произведению. Выручка — сумма
+    различных контрактов покупателей кампании.
+    """
+    contracts = Contract.objects.filter(ads=OuterRef('pk'))
+    customer_contracts = Contract.objects.filter(
+        Exists(Customer.objects.filter(ads=OuterRef(OuterRef('pk')), contract=OuterRef('pk'))))
+    queryset = Ads.objects.order_by('pk')
+    if ads_ids is not None:
+        queryset = queryset.filter(pk__in=ads_ids)
+    return queryset.values_list(
+        'pk',
+        aggregate_subquery(Lead.objects.filter(ads=OuterRef('pk')),
+                           'COUNT', 'pk', IntegerField(), 0),
+        aggregate_subquery(Customer.objects.filter(ads=OuterRef('pk')),
+                           'COUNT', 'pk', IntegerField(), 0),
+        aggregate_subquery(contracts, 'COUNT', 'pk', IntegerField(), 0),
+        aggregate_subquery(customer_contracts, 'SUM', 'cost', MONEY_FIELD, 0))
+
+
+def rebuild_campaign_stats(ads_ids: Optional[Iterable[int]] = None,
+                           batch_size: int = 1000) -> int:
+    """Функция пересчитывает счетчики CampaignStats с нуля и возвращает число кампаний."""
+    batch, rebuilt = [], 0
+    for row in collect_campaign_stats(ads_ids).iterator(chunk_size=batch_size):
+        batch.append(CampaignStats(ads_id=row[0], **dict(zip(STATS_FIELDS, row[1:]))))
+        if len(batch) >= batch_size:
+            rebuilt += _save_campaign_stats(batch)
+            batch = []
+    return rebuilt + _save_campaign_stats(batch)
+
+
+def _save_campaign_stats(batch: list) -> int:
+    CampaignStats.objects.bulk_create(batch, update_conflicts=True,
+                                      unique_fields=['ads'], update_fields=STATS_FIELDS)
+    return len(batch)
+
+
+def find_campaign_stats_drift() -> list:
+    """
+    Функция сравнивает сохраненные счетчики с вычисленными заново и
+    возвращает список расхождений (ads_id, поле, сохранено, фактически).
+    """
+    stored = {row[0]: row[1:]
+              for row in CampaignStats.objects.values_list('ads_id', *STATS_FIELDS)}
+    drift = []
+    for row in collect_campaign_stats().iterator():
+        saved = stored.get(row[0], (None,) * len(STATS_FIELDS))
+        for field, saved_value, actual in zip(STATS_FIELDS, saved, row[1:]):
+            if saved_value != actual:
+                drift.append((row[0], field, saved_value, actual))
+    return drift
+
+
+def increment_campaign_stats(ads_id: int, **deltas):
+    """
+    Функция атомарно изменяет счетчики кампании на deltas через F()-выражения.
+
+    Если строки счетчиков еще нет, при увеличении она пересчитывается для
+    кампании с нуля; при уменьшении (например, при каскадном удалении
+    кампании) отсутствующая строка не создается.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = (CampaignStats.objects.filter(ads_id=ads_id)
+               .update(**{field: F(field) + delta for field, delta in deltas.items()}))
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        rebuild_campaign_stats([ads_id])
+
+
+def get_ads_statistic() -> QuerySet:
+    """Функция возвращает статистику рекламных кампаний из таблицы счетчиков."""
+    return (Ads.objects.order_by('pk')
+            .values('pk', 'name',
+                    leads_count=Coalesce('stats__leads_count', 0),
+                    customers_count=Coalesce('stats__active_customers_count', 0),
+                    ads_budget=F('budget'),
+                    ads_profit=Coalesce('stats__revenue', Value(Decimal(0)),
+                                        output_field=MONEY_FIELD))
+            .annotate(profit=(Cast('ads_profit', FloatField())
+                              / NullIf(Cast('ads_budget', FloatField()), 0.0))))
@@ -0,0 +1,148 @@
+from decimal import Decimal
+from typing import Optional
+
+from django.db.models import Exists
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Ads, CampaignStats
+from .service import increment_campaign_stats, rebuild_campaign_stats
+from ..contracts.models import Contract
+from ..customers.models import Customer
+from ..leads.models import Lead
+
+TRACKED_FIELDS = {
+    Lead: ('ads_id',),
+    Customer: ('ads_id', 'contract_id'),
+    Contract: ('ads_id', 'cost'),
+}
+
+COUNTERS = {
+    Lead: 'leads_count',
+    Customer: 'active_customers_count',
+    Contract: 'contracts_count',
+}
+
+
+def get_contract_revenue(ads_id: int, contract_id: Optional[int], customer_pk) -> Decimal:
+    """
+    Функция возвращает вклад контракта contract_id покупателя customer_pk в
+    выручку кампании ads_id: стоимость контракта, если у кампании нет других
+    покупателей с этим контрактом, иначе 0 (выручка — сумма различных
+    контрактов покупателей кампании).
+    """
+    if contract_id is None:
+        return Decimal(0)
+    others = Customer.objects.filter(ads_id=ads_id, contract_id=contract_id).exclude(pk=customer_pk)
+    cost = (Contract.objects.filter(~Exists(others), pk=contract_id)
+            .values_list('cost', flat=True).first())
+    return Decimal(str(cost or 0))
+
+
+def get_stats_deltas(sender, values: dict, pk) -> dict:
+    """Функция возвращает вклад одной записи модели sender (pk) в счетчики кампании."""
+    deltas = {COUNTERS[sender]: 1}
+    if sender is Customer:
+        deltas['revenue'] = get_contract_revenue(values['ads_id'], values['contract_id'], pk)
+    return deltas
+
+
+def apply_stats_deltas(sender, values: dict, pk, sign: int):
+    """Функция добавляет (sign=1) или вычитает (sign=-1) вклад записи в счетчики кампании."""
+    deltas = get_stats_deltas(sender, values, pk)
+    increment_campaign_stats(values['ads_id'],
+                             **{field: sign * delta for field, delta in deltas.items()})
+
+
+def move_contract_revenue(contract_id: int, delta: Decimal):
+    """
+    Функция изменяет на delta выручку кампаний, у покупателей которых есть
+    контракт contract_id (при изменении его стоимости).
+    """
+    ads_ids = (Customer.objects.filter(contract_id=contract_id).order_by()
+               .values_list('ads_id', flat=True).distinct())
+    for ads_id in ads_ids:
+        increment_campaign_stats(ads_id, revenue=delta)
+
+
+@receiver(post_save, sender=Ads)
+def create_campaign_stats(sender, instance, created, raw, **kwargs):
+    """Создает пустые счетчики для новой рекламной кампании."""
+    if created and not raw:
+        CampaignStats.objects.get_or_create(ads=instance)
+
+
+@receiver(pre_save, sender=Lead)
+@receiver(pre_save, sender=Customer)
+@receiver(pre_save, sender=Contract)
+def remember_stats_origin(sender, instance, raw, **kwargs):
+    """Запоминает значения полей, влияющих на счетчики, до изменения записи."""
+    if raw or instance._state.adding:
+        return
+    instance._stats_origin = (sender.objects.filter(pk=instance.pk)
+                              .values(*TRACKED_FIELDS[sender]).first())
+
+
+@receiver(post_save, sender=Lead)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Contract)
+def update_stats_on_save(sender, instance, created, raw, **kwargs):
+    """Увеличивает счетчики при создании записи и переносит их при изменении."""
+    if raw:
+        return
+    current = {field: getattr(instance, field) for field in TRACKED_FIELDS[sender]}
+    origin = getattr(instance, '_stats_origin', None)
+    instance._stats_origin = None
+    if created:
+        apply_stats_deltas(sender, current, instance.pk, 1)
+    elif origin is None:
+        rebuild_campaign_stats([current['ads_id']])
+    elif sender is Contract:
+        if origin['ads_id'] != current['ads_id']:
+            increment_campaign_stats(origin['ads_id'], contracts_count=-1)
+            increment_campaign_stats(current['ads_id'], contracts_count=1)
+        if origin['cost'] != current['cost']:
+            move_contract_revenue(instance.pk, Decimal(str(current['cost']))
+                                  - Decimal(str(origin['cost'])))
+    elif origin != current:
+        apply_stats_deltas(sender, origin, instance.pk, -1)
+        apply_stats_deltas(sender, current, instance.pk, 1)
+
+
+@receiver(pre_delete, sender=Customer)
+def remember_contract_revenue(sender, instance, **kwargs):
+    """
+    Запоминает стоимость контракта покупателя и других покупателей кампании
+    с этим контрактом до удаления: при каскадном удалении контракт и они
+    могут быть удалены раньше отправки post_delete (см. update_stats_on_delete).
+    """
+    instance._stats_contract = None
+    if instance.contract_id is not None:
+        cost = (Contract.objects.filter(pk=instance.contract_id)
+                .values_list('cost', flat=True).first())
+        shared_with = list(Customer.objects.filter(ads_id=instance.ads_id,
+                                                   contract_id=instance.contract_id)
+                           .exclude(pk=instance.pk).values_list('pk', flat=True))
+        instance._stats_contract = (Decimal(str(cost or 0)), shared_with)
+
+
+@receiver(post_delete, sender=Lead)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Contract)
+def update_stats_on_delete(sender, instance, **kwargs):
+    """
+    Уменьшает счетчики при удалении записи.
+
+    Стоимость контракта покупателя вычитается из выручки, если у кампании
+    не осталось покупателей с этим контрактом. Если такие покупатели
+    удалены той же пачкой, ее вычитает только покупатель с наименьшим pk.
+    """
+    values = {field: getattr(instance, field) for field in TRACKED_FIELDS[sender]}
+    deltas = {COUNTERS[sender]: -1}
+    contract = getattr(instance, '_stats_contract', None) if sender is Customer else None
+    if contract is not None:
+        cost, shared_with = contract
+        if (all(pk > instance.pk for pk in shared_with)
+                and not Customer.objects.filter(pk__in=shared_with).exists()):
+            deltas['revenue'] = -cost
+    increment_campaign_stats(values['ads_id'], **deltas)
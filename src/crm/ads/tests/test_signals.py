@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Ads, CampaignStats
+from ..service import find_campaign_stats_drift
+from ...customers.models import Customer
+from ...customers.tests.test_models import CustomerModelMixinTest
+from ...leads.models import Lead
+
+
+class CampaignStatsSignalsTest(CustomerModelMixinTest, TestCase):
+    """Тесты инкрементального обновления счетчиков CampaignStats."""
+
+    def get_stats(self, ads=None) -> CampaignStats:
+        """Метод возвращает актуальные счетчики рекламной кампании."""
+        return CampaignStats.objects.get(ads=ads or self.ads)
+
+    def test_counters_after_create(self):
+        """Тест проверяет счетчики после создания лида, контракта и покупателя."""
+        stats = self.get_stats()
+        self.assertEqual(stats.leads_count, 1)
+        self.assertEqual(stats.active_customers_count, 1)
+        self.assertEqual(stats.contracts_count, 1)
+        self.assertEqual(stats.revenue, 12000)
+
+    def test_counters_moved_on_update(self):
+        """
+        Тест проверяет перенос счетчиков при смене кампании и стоимости
+        контракта: выручка относится к кампании покупателя контракта.
+        """
+        other_ads = Ads.objects.create(name='Other ads', description='-',
+                                       budget=100, product=self.product)
+        self.contract.ads = other_ads
+        self.contract.cost = 5000
+        self.contract.save()
+        self.assertEqual(self.get_stats().contracts_count, 0)
+        self.assertEqual(self.get_stats().revenue, 5000)
+        self.assertEqual(self.get_stats(other_ads).contracts_count, 1)
+        self.assertEqual(self.get_stats(other_ads).revenue, 0)
+        self.customer.ads = other_ads
+        self.customer.save()
+        self.assertEqual(self.get_stats().revenue, 0)
+        self.assertEqual(self.get_stats(other_ads).revenue, 5000)
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    def test_shared_contract(self):
+        """
+        Тест проверяет, что контракт нескольких покупателей кампании входит
+        в выручку один раз, в том числе при каскадном удалении покупателей.
+        """
+        lead = Lead.objects.create(first_name='Петр', last_name='Петров',
+                                   phone='89996660001', ads=self.ads)
+        customer = Customer.objects.create(lead=lead, ads=self.ads, contract=self.contract)
+        self.assertEqual(self.get_stats().revenue, 12000)
+        self.customer.delete()
+        self.assertEqual(self.get_stats().revenue, 12000)
+        Customer.objects.create(lead=self.lead, ads=self.ads, contract=self.contract)
+        Customer.objects.create(lead=lead, ads=self.ads)
+        self.contract.delete()
+        stats = self.get_stats()
+        self.assertEqual((stats.active_customers_count, stats.revenue), (1, 0))
+        self.assertFalse(Customer.objects.filter(pk=customer.pk).exists())
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    def test_counters_after_delete(self):
+        """Тест проверяет, что удаление лида уменьшает счетчики каскадно удаленных записей."""
+        self.lead.delete()
+        stats = self.get_stats()
+        self.assertEqual(stats.leads_count, 0)
+        self.assertEqual(stats.active_customers_count, 0)
+        self.assertEqual(stats.contracts_count, 0)
+        self.assertEqual(stats.revenue, 0)
+
+    def test_delete_ads(self):
+        """Тест проверяет, что удаление кампании удаляет ее счетчики."""
+        self.ads.delete()
+        self.assertFalse(CampaignStats.objects.exists())
+
+    def test_rebuild_command(self):
+        """Тест проверяет, что команда находит расхождения и пересчитывает счетчики."""
+        call_command('rebuild_campaign_stats', '--check', stdout=StringIO())
+        Lead.objects.bulk_create([Lead(first_name='Петр', last_name='Петров',
+                                       phone='89996660001', ads=self.ads)])
+        with self.assertRaises(CommandError):
+            call_command('rebuild_campaign_stats', '--check', stdout=StringIO())
+        call_command('rebuild_campaign_stats', stdout=StringIO())
+        self.assertEqual(self.get_stats().leads_count, 2)
+        call_command('rebuild_campaign_stats', '--check', stdout=StringIO())
@@ -5,15 +5,19 @@ from django.test import TestCase
 from django.urls import reverse
 from django.urls import reverse_lazy
 
+from crm.core.testing import PerformanceBudgetMixin, performance_budget
 from crm.ads.forms import AdsForm
 from crm.ads.models import Ads
 from crm.ads.tests.test_models import AdsModelMixinTest
+from crm.contracts.models import Contract
+from crm.customers.models import Customer
 from crm.customers.tests.test_views import CustomerMixinViewTest
+from crm.leads.models import Lead
 
 User = get_user_model()
 
 
-class AdsMixinViewTest(AdsModelMixinTest, TestCase):
+class AdsMixinViewTest(PerformanceBudgetMixin, AdsModelMixinTest, TestCase):
     """Миксин для тестов классов AdsView."""
 
     @classmethod
@@ -33,6 +37,7 @@ class AdsCreateViewTest(AdsMixinViewTest, TestCase):
         self.user.user_permissions.add(*self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_url(self):
         """
         Тест проверяет, что после успешного создания новой рекламной
@@ -62,6 +67,7 @@ class AdsCreateViewTest(AdsMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.ads:ads_create'))
         self.assertTemplateUsed(response, 'ads/ads-create.html')
 
+    @performance_budget
     def test_with_permission_add_ads(self):
         """
         Тест проверяет, что с разрешением add_ads
@@ -86,6 +92,7 @@ class AdsListViewTest(AdsMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_count_ads_in_list(self):
         """Тест проверяет, что список рекламных компаний содержит 1 элемент."""
         response = self.client.get(reverse_lazy('crm.ads:ads_list'))
@@ -96,6 +103,7 @@ class AdsListViewTest(AdsMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.ads:ads_list'))
         self.assertTemplateUsed(response, 'ads/ads-list.html')
 
+    @performance_budget
     def test_with_permission_view_ads(self):
         """Тест проверяет, что с разрешением view_ads пользователь может видеть список товаров."""
         response = self.client.get(reverse('crm.ads:ads_list'))
@@ -122,6 +130,7 @@ class AdsDetailViewTest(AdsMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.ads:ads_detail', kwargs={'pk': self.ads.pk}))
         self.assertTemplateUsed(response, 'ads/ads-detail.html')
 
+    @performance_budget
     def test_with_permission_view_ads(self):
         """
         Тест проверяет, что с разрешением view_ads пользователь
@@ -151,6 +160,7 @@ class AdsUpdateViewTest(AdsMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_update_ads(self):
         """
         Тест проверяет, что после успешного обновления данных
@@ -180,6 +190,7 @@ class AdsUpdateViewTest(AdsMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.ads:ads_edit', kwargs={'pk': self.ads.pk}))
         self.assertTemplateUsed(response, 'ads/ads-edit.html')
 
+    @performance_budget
     def test_with_permission_change_ads(self):
         """
         Тест проверяет, что с разрешением change_ads
@@ -204,6 +215,7 @@ class AdsDeleteViewTest(AdsMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_delete_ads(self):
         """
         Тест проверяет, что после успешного удаления
@@ -221,6 +233,7 @@ class AdsDeleteViewTest(AdsMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.ads:ads_delete', kwargs={'pk': self.ads.pk}))
         self.assertTemplateUsed(response, 'ads/ads-delete.html')
 
+    @performance_budget
     def test_with_permission_delete_ads(self):
         """Тест проверяет, что с разрешением delete_ads пользователь может удалять компании."""
         response = self.client.get(reverse('crm.ads:ads_delete', kwargs={'pk': self.ads.pk}))
@@ -244,6 +257,7 @@ class AdsStatisticViewTest(CustomerMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.ads:ads_statistic'))
         self.assertTemplateUsed(response, 'ads/ads-statistic.html')
 
+    @performance_budget
     def test_used_correct_queryset(self):
         """Тест проверяет, что queryset выдает корректные данные по статистике ."""
         response = self.client.get(reverse('crm.ads:ads_statistic'))
@@ -254,6 +268,31 @@ class AdsStatisticViewTest(CustomerMixinViewTest, TestCase):
         self.assertEqual(response.context['ads'][0]['ads_profit'], 12000)
         self.assertEqual(response.context['ads'][0]['profit'], 12.0)
 
+    def test_profit_with_equal_contract_costs(self):
+        """Тест проверяет, что контракты с одинаковой стоимостью суммируются полностью."""
+        lead = Lead.objects.create(first_name='Петр', last_name='Петров',
+                                   phone='89996660001', ads=self.ads)
+        contract = Contract.objects.create(name='Второй договор', lead=lead, ads=self.ads,
+                                           product=self.product, cost=12000,
+                                           conclusion_day='2024-01-01',
+                                           start_day='2024-01-05',
+                                           end_day='2024-01-30')
+        Customer.objects.create(lead=lead, ads=self.ads, contract=contract)
+        response = self.client.get(reverse('crm.ads:ads_statistic'))
+        self.assertEqual(response.context['ads'][0]['leads_count'], 2)
+        self.assertEqual(response.context['ads'][0]['customers_count'], 2)
+        self.assertEqual(response.context['ads'][0]['ads_profit'], 24000)
+        self.assertEqual(response.context['ads'][0]['profit'], 24.0)
+
+    def test_ads_with_equal_names_and_zero_budget(self):
+        """Тест проверяет, что кампании не объединяются по названию и нулевой бюджет допустим."""
+        Ads.objects.create(name=self.ads.name, description='Test', budget=0, product=self.product)
+        response = self.client.get(reverse('crm.ads:ads_statistic'))
+        self.assertEqual(len(response.context['ads']), 2)
+        self.assertEqual(response.context['ads'][1]['leads_count'], 0)
+        self.assertEqual(response.context['ads'][1]['ads_profit'], 0)
+        self.assertIsNone(response.context['ads'][1]['profit'])
+
     def test_logout(self):
         """
         Тест проверяет, что при выходе пользователя из
@@ -5,7 +5,8 @@ from .views import (AdsListView,
                     AdsDetailView,
                     AdsUpdateView,
                     AdsDeleteView,
-                    AdsStatisticView)
+                    AdsStatisticView,
+                    AdsAutocompleteView)
 
 app_name = 'crm.ads'
 
@@ -15,5 +16,6 @@ urlpatterns = [
     path('<int:pk>/edit/', AdsUpdateView.as_view(), name='ads_edit'),
     path('<int:pk>/delete/', AdsDeleteView.as_view(), name='ads_delete'),
     path('statistic/', AdsStatisticView.as_view(), name='ads_statistic'),
+    path('autocomplete/', AdsAutocompleteView.as_view(), name='ads_autocomplete'),
     path('', AdsListView.as_view(), name='ads_list'),
 ]
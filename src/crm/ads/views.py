@@ -1,7 +1,4 @@
 from django.contrib.auth.mixins import PermissionRequiredMixin, LoginRequiredMixin
-from django.core.cache import cache
-from django.db.models import Count, Sum, FloatField
-from django.db.models.functions import Cast
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views import View
@@ -9,14 +6,17 @@ from django.views.generic import ListView, UpdateView, DetailView, DeleteView
 
 from .forms import AdsForm
 from .models import Ads
-from ..products.models import Product
+from .service import get_ads_statistic
+from ..core.handoff import read_handoff
+from ..core.mixins import KeysetPaginationMixin
+from ..core.views import AutocompleteView
 
 
-class AdsListView(PermissionRequiredMixin, ListView):
+class AdsListView(PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     """Класс для отображения списка рекламных компаний."""
 
     permission_required = "ads.view_ads"
-    model = Ads
+    queryset = Ads.objects.only('name')
     template_name = 'ads/ads-list.html'
     context_object_name = 'ads'
 
@@ -25,7 +25,7 @@ class AdsDetailView(PermissionRequiredMixin, DetailView):
     """Класс для детального отображения рекламной компании."""
 
     permission_required = "ads.view_ads"
-    model = Ads
+    queryset = Ads.objects.select_related('product')
     template_name = 'ads/ads-detail.html'
 
 
@@ -38,15 +38,13 @@ class AdsCreateView(PermissionRequiredMixin, View):
 
     def get(self, request):
         """
-        Метод get проверяет есть ли в кэше параметр product_id:
-        если есть, то выдает форму с предзаполнеными данными,
+        Метод get проверяет передан ли в запросе параметр product_id:
+        если передан, то выдает форму с предзаполнеными данными,
         иначе выдает пустую.
         """
-        product_id = cache.get('product_id')
-        cache.delete('product_id')
+        product_id = read_handoff(request).get('product_id')
         if product_id:
-            product = Product.objects.filter(id=product_id).first()
-            form = AdsForm(data={'product': product})
+            form = AdsForm(data={'product': product_id})
         else:
             form = AdsForm()
         return render(request, self.template_name, {'form': form})
@@ -65,8 +63,8 @@ class AdsUpdateView(PermissionRequiredMixin, UpdateView):
 
     permission_required = "ads.change_ads"
     model = Ads
+    form_class = AdsForm
     template_name = 'ads/ads-edit.html'
-    fields = '__all__'
     success_url = reverse_lazy('crm.ads:ads_list')
 
 
@@ -84,12 +82,12 @@ class AdsStatisticView(LoginRequiredMixin, ListView):
 
     template_name = 'ads/ads-statistic.html'
     context_object_name = 'ads'
-    queryset = (Ads.objects.values('name')
-                .annotate(
-                    leads_count=Count('lead', distinct=True),
-                    customers_count=Count('customer', distinct=True),
-                    ads_budget=Sum('budget', distinct=True),
-                    ads_profit=Sum('customer__contract__cost', distinct=True))
-                .annotate(profit=(Cast('ads_profit', FloatField())
-                          / Cast('ads_budget', FloatField())
-                          )))
+    queryset = get_ads_statistic()
+
+
+class AdsAutocompleteView(AutocompleteView):
+    """Класс для поиска рекламных компаний по началу названия."""
+
+    permission_required = "ads.view_ads"
+    queryset = Ads.objects.only('name')
+    search_fields = ('name',)
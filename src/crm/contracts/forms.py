@@ -4,6 +4,7 @@ from django.core.exceptions import ValidationError
 from .mixins import MixinLeadAdsForm
 from .models import Contract
 from ..ads.mixins import MixinProductForm
+from ..core.widgets import AutocompleteSelect
 
 
 class ContractForm(MixinProductForm, MixinLeadAdsForm):
@@ -43,9 +44,26 @@ class ContractForm(MixinProductForm, MixinLeadAdsForm):
 
     def clean_product(self):
         """Метод проверяет соответствует ли выбранная услуга выбранной компании"""
-        ads = self.cleaned_data['ads']
+        ads = self.cleaned_data.get('ads')
         product = self.cleaned_data['product']
-        if product.id != ads.product.id:
+        if ads is not None and product.id != ads.product_id:
             self.add_error('product',
                            'Выбранная услуга не соответствует выбранной рекламной компании')
         return product
+
+
+class ContractUpdateForm(forms.ModelForm):
+    """
+    Класс формы для редактирования контракта.
+
+    В отличие от ContractForm позволяет выбрать клиента, уже переведенного в активные.
+    """
+
+    class Meta:
+        model = Contract
+        fields = '__all__'
+        widgets = {
+            'lead': AutocompleteSelect('crm.leads:leads_autocomplete'),
+            'ads': AutocompleteSelect('crm.ads:ads_autocomplete'),
+            'product': AutocompleteSelect('crm.products:products_autocomplete'),
+        }
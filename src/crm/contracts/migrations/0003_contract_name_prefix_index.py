@@ -0,0 +1,16 @@
+# Generated by Django 4.2.10 on 2026-10-18 22:40
+
+from django.db import migrations
+
+from ...core.db.search import AddSearchIndexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0002_contract_name_search'),
+    ]
+
+    operations = [
+        AddSearchIndexes(model_name='contract', prefix=['name']),
+    ]
@@ -1,27 +1,60 @@
-from django import forms
+from django.core.exceptions import ValidationError
 
 from ..ads.models import Ads
+from ..core.forms import BatchedModelChoiceField, BatchedModelForm
+from ..core.widgets import AutocompleteSelect
 from ..leads.models import Lead
 
 
-class MixinLeadAdsForm(forms.ModelForm):
-    """Класс миксина формы, включающий рекламную компанию и потенциального клиента."""
+class MixinLeadAdsForm(BatchedModelForm):
+    """
+    Класс миксина формы, включающий рекламную компанию и потенциального клиента.
 
-    lead = forms.ModelChoiceField(
+    Выбранный клиент загружается одним запросом вместе со своей рекламной
+    компанией и ее услугой, которые затем подставляются в поля ads и product
+    без отдельных запросов.
+    """
+
+    lead = BatchedModelChoiceField(
         queryset=Lead.objects.filter(to_active=False),
         empty_label="Клиент не выбран",
-        label='Потенциальный клиент'
+        label='Потенциальный клиент',
+        widget=AutocompleteSelect('crm.leads:leads_autocomplete', {'to_active': '0'}),
     )
-    ads = forms.ModelChoiceField(
+    ads = BatchedModelChoiceField(
         queryset=Ads.objects.all(),
         empty_label="Рекламная компания не выбрана",
-        label='Рекламная компания')
+        label='Рекламная компания',
+        widget=AutocompleteSelect('crm.ads:ads_autocomplete'),
+    )
+
+    def full_clean(self):
+        """Метод загружает выбранного клиента до проверки полей формы."""
+        self.resolve_lead()
+        super().full_clean()
+
+    def resolve_lead(self):
+        """Метод загружает выбранного клиента с компанией и услугой одним запросом."""
+        field = self.fields['lead']
+        value = self['lead'].data
+        value = getattr(value, 'pk', value)
+        if value in field.empty_values:
+            return
+        try:
+            lead = field.queryset.select_related('ads__product').get(pk=value)
+        except (ValueError, TypeError, ValidationError, Lead.DoesNotExist):
+            return
+        field.resolved[str(lead.pk)] = lead
+        if self.fields['ads'].resolve(lead.ads):
+            product = self.fields.get('product')
+            if isinstance(product, BatchedModelChoiceField):
+                product.resolve(lead.ads.product)
 
     def clean_ads(self):
         """Метод проверяет соответствует ли выбранная компания пользователю"""
         ads = self.cleaned_data['ads']
-        lead = self.cleaned_data['lead']
-        if lead.ads.id != ads.id:
+        lead = self.cleaned_data.get('lead')
+        if lead is not None and lead.ads_id != ads.id:
             self.add_error('ads', 'Выбранная рекламная компания не соответствует'
                                   ' выбранному пользователю')
         return ads
@@ -0,0 +1,28 @@
+from typing import Optional
+
+from django.db.models import F, OuterRef, Subquery
+
+from .models import Contract
+from ..leads.models import Lead
+
+
+def get_lead_prefill(lead_id: int) -> Optional[dict]:
+    """
+    Функция одним запросом собирает данные для предзаполнения форм
+    контракта и покупателя по потенциальному клиенту: его рекламную
+    компанию, услугу этой компании и последний заключенный контракт.
+
+    Возвращает словарь первичных ключей с именами полей форм или None,
+    если клиента не существует.
+    """
+    latest_contract = (Contract.objects.filter(lead=OuterRef('pk'))
+                       .order_by('-conclusion_day', '-pk')
+                       .values('pk')[:1])
+    row = (Lead.objects.filter(pk=lead_id)
+           .annotate(product_id=F('ads__product_id'),
+                     contract_id=Subquery(latest_contract))
+           .values_list('pk', 'ads_id', 'product_id', 'contract_id')
+           .first())
+    if row is None:
+        return None
+    return dict(zip(('lead', 'ads', 'product', 'contract'), row))
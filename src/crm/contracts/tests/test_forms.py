@@ -0,0 +1,95 @@
+from django.test import TestCase
+
+from ..forms import ContractForm
+from ...ads.models import Ads
+from ...customers.forms import CustomerForm
+from ...leads.models import Lead
+from ...products.models import Product
+from .test_models import ContractModelMixinTest
+
+
+class ContractFormTest(ContractModelMixinTest, TestCase):
+    """Тесты для класса ContractForm."""
+
+    def get_data(self, **kwargs) -> dict:
+        """Метод возвращает данные корректно заполненной формы с заменой из kwargs."""
+        data = {
+            'name': 'Контракт',
+            'lead': self.lead.pk,
+            'ads': self.ads.pk,
+            'product': self.product.pk,
+            'cost': 13500,
+            'conclusion_day': '2024-02-01',
+            'start_day': '2024-02-05',
+            'end_day': '2024-02-28',
+        }
+        data.update(kwargs)
+        return data
+
+    def test_valid_form_costs_one_query(self):
+        """Тест проверяет, что проверка заполненной формы выполняет один запрос."""
+        form = ContractForm(data=self.get_data())
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['lead'], self.lead)
+        self.assertEqual(form.cleaned_data['ads'], self.ads)
+        self.assertEqual(form.cleaned_data['product'], self.product)
+
+    def test_prefilled_form_costs_one_query(self):
+        """Тест проверяет, что форма, заполненная объектами моделей, выполняет один запрос."""
+        form = ContractForm(data=self.get_data(lead=self.lead, ads=self.ads,
+                                               product=self.product))
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid(), form.errors)
+
+    def test_mismatched_ads_and_product(self):
+        """
+        Тест проверяет, что компания и услуга, не соответствующие
+        клиенту, отклоняются с числом запросов, не зависящим от данных.
+        """
+        product = Product.objects.create(name='Другая услуга', description='-', price=1)
+        ads = Ads.objects.create(name='Другая кампания', description='-', budget=1,
+                                 product=product)
+        form = ContractForm(data=self.get_data(ads=ads.pk, product=product.pk))
+        with self.assertNumQueries(3):
+            self.assertFalse(form.is_valid())
+        self.assertIn('ads', form.errors)
+
+        form = ContractForm(data=self.get_data(product=product.pk))
+        with self.assertNumQueries(2):
+            self.assertFalse(form.is_valid())
+        self.assertIn('product', form.errors)
+
+    def test_active_lead_is_rejected(self):
+        """Тест проверяет, что клиент, переведенный в активные, не может быть выбран."""
+        Lead.objects.filter(pk=self.lead.pk).update(to_active=True)
+        form = ContractForm(data=self.get_data())
+        self.assertFalse(form.is_valid())
+        self.assertIn('lead', form.errors)
+        self.assertNotIn('ads', form.errors)
+
+    def test_invalid_lead_value(self):
+        """Тест проверяет, что некорректное значение клиента не приводит к исключению."""
+        form = ContractForm(data=self.get_data(lead='abc'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('lead', form.errors)
+
+
+class CustomerFormTest(ContractModelMixinTest, TestCase):
+    """Тесты для класса CustomerForm."""
+
+    def test_valid_form_costs_two_queries(self):
+        """Тест проверяет, что заполненная форма проверяется двумя запросами."""
+        form = CustomerForm(data={'lead': self.lead.pk, 'ads': self.ads.pk,
+                                  'contract': self.contract.pk})
+        with self.assertNumQueries(2):
+            self.assertTrue(form.is_valid(), form.errors)
+
+    def test_mismatched_contract(self):
+        """Тест проверяет, что контракт другого клиента отклоняется."""
+        lead = Lead.objects.create(first_name='Петр', last_name='Петров',
+                                   phone='89991110000', ads=self.ads)
+        form = CustomerForm(data={'lead': lead.pk, 'ads': self.ads.pk,
+                                  'contract': self.contract.pk})
+        self.assertFalse(form.is_valid())
+        self.assertIn('contract', form.errors)
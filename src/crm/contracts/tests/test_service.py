@@ -0,0 +1,39 @@
+import datetime
+
+from django.test import TestCase
+
+from ..models import Contract
+from ..service import get_lead_prefill
+from .test_models import ContractModelMixinTest
+
+
+class LeadPrefillTest(ContractModelMixinTest, TestCase):
+    """Тесты для функции get_lead_prefill."""
+
+    def test_prefill_in_one_query(self):
+        """Тест проверяет, что данные для формы собираются одним запросом."""
+        with self.assertNumQueries(1):
+            data = get_lead_prefill(self.lead.pk)
+        self.assertEqual(data, {'lead': self.lead.pk, 'ads': self.ads.pk,
+                                'product': self.product.pk, 'contract': self.contract.pk})
+
+    def test_latest_contract(self):
+        """Тест проверяет, что подставляется последний по дате заключения контракт."""
+        day = datetime.date(2024, 3, 1)
+        latest = Contract.objects.create(name='Новый договор', lead=self.lead, ads=self.ads,
+                                         product=self.product, cost=1, conclusion_day=day,
+                                         start_day=day, end_day=day)
+        Contract.objects.create(name='Старый договор', lead=self.lead, ads=self.ads,
+                                product=self.product, cost=1,
+                                conclusion_day=datetime.date(2023, 1, 1),
+                                start_day=day, end_day=day)
+        self.assertEqual(get_lead_prefill(self.lead.pk)['contract'], latest.pk)
+
+    def test_lead_without_contract(self):
+        """Тест проверяет, что у клиента без контрактов поле контракта пустое."""
+        self.contract.delete()
+        self.assertIsNone(get_lead_prefill(self.lead.pk)['contract'])
+
+    def test_missing_lead(self):
+        """Тест проверяет, что для несуществующего клиента возвращается None."""
+        self.assertIsNone(get_lead_prefill(self.lead.pk + 100))
@@ -7,6 +7,7 @@ from django.test import TestCase
 from django.urls import reverse
 from django.urls import reverse_lazy
 
+from crm.core.testing import PerformanceBudgetMixin, performance_budget
 from crm.contracts.forms import ContractForm
 from crm.contracts.models import Contract
 from crm.contracts.tests.test_models import ContractModelMixinTest
@@ -14,7 +15,7 @@ from crm.contracts.tests.test_models import ContractModelMixinTest
 User = get_user_model()
 
 
-class ContractMixinViewTest(ContractModelMixinTest, TestCase):
+class ContractMixinViewTest(PerformanceBudgetMixin, ContractModelMixinTest, TestCase):
     """Миксин для тестов классов ContractView."""
 
     @classmethod
@@ -34,6 +35,7 @@ class ContractCreateViewTest(ContractMixinViewTest, TestCase):
         self.user.user_permissions.add(*self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_url(self):
         """
         Тест проверяет, что после успешного создания нового
@@ -69,6 +71,7 @@ class ContractCreateViewTest(ContractMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.contracts:contract_create'))
         self.assertTemplateUsed(response, 'contracts/contracts-create.html')
 
+    @performance_budget
     def test_with_permission_add_contract(self):
         """
         Тест проверяет, что с разрешением add_contract
@@ -93,6 +96,7 @@ class ContractListViewTest(ContractMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_count_contract_in_list(self):
         """Тест проверяет, что список контрактов содержит 1 элемент."""
         response = self.client.get(reverse_lazy('crm.contracts:contracts_list'))
@@ -103,6 +107,7 @@ class ContractListViewTest(ContractMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.contracts:contracts_list'))
         self.assertTemplateUsed(response, 'contracts/contracts-list.html')
 
+    @performance_budget
     def test_with_permission_view_contract(self):
         """
         Тест проверяет, что с разрешением view_contract
@@ -133,6 +138,7 @@ class ContractDetailViewTest(ContractMixinViewTest, TestCase):
                                            kwargs={'pk': self.contract.pk}))
         self.assertTemplateUsed(response, 'contracts/contracts-detail.html')
 
+    @performance_budget
     def test_with_permission_view_contract(self):
         """
         Тест проверяет, что с разрешением view_contract
@@ -171,6 +177,7 @@ class ContractUpdateViewTest(ContractMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_update_contract(self):
         """
         Тест проверяет, что после успешного обновления данных контракта
@@ -214,6 +221,7 @@ class ContractUpdateViewTest(ContractMixinViewTest, TestCase):
                                            kwargs={'pk': self.contract.pk}))
         self.assertTemplateUsed(response, 'contracts/contracts-edit.html')
 
+    @performance_budget
     def test_with_permission_change_contract(self):
         """
         Тест проверяет, что с разрешением change_contract
@@ -240,6 +248,7 @@ class ContractDeleteViewTest(ContractMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_delete_contract(self):
         """
         Тест проверяет, что после успешного удаления контракта
@@ -259,6 +268,7 @@ class ContractDeleteViewTest(ContractMixinViewTest, TestCase):
                                            kwargs={'pk': self.contract.pk}))
         self.assertTemplateUsed(response, 'contracts/contracts-delete.html')
 
+    @performance_budget
     def test_with_permission_delete_contract(self):
         """
         Тест проверяет, что с разрешением delete_contract
@@ -4,7 +4,8 @@ from .views import (ContractListView,
                     ContractCreateView,
                     ContractDetailView,
                     ContractUpdateView,
-                    ContractDeleteView)
+                    ContractDeleteView,
+                    ContractAutocompleteView)
 
 app_name = 'crm.contracts'
 
@@ -13,5 +14,7 @@ urlpatterns = [
     path('<int:pk>/', ContractDetailView.as_view(), name='contract_detail'),
     path('<int:pk>/edit/', ContractUpdateView.as_view(), name='contract_edit'),
     path('<int:pk>/delete/', ContractDeleteView.as_view(), name='contract_delete'),
+    path('autocomplete/', ContractAutocompleteView.as_view(),
+         name='contracts_autocomplete'),
     path('', ContractListView.as_view(), name='contracts_list'),
 ]
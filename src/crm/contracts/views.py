@@ -1,24 +1,25 @@
 from typing import Optional
 
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.cache import cache
+from django.http import HttpRequest
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views import View
 from django.views.generic import ListView, UpdateView, DetailView, DeleteView
 
-from .forms import ContractForm
+from .forms import ContractForm, ContractUpdateForm
 from .models import Contract
-from ..ads.models import Ads
-from ..leads.models import Lead
-from ..products.models import Product
+from .service import get_lead_prefill
+from ..core.handoff import read_handoff
+from ..core.mixins import KeysetPaginationMixin
+from ..core.views import AutocompleteView
 
 
-class ContractListView(PermissionRequiredMixin, ListView):
+class ContractListView(PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     """Класс для отображения списка контрактов."""
 
     permission_required = "contracts.view_contract"
-    model = Contract
+    queryset = Contract.objects.only('name')
     template_name = 'contracts/contracts-list.html'
     context_object_name = 'contracts'
 
@@ -27,26 +28,17 @@ class ContractDetailView(PermissionRequiredMixin, DetailView):
     """Класс для детального отображения контракта."""
 
     permission_required = "contracts.view_contract"
-    model = Contract
+    queryset = Contract.objects.select_related('product')
     template_name = 'contracts/contracts-detail.html'
 
 
-def get_data_for_form() -> Optional[dict]:
-    """Функция проверяет есть ли в кэше параметр lead_id:
-        если есть, то возвращает словарь с предзаполнеными данными,
+def get_data_for_form(request: HttpRequest) -> Optional[dict]:
+    """Функция проверяет передан ли в запросе параметр lead_id:
+        если передан, то возвращает словарь с предзаполнеными данными,
         иначе возвращает None."""
-    lead_id = cache.get('lead_id')
-    cache.delete('lead_id')
+    lead_id = read_handoff(request).get('lead_id')
     if lead_id:
-        lead = Lead.objects.filter(id=lead_id).first()
-        ads = Ads.objects.filter(lead__id=lead_id).first()
-        product = Product.objects.filter(ads__lead__id=lead_id).first()
-        contract = Contract.objects.filter(lead__id=lead_id).first()
-        dict_data_for_form: dict = {'lead': lead,
-                                    'ads': ads,
-                                    'product': product,
-                                    'contract': contract}
-        return dict_data_for_form
+        return get_lead_prefill(lead_id)
     return None
 
 
@@ -59,11 +51,11 @@ class ContractCreateView(PermissionRequiredMixin, View):
 
     def get(self, request):
         """
-        Метод get проверяет есть ли в кэше параметр lead_id:
-        если есть, то выдает форму с предзаполнеными данными,
+        Метод get проверяет передан ли в запросе параметр lead_id:
+        если передан, то выдает форму с предзаполнеными данными,
         иначе выдает пустую.
         """
-        dict_data_for_form = get_data_for_form()
+        dict_data_for_form = get_data_for_form(request)
         if dict_data_for_form is not None:
             form = ContractForm(data=dict_data_for_form)
         else:
@@ -86,8 +78,8 @@ class ContractUpdateView(PermissionRequiredMixin, UpdateView):
 
     permission_required = "contracts.change_contract"
     model = Contract
+    form_class = ContractUpdateForm
     template_name = 'contracts/contracts-edit.html'
-    fields = '__all__'
     success_url = reverse_lazy('crm.contracts:contracts_list')
 
 
@@ -98,3 +90,12 @@ class ContractDeleteView(PermissionRequiredMixin, DeleteView):
     model = Contract
     template_name = 'contracts/contracts-delete.html'
     success_url = reverse_lazy('crm.contracts:contracts_list')
+
+
+class ContractAutocompleteView(AutocompleteView):
+    """Класс для поиска контрактов по началу названия или фамилии клиента."""
+
+    permission_required = "contracts.view_contract"
+    queryset = (Contract.objects.select_related('lead', 'product')
+                .only('lead__first_name', 'lead__last_name', 'product__name'))
+    search_fields = ('name', 'lead__last_name')
@@ -0,0 +1,75 @@
+"""
+Бэкенд PostgreSQL с пулом соединений внутри процесса.
+
+Подключается в settings.DATABASES:
+
+    'ENGINE': 'crm.core.db.backends.postgresql_pool',
+    'CONN_MAX_AGE': 0,
+    'OPTIONS': {
+        'POOL': {'max_size': 10, 'timeout': 10, 'idle_timeout': 300, 'pre_ping': True},
+    },
+
+Django закрывает соединение в конце каждого запроса, а этот бэкенд вместо
+закрытия возвращает его в пул, общий для всех потоков процесса (WSGI-потоков
+или потоков, в которых ASGI-сервер выполняет синхронный код).
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from .creation import DatabaseCreation
+from ...pool import PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Класс соединения, получающий соединения psycopg из пула."""
+
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection_pool = None
+        self.isolation_level = None
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('POOL', None)
+        return conn_params
+
+    def get_pool(self, conn_params: dict):
+        """Метод возвращает пул процесса для параметров подключения conn_params."""
+        key = (self.alias, conn_params.get('dbname'), conn_params.get('host'),
+               conn_params.get('port'), conn_params.get('user'))
+        options = self.settings_dict['OPTIONS'].get('POOL', {})
+        return get_pool(key, f'{self.alias}:{conn_params.get("dbname")}', **options)
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        # Уровень изоляции родительский класс задает только при создании
+        # соединения; для соединения из пула он берется из тех же настроек.
+        try:
+            self.isolation_level = IsolationLevel(self.settings_dict['OPTIONS'].get(
+                'isolation_level', IsolationLevel.READ_COMMITTED))
+        except ValueError as exc:
+            raise ImproperlyConfigured(str(exc)) from exc
+        connect = super().get_new_connection
+        try:
+            connection = pool.checkout(lambda: connect(conn_params))
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+        self.connection_pool = pool
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool, self.connection_pool = self.connection_pool, None
+        with self.wrap_database_errors:
+            if pool is None:
+                self.connection.close()
+            elif self.in_atomic_block:
+                # Соединение закрывается посреди транзакции (после ошибки),
+                # его состояние неизвестно, поэтому в пул оно не возвращается.
+                pool.discard(self.connection)
+            else:
+                pool.release(self.connection)
@@ -0,0 +1,11 @@
+from django.db.backends.postgresql import creation
+
+from ...pool import close_idle_connections
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Класс создания тестовой базы, закрывающий соединения пула перед ее удалением."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_idle_connections(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Значения conn.info.transaction_status (совпадают у psycopg2 и psycopg).
+TRANSACTION_STATUS_IDLE = 0
+TRANSACTION_STATUS_INTRANS = 2
+TRANSACTION_STATUS_INERROR = 3
+
+
+class PoolTimeout(Exception):
+    """Исключение: свободное соединение не появилось за время ожидания."""
+
+
+class ConnectionPool:
+    """
+    Класс ограниченного пула соединений с базой данных, общего для всех
+    потоков процесса.
+
+    Соединение выдается потоку методом checkout и возвращается методом
+    release. Если все max_size соединений заняты, поток ждет освобождения
+    не дольше timeout секунд. Соединения, простаивавшие дольше
+    idle_timeout секунд, закрываются, а при pre_ping перед выдачей
+    соединение проверяется запросом SELECT 1.
+    """
+
+    def __init__(self, name: str, max_size: int = 10, timeout: float = 10.0,
+                 idle_timeout: float = 300.0, pre_ping: bool = True):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.pid = os.getpid()
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+        }
+
+    def checkout(self, connect: Callable):
+        """
+        Метод возвращает свободное соединение из пула или новое,
+        созданное функцией connect, если размер пула это позволяет.
+        """
+        started = time.monotonic()
+        while True:
+            connection = self._acquire(started)
+            if connection is None:
+                try:
+                    connection = connect()
+                except Exception:
+                    self._forget()
+                    raise
+                with self._condition:
+                    self._stats['connections_created'] += 1
+                return connection
+            if not self.pre_ping or self._ping(connection):
+                return connection
+            self.discard(connection)
+
+    def release(self, connection):
+        """Метод возвращает соединение в пул, откатив незавершенную транзакцию."""
+        if os.getpid() != self.pid:
+            return
+        if not self._reset(connection):
+            self.discard(connection)
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def discard(self, connection):
+        """Метод закрывает соединение и освобождает его место в пуле."""
+        self._close(connection)
+        self._forget()
+
+    def close_idle(self):
+        """Метод закрывает все простаивающие соединения."""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            self._close(connection)
+
+    def stats(self) -> dict:
+        """Метод возвращает счетчики пула и текущее число соединений."""
+        with self._condition:
+            return {
+                **self._stats,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+            }
+
+    def _acquire(self, started: float):
+        """
+        Метод ждет свободное соединение или место для нового.
+        Возвращает соединение или None, если нужно создать новое.
+        """
+        deadline = started + self.timeout
+        expired = []
+        try:
+            with self._condition:
+                while True:
+                    expired.extend(self._pop_expired())
+                    if self._idle:
+                        connection = self._idle.pop()[0]
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        connection = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'No connection available in pool {self.name!r} '
+                            f'within {self.timeout}s ({self.max_size} in use)')
+                    self._condition.wait(remaining)
+                waited = time.monotonic() - started
+                self._stats['checkouts'] += 1
+                self._stats['wait_seconds_total'] += waited
+                self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+            return connection
+        finally:
+            for old in expired:
+                self._close(old)
+
+    def _pop_expired(self) -> list:
+        """Метод извлекает из пула соединения, простаивавшие дольше idle_timeout."""
+        expired = []
+        threshold = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < threshold:
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+        return expired
+
+    def _forget(self):
+        """Метод освобождает место закрытого или не созданного соединения."""
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _close(self, connection):
+        with self._condition:
+            self._stats['connections_closed'] += 1
+        try:
+            connection.close()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.debug('Error closing pooled connection', exc_info=True)
+
+    @staticmethod
+    def _ping(connection) -> bool:
+        """Метод проверяет, что соединение с сервером не разорвано."""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            return True
+        except Exception:  # pylint: disable=broad-exception-caught
+            return False
+
+    @staticmethod
+    def _reset(connection) -> bool:
+        """Метод готовит соединение к повторному использованию, если это возможно."""
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == TRANSACTION_STATUS_IDLE:
+            return True
+        if status in (TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_INERROR):
+            try:
+                connection.rollback()
+                return True
+            except Exception:  # pylint: disable=broad-exception-caught
+                return False
+        return False
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Пулы, унаследованные от родительского процесса: их соединения нельзя ни
+# использовать, ни закрывать, поэтому они только удерживаются от сборки мусора.
+_inherited_pools = []
+
+
+def get_pool(key: tuple, name: str, **options) -> ConnectionPool:
+    """
+    Функция возвращает пул для ключа key, создавая его при первом обращении
+    или после fork, чтобы процессы не делили соединения друг с другом.
+    """
+    with _pools_lock:
+        pool: Optional[ConnectionPool] = _pools.get(key)
+        if pool is not None and pool.pid != os.getpid():
+            _inherited_pools.append(pool)
+            pool = None
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(name, **options)
+        return pool
+
+
+def pool_stats() -> dict:
+    """Функция возвращает счетчики всех пулов текущего процесса по их именам."""
+    with _pools_lock:
+        pools = [pool for pool in _pools.values() if pool.pid == os.getpid()]
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def close_idle_connections(dbname: Optional[str] = None):
+    """Функция закрывает простаивающие соединения пулов (к базе dbname, если указана)."""
+    with _pools_lock:
+        pools = [pool for key, pool in _pools.items()
+                 if pool.pid == os.getpid() and dbname in (None, key[1])]
+    for pool in pools:
+        pool.close_idle()
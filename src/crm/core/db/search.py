@@ -0,0 +1,160 @@
+import logging
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.migrations.operations.base import Operation
+from django.db.models import Index
+from django.db.models.functions import Upper
+
+logger = logging.getLogger(__name__)
+
+# Конфигурация полнотекстового поиска: русские слова приводятся к основе
+# русским стеммером, латинские — английским, поэтому одна конфигурация
+# подходит для обоих языков.
+SEARCH_CONFIG = 'russian'
+
+TRIGRAM_EXTENSION = 'pg_trgm'
+
+# Имена триграммных индексов по псевдонимам баз: индексы создаются
+# миграциями (см. AddSearchIndexes), поэтому читаются один раз за процесс.
+_trigram_indexes = {}
+
+
+def has_trigram_indexes(connection, model, *fields) -> bool:
+    """
+    Функция проверяет, что в базе connection есть триграммные индексы всех
+    полей fields модели model (см. get_trigram_index). Проверяются сами
+    индексы, а не расширение pg_trgm: если его установили после миграций,
+    индексов нет, и поиск по подстроке читал бы всю таблицу.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    if connection.alias not in _trigram_indexes:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT indexname FROM pg_indexes WHERE indexname LIKE %s',
+                           ['%\\_trgm\\_idx'])
+            _trigram_indexes[connection.alias] = {row[0] for row in cursor.fetchall()}
+    return all(get_trigram_index(model, field).name in _trigram_indexes[connection.alias]
+               for field in fields)
+
+
+def get_search_vector(field: str) -> SearchVector:
+    """
+    Функция возвращает выражение полнотекстового вектора поля field. По
+    этому же выражению строится индекс (см. get_search_index), поэтому
+    запросы должны использовать эту функцию.
+    """
+    return SearchVector(field, config=SEARCH_CONFIG)
+
+
+def get_search_query(query: str) -> SearchQuery:
+    """Функция возвращает полнотекстовый запрос query в синтаксисе to_tsquery."""
+    return SearchQuery(query, config=SEARCH_CONFIG, search_type='raw')
+
+
+def get_search_index(model, field: str) -> GinIndex:
+    """Функция возвращает полнотекстовый GIN-индекс поля field модели model."""
+    return GinIndex(get_search_vector(field), name=f'{model._meta.app_label}_{field}_search_idx')
+
+
+def get_trigram_index(model, field: str) -> GinIndex:
+    """
+    Функция возвращает триграммный GIN-индекс поля field модели model.
+    Индекс строится по UPPER(field), так как в PostgreSQL Django выполняет
+    icontains как UPPER(field) LIKE UPPER(...).
+    """
+    return GinIndex(OpClass(Upper(field), name='gin_trgm_ops'),
+                    name=f'{model._meta.app_label}_{field}_trgm_idx')
+
+
+def get_prefix_index(model, field: str) -> Index:
+    """
+    Функция возвращает B-tree индекс поля field модели model для поиска по
+    началу без учета регистра (istartswith, см. AutocompleteView): Django
+    выполняет его как UPPER(field) LIKE 'X%', а такой LIKE использует
+    индекс только с классом операторов text_pattern_ops.
+    """
+    return Index(OpClass(Upper(field), name='text_pattern_ops'),
+                 name=f'{model._meta.app_label}_{field}_prefix_idx')
+
+
+class AddSearchIndexes(Operation):
+    """
+    Класс операции миграции, создающей индексы глобального поиска модели
+    model_name: полнотекстовые по полям full_text (см. get_search_index) и
+    триграммные (pg_trgm) по полям trigram (см. get_trigram_index), по
+    которым выполняются поиск подстроки (icontains) и нечеткий поиск
+    (trigram_similar), и индексы поиска по началу (istartswith) по полям
+    prefix (см. get_prefix_index).
+
+    Индексы создаются только в PostgreSQL, а триграммные — только если
+    доступно расширение pg_trgm (оно устанавливается этой же операцией). В
+    остальных случаях поиск работает без этих индексов: поиск по подстроке
+    и сходству включается по наличию индексов (см. has_trigram_indexes).
+    Состояние моделей
+    не меняется: индексов нет в Meta.indexes, так как в SQLite их нельзя
+    создать.
+    """
+
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, model_name: str, full_text: tuple = (), trigram: tuple = (),
+                 prefix: tuple = ()):
+        self.model_name = model_name
+        self.full_text = tuple(full_text)
+        self.trigram = tuple(trigram)
+        self.prefix = tuple(prefix)
+
+    def deconstruct(self):
+        kwargs = {'model_name': self.model_name}
+        if self.full_text:
+            kwargs['full_text'] = self.full_text
+        if self.trigram:
+            kwargs['trigram'] = self.trigram
+        if self.prefix:
+            kwargs['prefix'] = self.prefix
+        return self.__class__.__name__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def get_indexes(self, model, trigram: bool) -> list:
+        """Метод возвращает индексы операции, триграммные — если trigram."""
+        indexes = [get_search_index(model, field) for field in self.full_text]
+        indexes.extend(get_prefix_index(model, field) for field in self.prefix)
+        if trigram:
+            indexes.extend(get_trigram_index(model, field) for field in self.trigram)
+        return indexes
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor != 'postgresql':
+            return
+        trigram = False
+        if self.trigram:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1 FROM pg_available_extensions WHERE name = %s',
+                               [TRIGRAM_EXTENSION])
+                trigram = cursor.fetchone() is not None
+                if trigram:
+                    cursor.execute(f'CREATE EXTENSION IF NOT EXISTS {TRIGRAM_EXTENSION}')
+                else:
+                    logger.warning('PostgreSQL extension %s is not available, trigram '
+                                   'indexes of %s.%s are not created', TRIGRAM_EXTENSION,
+                                   app_label, self.model_name)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        for index in self.get_indexes(model, trigram):
+            schema_editor.add_index(model, index)
+        _trigram_indexes.pop(connection.alias, None)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = from_state.apps.get_model(app_label, self.model_name)
+        for index in self.get_indexes(model, trigram=True):
+            schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(index.name)}')
+        _trigram_indexes.pop(schema_editor.connection.alias, None)
+
+    def describe(self):
+        return f'Create search indexes of {self.model_name}'
@@ -0,0 +1,58 @@
+from django import forms
+
+
+class BatchedModelChoiceField(forms.ModelChoiceField):
+    """
+    Класс поля выбора связанной записи, которое может принять объект,
+    уже загруженный формой вместе с другими выбранными записями.
+
+    Форма кладет такие объекты в словарь resolved по строковому pk,
+    и поле возвращает их без отдельного запроса к базе.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resolved = {}
+
+    def __deepcopy__(self, memo):
+        result = super().__deepcopy__(memo)
+        result.resolved = {}
+        return result
+
+    def to_python(self, value):
+        key = str(getattr(value, 'pk', value))
+        if value not in self.empty_values and key in self.resolved:
+            return self.resolved[key]
+        return super().to_python(value)
+
+    def resolve(self, obj) -> bool:
+        """
+        Метод запоминает obj как уже загруженный вариант выбора, если
+        queryset поля не ограничен фильтрами и obj заведомо ему принадлежит.
+        """
+        if obj is None or self.queryset.query.has_filters():
+            return False
+        self.resolved[str(obj.pk)] = obj
+        return True
+
+
+class BatchedModelForm(forms.ModelForm):
+    """
+    Класс базовой формы модели с полями BatchedModelChoiceField.
+
+    Существование выбранных в таких полях записей уже проверено запросом
+    поля или формы, поэтому повторная проверка внешних ключей моделью
+    (по запросу на каждое поле) пропускается.
+
+    Для этого переопределен закрытый метод ModelForm._get_validation_exclusions:
+    публичного способа исключить поля из Model.full_clean в ModelForm нет.
+    Его наличие и использование проверяет BatchedModelFormTest, который
+    упадет, если Django переименует метод.
+    """
+
+    def _get_validation_exclusions(self):
+        """Метод добавляет поля BatchedModelChoiceField к полям, не проверяемым моделью."""
+        exclude = super()._get_validation_exclusions()
+        exclude.update(name for name, field in self.fields.items()
+                       if isinstance(field, BatchedModelChoiceField))
+        return exclude
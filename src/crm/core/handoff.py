@@ -0,0 +1,39 @@
+from urllib.parse import urlencode
+
+from django.core import signing
+from django.http import HttpRequest
+from django.urls import reverse
+
+HANDOFF_PARAM = 'handoff'
+HANDOFF_SALT = 'crm.core.handoff'
+HANDOFF_MAX_AGE = 300
+
+
+def handoff_url(request: HttpRequest, url_name: str, **values) -> str:
+    """
+    Функция возвращает адрес страницы url_name с подписанным токеном,
+    передающим значения values для предзаполнения формы.
+
+    Токен привязан к текущему пользователю и не требует общего для
+    процессов хранилища, поэтому переход может обработать любой воркер.
+    """
+    token = signing.dumps({'user': request.user.pk, 'values': values}, salt=HANDOFF_SALT,
+                          compress=True)
+    return f'{reverse(url_name)}?{urlencode({HANDOFF_PARAM: token})}'
+
+
+def read_handoff(request: HttpRequest) -> dict:
+    """
+    Функция возвращает значения из токена запроса или пустой словарь,
+    если токена нет, он поврежден, устарел или выдан другому пользователю.
+    """
+    token = request.GET.get(HANDOFF_PARAM)
+    if not token:
+        return {}
+    try:
+        payload = signing.loads(token, salt=HANDOFF_SALT, max_age=HANDOFF_MAX_AGE)
+    except signing.BadSignature:
+        return {}
+    if payload.get('user') != request.user.pk:
+        return {}
+    return payload.get('values', {})
@@ -0,0 +1,103 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+from django.db.utils import load_backend
+
+from ...db.pool import close_idle_connections, pool_stats
+from ....products.models import Product
+
+ENGINES = {
+    'direct': 'django.db.backends.postgresql',
+    'pool': 'crm.core.db.backends.postgresql_pool',
+}
+
+
+class Command(BaseCommand):
+    """
+    Команда сравнивает обработку коротких запросов при подключении к базе
+    на каждый запрос и при получении соединения из пула.
+
+    Каждый клиент в своем потоке повторяет цикл обработки запроса Django:
+    открывает соединение, выполняет запрос страницы детального просмотра
+    услуги и закрывает соединение.
+    """
+
+    help = 'Benchmark of per-request connections against the in-process connection pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Number of requests made by each client')
+        parser.add_argument('--pool-size', type=int, default=20)
+        parser.add_argument('--pool-timeout', type=float, default=30)
+        parser.add_argument('--modes', nargs='+', choices=tuple(ENGINES), default=list(ENGINES))
+
+    def handle(self, *args, **options):
+        product_pk = Product.objects.values_list('pk', flat=True).first() or 0
+        sql, params = Product.objects.filter(pk=product_pk).query.sql_with_params()
+        for mode in options['modes']:
+            settings_dict = {**connections['default'].settings_dict,
+                             'ENGINE': ENGINES[mode], 'CONN_MAX_AGE': 0}
+            if mode == 'pool':
+                settings_dict['OPTIONS'] = {
+                    **settings_dict['OPTIONS'],
+                    'POOL': {'max_size': options['pool_size'],
+                             'timeout': options['pool_timeout']},
+                }
+            result = self.run_clients(settings_dict, f'benchmark_{mode}', sql, params, options)
+            self.stdout.write(
+                f'{mode}: {result["rps"]:.0f} req/s, p50 {result["p50"]:.1f} ms, '
+                f'p95 {result["p95"]:.1f} ms, p99 {result["p99"]:.1f} ms, '
+                f'errors {result["errors"]}')
+            for name, stats in pool_stats().items():
+                if name.startswith(f'benchmark_{mode}:'):
+                    average = stats['wait_seconds_total'] / max(stats['checkouts'], 1)
+                    self.stdout.write(
+                        f'  pool: {stats["connections_created"]} connections, '
+                        f'wait avg {average * 1000:.1f} ms, '
+                        f'max {stats["wait_seconds_max"] * 1000:.1f} ms, '
+                        f'timeouts {stats["timeouts"]}')
+            close_idle_connections()
+
+    @staticmethod
+    def run_clients(settings_dict: dict, alias: str, sql: str, params: tuple,
+                    options: dict) -> dict:
+        """Метод выполняет запросы всех клиентов одновременно и возвращает сводку замеров."""
+        backend = load_backend(settings_dict['ENGINE'])
+        barrier = threading.Barrier(options['clients'])
+
+        def client(_) -> tuple:
+            wrapper = backend.DatabaseWrapper(settings_dict, alias=alias)
+            latencies, errors = [], 0
+            barrier.wait()
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                try:
+                    with wrapper.cursor() as cursor:
+                        cursor.execute(sql, params)
+                        cursor.fetchall()
+                except DatabaseError:
+                    errors += 1
+                finally:
+                    wrapper.close()
+                latencies.append(time.perf_counter() - started)
+            return latencies, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as executor:
+            results = list(executor.map(client, range(options['clients'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(value * 1000 for values, _ in results for value in values)
+        quantiles = statistics.quantiles(latencies, n=100)
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': quantiles[49],
+            'p95': quantiles[94],
+            'p99': quantiles[98],
+            'errors': sum(errors for _, errors in results),
+        }
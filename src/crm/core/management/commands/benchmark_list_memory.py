@@ -0,0 +1,77 @@
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import QuerySet
+
+from ...synthetic import SyntheticDataGenerator
+from ....ads.models import Ads
+from ....ads.views import AdsListView
+from ....contracts.models import Contract
+from ....contracts.views import ContractListView
+from ....customers.models import Customer
+from ....customers.views import CustomerListView
+from ....leads.models import Lead
+from ....leads.views import LeadListView
+from ....products.models import Product
+from ....products.views import ProductListView
+
+DESCRIPTION = 'Описание ' * 100
+
+
+class Command(BaseCommand):
+    """
+    Команда сравнивает пиковую память и время загрузки строк списков
+    полными объектами моделей и выборкой только выводимых столбцов.
+
+    Данные создаются внутри транзакции и откатываются после замеров.
+    """
+
+    help = 'Benchmark of memory used by list view querysets on a synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        querysets = {
+            'products': (Product.objects.all(), ProductListView.queryset),
+            'ads': (Ads.objects.all(), AdsListView.queryset),
+            'leads': (Lead.objects.filter(to_active=False), LeadListView.queryset),
+            'contracts': (Contract.objects.all(), ContractListView.queryset),
+            'customers': (Customer.objects.select_related('lead'), CustomerListView.queryset),
+        }
+        with transaction.atomic():
+            self.populate(options['rows'], options['batch_size'])
+            for name, (full, lean) in querysets.items():
+                full_peak, full_time = self.measure(full)
+                lean_peak, lean_time = self.measure(lean)
+                self.stdout.write(
+                    f'{name}: full {full_peak / 2 ** 20:.1f} MiB in {full_time:.2f}s, '
+                    f'lean {lean_peak / 2 ** 20:.1f} MiB in {lean_time:.2f}s')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(queryset: QuerySet) -> tuple:
+        """Метод загружает все строки queryset и возвращает пиковую память и время."""
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = list(queryset.all())
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del rows
+        return peak, elapsed
+
+    def populate(self, rows: int, batch_size: int):
+        """
+        Метод создает rows услуг, кампаний и лидов с заполненными текстовыми
+        полями; половина лидов становится покупателями с контрактами.
+        """
+        generator = SyntheticDataGenerator(batch_size=batch_size, text_size=len(DESCRIPTION))
+        counts = generator.generate(products=rows, ads=rows, leads=rows, customers_share=0.5)
+        self.stdout.write('Generated ' + ', '.join(f'{count} {name}'
+                                                   for name, count in counts.items()))
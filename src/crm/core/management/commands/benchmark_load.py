@@ -0,0 +1,154 @@
+import http.cookiejar
+import os
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+User = get_user_model()
+
+DEFAULT_PATHS = ('/', '/products/', '/ads/', '/leads/', '/contracts/', '/customers/',
+                 '/ads/statistic/')
+
+
+class Command(BaseCommand):
+    """
+    Команда сравнивает пропускную способность приложения при разных профилях
+    настроек (переменная окружения CRM_PROFILE).
+
+    Для каждого профиля в отдельном процессе запускается сервер, после чего
+    несколько потоков-клиентов под временным суперпользователем запрашивают
+    страницы списков и главную страницу.
+    """
+
+    help = 'Load benchmark of the application under different settings profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=['development', 'production'])
+        parser.add_argument('--paths', nargs='+', default=list(DEFAULT_PATHS))
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--server', choices=('gunicorn', 'runserver'), default='gunicorn',
+                            help='runserver starts a thread per request, so persistent '
+                                 'database connections are disabled for it')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Number of gunicorn worker processes')
+
+    def handle(self, *args, **options):
+        password = secrets.token_urlsafe()
+        user = User.objects.create_superuser(f'benchmark-load-{secrets.token_hex(4)}',
+                                             password=password)
+        try:
+            for profile in options['profiles']:
+                with _Server(profile, options):
+                    result = self.run_clients(user.get_username(), password, options)
+                self.stdout.write(
+                    f'{profile}: {result["rps"]:.1f} req/s, '
+                    f'p50 {result["p50"]:.1f} ms, p95 {result["p95"]:.1f} ms, '
+                    f'p99 {result["p99"]:.1f} ms, errors {result["errors"]}')
+        finally:
+            user.delete()
+
+    def run_clients(self, username: str, password: str, options: dict) -> dict:
+        """Метод выполняет запросы в нескольких потоках и возвращает сводку замеров."""
+        base_url = f'http://127.0.0.1:{options["port"]}'
+        paths = options['paths']
+        concurrency = options['concurrency']
+        per_client = max(1, options['requests'] // concurrency)
+        barrier = threading.Barrier(concurrency)
+
+        def client(number: int) -> tuple:
+            opener = login(base_url, username, password)
+            for path in paths:
+                opener.open(base_url + path).read()
+            latencies, errors = [], 0
+            barrier.wait()
+            for index in range(per_client):
+                path = paths[(number + index) % len(paths)]
+                started = time.perf_counter()
+                try:
+                    opener.open(base_url + path).read()
+                except OSError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+            return latencies, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(client, range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(value * 1000 for values, _ in results for value in values)
+        quantiles = statistics.quantiles(latencies, n=100)
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': quantiles[49],
+            'p95': quantiles[94],
+            'p99': quantiles[98],
+            'errors': sum(errors for _, errors in results),
+        }
+
+
+def login(base_url: str, username: str, password: str) -> urllib.request.OpenerDirector:
+    """Функция возвращает HTTP-клиент с сессией пользователя username."""
+    cookies = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+    login_url = base_url + reverse('login')
+    opener.open(login_url).read()
+    csrf_token = next(cookie.value for cookie in cookies if cookie.name == 'csrftoken')
+    data = urllib.parse.urlencode({'username': username, 'password': password,
+                                   'csrfmiddlewaretoken': csrf_token}).encode()
+    opener.open(login_url, data).read()
+    if not any(cookie.name == 'sessionid' for cookie in cookies):
+        raise CommandError('Could not log in to the benchmarked server')
+    return opener
+
+
+class _Server:
+    """Класс запускает сервер приложения с заданным профилем настроек в отдельном процессе."""
+
+    def __init__(self, profile: str, options: dict):
+        self.port = options['port']
+        self.env = dict(os.environ, CRM_PROFILE=profile, ALLOWED_HOSTS='127.0.0.1',
+                        DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE,
+                        PYTHONPATH=os.pathsep.join(sys.path))
+        if options['server'] == 'gunicorn':
+            self.command = [sys.executable, '-m', 'gunicorn', 'crm.crm.wsgi',
+                            '--bind', f'127.0.0.1:{self.port}',
+                            '--workers', str(options['workers'])]
+        else:
+            self.env['CONN_MAX_AGE'] = '0'
+            self.command = [sys.executable, '-m', 'django', 'runserver', '--noreload',
+                            f'127.0.0.1:{self.port}']
+        self.process = None
+
+    def __enter__(self):
+        subprocess.run([sys.executable, '-m', 'django', 'createcachetable'],
+                       env=self.env, check=True)
+        self.process = subprocess.Popen(self.command, env=self.env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise CommandError(f'Server did not start on port {self.port}')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(timeout=30)
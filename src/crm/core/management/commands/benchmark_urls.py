@@ -0,0 +1,245 @@
+import datetime
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ...routes import iter_routes
+from ...synthetic import SyntheticDataGenerator
+from ....ads.models import Ads
+from ....contracts.models import Contract
+from ....customers.models import Customer
+from ....leads.models import Lead
+from ....products.models import Product
+from ....users.service import DASHBOARD_CACHE_KEY
+
+User = get_user_model()
+
+NAMESPACES = ('crm.products', 'crm.ads', 'crm.leads', 'crm.contracts', 'crm.customers',
+              'crm.users')
+
+# Параметры запросов автодополнения, чтобы замерять поиск, а не только первую страницу.
+QUERY_PARAMS = {
+    'crm.leads:leads_autocomplete': {'q': 'Ив'},
+    'crm.contracts:contracts_autocomplete': {'q': 'Договор'},
+    'crm.users:search': {'q': 'Ив'},
+}
+
+
+def percentile(values: list, share: float) -> float:
+    """Функция возвращает перцентиль share (от 0 до 1) отсортированного списка values."""
+    index = min(len(values) - 1, max(0, round(share * len(values)) - 1))
+    return values[index]
+
+
+def get_git_commit() -> Optional[str]:
+    """Функция возвращает хэш текущего коммита или None, если он недоступен."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=settings.BASE_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class QueryCounter:
+    """Класс обертки выполнения запросов, считающей их число."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    """
+    Команда замеряет все страницы приложений CRM (см. NAMESPACES), кроме
+    страниц с параметрами адреса помимо pk, и создание контракта и
+    покупателя на синтетических данных разного объема.
+
+    Для каждого маршрута замеряются перцентили времени ответа, число
+    запросов к базе и пиковая память обработки запроса. Результат
+    записывается в JSON-отчет с отсортированными ключами, который удобно
+    сравнивать между коммитами (в том числе параметром --compare).
+    Данные создаются внутри транзакции и откатываются после замеров.
+    """
+
+    help = 'Benchmark every CRM route on synthetic datasets of several sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[10_000],
+                            help='Numbers of leads in the generated datasets')
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Measured requests per route')
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--routes', nargs='+', default=[],
+                            help='Only benchmark routes whose names start with these prefixes')
+        parser.add_argument('--output', help='Path of the JSON report')
+        parser.add_argument('--compare', help='JSON report to compare the results with')
+
+    def handle(self, *args, **options):
+        report = {
+            'meta': {
+                'commit': get_git_commit(),
+                'created': timezone.now().isoformat(timespec='seconds'),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'requests': options['requests'],
+                'seed': options['seed'],
+            },
+            'scales': {},
+        }
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for scale in options['scales']:
+                report['scales'][str(scale)] = self.run_scale(scale, options)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2, sort_keys=True, ensure_ascii=False)
+                file.write('\n')
+            self.stdout.write(f'Report written to {options["output"]}')
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                self.compare(json.load(file), report)
+
+    def run_scale(self, scale: int, options: dict) -> dict:
+        """Метод создает набор данных из scale лидов и замеряет на нем все маршруты."""
+        results = {}
+        with transaction.atomic():
+            started = time.perf_counter()
+            counts = SyntheticDataGenerator(options['seed'], batch_size=50_000).generate(
+                products=max(10, scale // 10_000), ads=max(16, scale // 1000), leads=scale)
+            self.stdout.write(f'{scale} leads: generated {sum(counts.values())} rows '
+                              f'in {time.perf_counter() - started:.1f}s')
+            cache.delete(DASHBOARD_CACHE_KEY)
+            client = Client()
+            client.force_login(User.objects.create_superuser('benchmark-urls', password=None))
+            for name, method, url, make_data in self.get_cases(options):
+                result = self.measure(client, method, url, make_data, options)
+                results[f'{name} {method}'] = result
+                self.stdout.write(
+                    f'  {method:4} {name:42} {result["status"]} '
+                    f'p50 {result["p50_ms"]:8.1f} ms  p95 {result["p95_ms"]:8.1f} ms  '
+                    f'{result["queries"]:3} queries  {result["peak_memory_kib"]:8.0f} KiB')
+            transaction.set_rollback(True)
+        return {'counts': counts, 'routes': results}
+
+    def get_cases(self, options: dict) -> list:
+        """
+        Метод возвращает замеряемые запросы: (имя маршрута, метод, адрес,
+        функция данных POST-запроса или None).
+        """
+        objects = {
+            'crm.products': Product.objects.order_by('-pk').first(),
+            'crm.ads': Ads.objects.order_by('-pk').first(),
+            'crm.leads': Lead.objects.filter(to_active=False).order_by('-pk').first(),
+            'crm.contracts': Contract.objects.order_by('-pk').first(),
+            'crm.customers': Customer.objects.order_by('-pk').first(),
+        }
+        prefixes = tuple(options['routes']) or ('',)
+        cases = []
+        for name, _, params in iter_routes():
+            namespace = name.rpartition(':')[0]
+            if (namespace not in NAMESPACES or set(params) - {'pk'}
+                    or not name.startswith(prefixes)):
+                continue
+            kwargs = {'pk': objects[namespace].pk} if 'pk' in params else {}
+            url = reverse(name, kwargs=kwargs)
+            if name in QUERY_PARAMS:
+                url += '?' + '&'.join(f'{key}={value}' for key, value in QUERY_PARAMS[name].items())
+            cases.append((name, 'GET', url, None))
+
+        leads = iter(Lead.objects.filter(to_active=False).order_by('pk')
+                     .values_list('pk', 'ads_id', 'ads__product_id'))
+        for name, make_data in (('crm.contracts:contract_create', self.contract_data),
+                                ('crm.customers:customer_create', self.customer_data)):
+            if name.startswith(prefixes):
+                cases.append((name, 'POST', reverse(name), lambda make=make_data: make(leads)))
+        return cases
+
+    @staticmethod
+    def contract_data(leads) -> dict:
+        """Метод возвращает данные формы создания контракта для очередного лида."""
+        lead_id, ads_id, product_id = next(leads)
+        data = {'name': f'Договор {lead_id}', 'lead': lead_id, 'ads': ads_id,
+                'product': product_id, 'cost': '10000'}
+        for field, day in (('conclusion_day', datetime.date(2024, 1, 1)),
+                           ('start_day', datetime.date(2024, 1, 10)),
+                           ('end_day', datetime.date(2024, 12, 31))):
+            data.update({f'{field}_year': day.year, f'{field}_month': day.month,
+                         f'{field}_day': day.day})
+        return data
+
+    @staticmethod
+    def customer_data(leads) -> dict:
+        """Метод возвращает данные формы перевода очередного лида в покупатели."""
+        lead_id, ads_id, _ = next(leads)
+        return {'lead': lead_id, 'ads': ads_id, 'comment': 'benchmark'}
+
+    @staticmethod
+    def measure(client: Client, method: str, url: str, make_data: Optional[Callable],
+                options: dict) -> dict:
+        """Метод выполняет запросы к url и возвращает сводку замеров."""
+        def request():
+            if method == 'POST':
+                return client.post(url, make_data())
+            return client.get(url)
+
+        for _ in range(options['warmup']):
+            request()
+        latencies, queries, status = [], [], None
+        for _ in range(options['requests']):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                status = request().status_code
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count)
+        tracemalloc.start()
+        try:
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'url': url,
+            'status': status,
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'queries': max(queries),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+
+    def compare(self, baseline: dict, report: dict):
+        """Метод выводит изменения медианы времени и числа запросов относительно baseline."""
+        self.stdout.write(f'Compared with {baseline["meta"].get("commit")}:')
+        for scale, current in report['scales'].items():
+            previous = baseline['scales'].get(scale, {}).get('routes', {})
+            for route, result in current['routes'].items():
+                if route not in previous:
+                    continue
+                before = previous[route]
+                change = (result['p50_ms'] - before['p50_ms']) / max(before['p50_ms'], 0.01)
+                self.stdout.write(
+                    f'  {scale:>8} {route:47} p50 {before["p50_ms"]:8.1f} -> '
+                    f'{result["p50_ms"]:8.1f} ms ({change:+.0%}), '
+                    f'queries {before["queries"]} -> {result["queries"]}')
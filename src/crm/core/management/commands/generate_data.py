@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...synthetic import SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    """
+    Команда наполняет базу синтетическими данными CRM заданного объема
+    (см. SyntheticDataGenerator). При одинаковом --seed на пустой базе
+    создаются одинаковые данные.
+    """
+
+    help = 'Generate a deterministic synthetic CRM dataset of the given size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50)
+        parser.add_argument('--ads', type=int, default=500)
+        parser.add_argument('--leads', type=int, default=100_000)
+        parser.add_argument('--customers-share', type=float, default=0.2,
+                            help='Share of leads that signed a contract and became customers')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=50_000)
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Insert rows with bulk_create instead of COPY on PostgreSQL')
+
+    def handle(self, *args, **options):
+        generator = SyntheticDataGenerator(options['seed'], batch_size=options['batch_size'],
+                                           use_copy=False if options['no_copy'] else None)
+        started = time.perf_counter()
+        with transaction.atomic():
+            counts = generator.generate(options['products'], options['ads'], options['leads'],
+                                        options['customers_share'])
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        self.stdout.write(', '.join(f'{name}: {count}' for name, count in counts.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)'))
@@ -0,0 +1,318 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.template.base import Template
+
+_current: ContextVar[Optional['RequestMetrics']] = ContextVar('request_metrics', default=None)
+
+# Верхние границы корзин гистограмм (последняя корзина — +Inf).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+# Счетчики событий: имя -> описание метрики crm_<имя>_total.
+COUNTERS = {
+    'leads_converted': 'Leads converted to customers.',
+}
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestMetrics:
+    """
+    Класс замеров одного запроса: общее время, число и время запросов к
+    базе данных, попадания и промахи кэша, время отрисовки шаблонов.
+    """
+
+    __slots__ = ('started', 'total', 'db_queries', 'db_time', 'cache_hits', 'cache_misses',
+                 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Метод замеряет запрос к базе данных (см. connection.execute_wrapper)."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+    def finish(self):
+        """Метод фиксирует общее время обработки запроса."""
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Метод возвращает значение заголовка Server-Timing (длительности в мс)."""
+        return ', '.join((
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;desc="{self.db_queries} queries";dur={self.db_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+        ))
+
+
+def start_request() -> tuple:
+    """Функция начинает замеры запроса и возвращает их вместе с токеном для finish_request."""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    """Функция завершает замеры запроса, начатые start_request."""
+    _current.reset(token)
+
+
+def record_cache(name: str, hit: bool):
+    """Функция учитывает обращение к кэшу name в замерах текущего запроса."""
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+    aggregator.add_cache(name, hit)
+
+
+def count_event(name: str, value: int = 1):
+    """Функция увеличивает счетчик событий name из COUNTERS."""
+    aggregator.increment(name, value)
+
+
+def merge_metrics(target: dict, source: dict) -> dict:
+    """
+    Функция добавляет замеры source к target: числа и корзины гистограмм
+    складываются, максимумы (ключи *_max) выбираются наибольшие.
+    """
+    for key, value in source.items():
+        if isinstance(value, dict):
+            merge_metrics(target.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            current = target.get(key) or [0] * len(value)
+            target[key] = [left + right for left, right in zip(current, value)]
+        elif key.endswith('_max'):
+            target[key] = max(target.get(key, 0), value)
+        else:
+            target[key] = target.get(key, 0) + value
+    return target
+
+
+def empty_metrics() -> dict:
+    """Функция возвращает пустую структуру замеров процесса."""
+    return {'views': {}, 'caches': {}, 'counters': {}}
+
+
+class MetricsAggregator:
+    """
+    Класс накапливает замеры запросов текущего процесса по именам
+    маршрутов (например, crm.leads:leads_list), обращения к кэшам и
+    счетчики событий.
+
+    Если задана настройка METRICS_DIR, замеры не реже чем раз в
+    METRICS_FLUSH_INTERVAL секунд записываются в файл процесса в этом
+    каталоге, а collect() объединяет замеры всех процессов (например,
+    воркеров gunicorn).
+    """
+
+    FIELDS = ('total', 'db_queries', 'db_time', 'cache_hits', 'cache_misses', 'template_time')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = empty_metrics()
+        self._pid = os.getpid()
+        self._flushed = 0.0
+
+    def add(self, view_name: str, metrics: RequestMetrics):
+        """Метод добавляет замеры запроса к маршруту view_name."""
+        with self._lock:
+            self._check_pid()
+            stats = self._data['views'].get(view_name)
+            if stats is None:
+                stats = self._data['views'][view_name] = dict.fromkeys(self.FIELDS, 0)
+                stats.update(requests=0, total_max=0.0,
+                             latency_buckets=[0] * (len(LATENCY_BUCKETS) + 1),
+                             queries_buckets=[0] * (len(QUERIES_BUCKETS) + 1))
+            stats['requests'] += 1
+            for field in self.FIELDS:
+                stats[field] += getattr(metrics, field)
+            stats['total_max'] = max(stats['total_max'], metrics.total)
+            stats['latency_buckets'][bisect_left(LATENCY_BUCKETS, metrics.total)] += 1
+            stats['queries_buckets'][bisect_left(QUERIES_BUCKETS, metrics.db_queries)] += 1
+        self.flush_if_due()
+
+    def add_cache(self, name: str, hit: bool):
+        """Метод учитывает попадание или промах кэша name."""
+        with self._lock:
+            self._check_pid()
+            stats = self._data['caches'].setdefault(name, {'hits': 0, 'misses': 0})
+            stats['hits' if hit else 'misses'] += 1
+
+    def increment(self, name: str, value: int = 1):
+        """Метод увеличивает счетчик событий name на value."""
+        with self._lock:
+            self._check_pid()
+            self._data['counters'][name] = self._data['counters'].get(name, 0) + value
+        self.flush_if_due()
+
+    def snapshot(self) -> dict:
+        """Метод возвращает копию замеров текущего процесса."""
+        with self._lock:
+            self._check_pid()
+            return merge_metrics(empty_metrics(), self._data)
+
+    def reset(self):
+        """Метод удаляет накопленные замеры текущего процесса."""
+        with self._lock:
+            self._data = empty_metrics()
+
+    def flush_if_due(self):
+        """Метод записывает замеры в файл процесса, если подошло время очередной записи."""
+        if (settings.METRICS_DIR
+                and time.monotonic() - self._flushed >= settings.METRICS_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        """Метод записывает замеры текущего процесса в его файл в каталоге METRICS_DIR."""
+        self._flushed = time.monotonic()
+        path = self._path(os.getpid())
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        # Запись через временный файл: читатель никогда не видит файл частично.
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary, path)
+
+    def collect(self) -> dict:
+        """Метод возвращает замеры, объединенные по всем процессам из METRICS_DIR."""
+        result = self.snapshot()
+        if not settings.METRICS_DIR:
+            return result
+        own = self._path(os.getpid())
+        for path in glob.glob(self._path('*')):
+            if path == own:
+                continue
+            try:
+                with open(path, encoding='utf-8') as file:
+                    merge_metrics(result, json.load(file))
+            except (OSError, ValueError):
+                continue
+        return result
+
+    @staticmethod
+    def _path(pid) -> str:
+        return os.path.join(settings.METRICS_DIR, f'metrics-{pid}.json')
+
+    def _check_pid(self):
+        """Метод сбрасывает замеры, унаследованные от родительского процесса при fork."""
+        if self._pid != os.getpid():
+            self._data = empty_metrics()
+            self._pid = os.getpid()
+            self._flushed = 0.0
+
+
+aggregator = MetricsAggregator()
+
+
+def _labels(**labels) -> str:
+    """Функция возвращает метки метрики в формате Prometheus."""
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram(lines: list, name: str, bounds: tuple, buckets: list, total, **labels):
+    """Функция добавляет в lines строки гистограммы с накопленными корзинами."""
+    cumulative = 0
+    for bound, count in zip((*bounds, '+Inf'), buckets):
+        cumulative += count
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+    lines.append(f'{name}_sum{_labels(**labels)} {total}')
+    lines.append(f'{name}_count{_labels(**labels)} {cumulative}')
+
+
+def render_prometheus(data: dict) -> str:
+    """Функция возвращает замеры data в текстовом формате Prometheus."""
+    views = sorted(data['views'].items())
+    caches = sorted(data['caches'].items())
+    lines = [
+        '# HELP crm_request_duration_seconds Request processing time by URL name.',
+        '# TYPE crm_request_duration_seconds histogram',
+    ]
+    for view, stats in views:
+        _histogram(lines, 'crm_request_duration_seconds', LATENCY_BUCKETS,
+                   stats['latency_buckets'], stats['total'], view=view)
+    lines += [
+        '# HELP crm_request_db_queries Database queries per request by URL name.',
+        '# TYPE crm_request_db_queries histogram',
+    ]
+    for view, stats in views:
+        _histogram(lines, 'crm_request_db_queries', QUERIES_BUCKETS,
+                   stats['queries_buckets'], stats['db_queries'], view=view)
+    for field, description in (('db_time', 'Time spent in database queries'),
+                               ('template_time', 'Time spent rendering templates')):
+        name = f'crm_request_{field.replace("_time", "")}_seconds_total'
+        lines += [f'# HELP {name} {description} by URL name.', f'# TYPE {name} counter']
+        lines += [f'{name}{_labels(view=view)} {stats[field]}' for view, stats in views]
+    lines += [
+        '# HELP crm_cache_requests_total Cache lookups by cache and result.',
+        '# TYPE crm_cache_requests_total counter',
+    ]
+    for cache, stats in caches:
+        lines.append(f'crm_cache_requests_total{_labels(cache=cache, result="hit")} '
+                     f'{stats["hits"]}')
+        lines.append(f'crm_cache_requests_total{_labels(cache=cache, result="miss")} '
+                     f'{stats["misses"]}')
+    lines += [
+        '# HELP crm_cache_hit_ratio Share of cache lookups that were hits.',
+        '# TYPE crm_cache_hit_ratio gauge',
+    ]
+    for cache, stats in caches:
+        ratio = stats['hits'] / max(stats['hits'] + stats['misses'], 1)
+        lines.append(f'crm_cache_hit_ratio{_labels(cache=cache)} {ratio}')
+    for counter, description in COUNTERS.items():
+        name = f'crm_{counter}_total'
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter',
+                  f'{name} {data["counters"].get(counter, 0)}']
+    return '\n'.join(lines) + '\n'
+
+
+_template_render = Template.render
+_template_lock = threading.Lock()
+
+
+def _timed_render(self, context):
+    metrics = _current.get()
+    if metrics is None:
+        return _template_render(self, context)
+    # Вложенные шаблоны ({% include %}) входят во время внешнего.
+    metrics.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        metrics.template_depth -= 1
+        if not metrics.template_depth:
+            metrics.template_time += time.perf_counter() - started
+
+
+def instrument_templates():
+    """Функция включает замер времени отрисовки шаблонов Django."""
+    with _template_lock:
+        if Template.render is not _timed_render:
+            Template.render = _timed_render
@@ -0,0 +1,149 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.views.generic import DetailView, ListView
+
+from .metrics import aggregator, finish_request, instrument_templates, start_request
+from .profiling import PROFILE_PARAM, allow_profile, profile_request
+from .routers import read_from
+from .slow_queries import SlowQueryLogger
+
+READ_ONLY_VIEW_CLASSES = (ListView, DetailView)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def read_only(view):
+    """Декоратор помечает функцию-представление как только читающую данные."""
+    view.read_only = True
+    return view
+
+
+def is_read_only_view(view_func) -> bool:
+    """
+    Функция проверяет, что представление только читает данные: это
+    ListView, DetailView или представление с атрибутом read_only = True.
+    """
+    view_class = getattr(view_func, 'view_class', None)
+    if view_class is not None:
+        return getattr(view_class, 'read_only', issubclass(view_class, READ_ONLY_VIEW_CLASSES))
+    return getattr(view_func, 'read_only', False)
+
+
+class ReadReplicaMiddleware:
+    """
+    Класс промежуточного слоя, направляющий чтение только читающих
+    представлений в реплику READ_REPLICA_ALIAS.
+
+    После запроса, изменяющего данные (POST и т.п.), пользователь получает
+    cookie READ_REPLICA_STICKY_COOKIE, и следующие READ_REPLICA_STICKY_SECONDS
+    секунд все его запросы читают из основной базы, чтобы видеть свои
+    изменения независимо от задержки репликации.
+    """
+
+    def __init__(self, get_response):
+        if not settings.READ_REPLICA_ALIAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            request.read_database_stack = stack
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(settings.READ_REPLICA_STICKY_COOKIE, '1',
+                                max_age=settings.READ_REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Метод направляет чтение в реплику, если запрос безопасный, у
+        пользователя нет cookie READ_REPLICA_STICKY_COOKIE, а представление
+        только читает данные (см. is_read_only_view).
+        """
+        if (request.method in SAFE_METHODS
+                and settings.READ_REPLICA_STICKY_COOKIE not in request.COOKIES
+                and is_read_only_view(view_func)):
+            request.read_database_stack.enter_context(read_from(settings.READ_REPLICA_ALIAS))
+
+
+class RequestMetricsMiddleware:
+    """
+    Класс промежуточного слоя, замеряющий обработку каждого запроса.
+
+    Замеры (см. RequestMetrics) накапливаются в metrics.aggregator по имени
+    маршрута для страницы /metrics, а при настройке REQUEST_METRICS еще и
+    отдаются в заголовке Server-Timing. Если выключены и REQUEST_METRICS, и
+    PROMETHEUS_METRICS, слой не подключается и ничего не замеряет.
+    """
+
+    def __init__(self, get_response):
+        if not (settings.REQUEST_METRICS or settings.PROMETHEUS_METRICS):
+            raise MiddlewareNotUsed
+        instrument_templates()
+        self.server_timing = settings.REQUEST_METRICS
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics, token = start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            finish_request(token)
+        metrics.finish()
+        match = request.resolver_match
+        aggregator.add(match.view_name if match else 'unresolved', metrics)
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing()
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """
+    Класс промежуточного слоя, записывающего медленные запросы к базе
+    данных (см. SlowQueryLogger). Отключается, если SLOW_QUERY_THRESHOLD_MS
+    не задан.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(SlowQueryLogger(connection, request)))
+            return self.get_response(request)
+
+
+class RequestProfilerMiddleware:
+    """
+    Класс промежуточного слоя, профилирующего запрос сотрудника с
+    параметром _profile (например, /leads/?_profile=1): вместо страницы
+    возвращается отчет profile_request.
+
+    Профилируется не больше REQUEST_PROFILER_RATE запросов в минуту,
+    поэтому слой можно не отключать в эксплуатации.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if PROFILE_PARAM not in request.GET or not request.user.is_staff:
+            return self.get_response(request)
+        if not allow_profile():
+            return HttpResponse('Profiler rate limit exceeded, try again in a minute.',
+                                content_type='text/plain; charset=utf-8', status=429)
+        return profile_request(self.get_response, request)
@@ -0,0 +1,168 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+
+class KeysetPage:
+    """
+    Класс страницы, полученной постраничным выводом по ключу. Строки
+    параметров next_query и previous_query ссылок на соседние страницы
+    сохраняют остальные параметры запроса (например, фильтры).
+    """
+
+    def __init__(self, object_list: list, next_cursor: Optional[str],
+                 previous_cursor: Optional[str], next_query: str = '',
+                 previous_query: str = ''):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_query = next_query
+        self.previous_query = previous_query
+
+    def has_next(self) -> bool:
+        """Метод проверяет, есть ли следующая страница."""
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        """Метод проверяет, есть ли предыдущая страница."""
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        """Метод проверяет, есть ли другие страницы."""
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+
+def encode_cursor(values: list) -> str:
+    """Функция кодирует значения ключа сортировки в курсор для URL."""
+    data = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list:
+    """Функция декодирует курсор в значения ключа сортировки."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise Http404('Invalid page cursor') from error
+    if not isinstance(values, list):
+        raise Http404('Invalid page cursor')
+    return values
+
+
+class KeysetPaginationMixin:
+    """
+    Миксин постраничного вывода ListView по ключу (keyset / cursor pagination).
+
+    Страница выбирается условием на индексированный столбец keyset_field
+    (и pk для однозначности), а не OFFSET, и без подсчета COUNT(*), поэтому
+    время выдачи любой страницы не зависит от размера таблицы, а вставка
+    новых строк не сдвигает уже открытые страницы. Столбец keyset_field
+    не должен содержать NULL.
+    """
+
+    paginate_by = 50
+    keyset_field = 'pk'
+    after_kwarg = 'after'
+    before_kwarg = 'before'
+
+    def get_keyset_ordering(self) -> list:
+        """Метод возвращает список (поле, по убыванию) для сортировки страниц."""
+        descending = self.keyset_field.startswith('-')
+        field = self.keyset_field.lstrip('-')
+        ordering = [(field, descending)]
+        if field not in ('pk', 'id'):
+            ordering.append(('pk', descending))
+        return ordering
+
+    @staticmethod
+    def get_keyset_filter(ordering: list, values: list, forward: bool) -> Q:
+        """Метод строит условие "строка после (или до) курсора" для лексикографического ключа."""
+        if len(values) != len(ordering):
+            raise Http404('Invalid page cursor')
+        condition = Q()
+        for position, (field, descending) in enumerate(ordering):
+            lookup = 'gt' if forward != descending else 'lt'
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            for previous, (previous_field, _) in enumerate(ordering[:position]):
+                step &= Q(**{previous_field: values[previous]})
+            condition |= step
+        return condition
+
+    @staticmethod
+    def clean_cursor(model, ordering: list, values: list) -> list:
+        """
+        Метод приводит значения курсора к типам полей ключа и проверяет их
+        валидаторами полей, в том числе на диапазон целых чисел базы данных:
+        значение вне диапазона иначе привело бы к DataError в базе.
+        """
+        if len(values) != len(ordering):
+            raise Http404('Invalid page cursor')
+        return [(model._meta.pk if field == 'pk' else model._meta.get_field(field))
+                .clean(value, None) for (field, _), value in zip(ordering, values)]
+
+    def get_page_query(self, kwarg: str, cursor: str) -> str:
+        """Метод возвращает параметры запроса страницы с курсором cursor в параметре kwarg."""
+        params = self.request.GET.copy()
+        params.pop(self.after_kwarg, None)
+        params.pop(self.before_kwarg, None)
+        params[kwarg] = cursor
+        return params.urlencode()
+
+    @staticmethod
+    def get_cursor(obj, ordering: list) -> str:
+        """Метод возвращает курсор, указывающий на объект obj."""
+        return encode_cursor([getattr(obj, field) for field, _ in ordering])
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int):
+        """Метод выбирает одну страницу по курсору из параметров after или before."""
+        ordering = self.get_keyset_ordering()
+        after = self.request.GET.get(self.after_kwarg)
+        before = self.request.GET.get(self.before_kwarg)
+        forward = before is None
+        cursor = after if forward else before
+
+        queryset = queryset.order_by(*[f'-{field}' if descending else field
+                                       for field, descending in ordering])
+        if not forward:
+            queryset = queryset.reverse()
+        try:
+            if cursor is not None:
+                values = self.clean_cursor(queryset.model, ordering, decode_cursor(cursor))
+                queryset = queryset.filter(self.get_keyset_filter(ordering, values, forward))
+            rows = list(queryset[:page_size + 1])
+        except (ValidationError, ValueError, TypeError, OverflowError) as error:
+            # OverflowError: в SQLite диапазон целых полей не проверяется
+            # валидаторами, и слишком большое значение отвергает драйвер.
+            raise Http404('Invalid page cursor') from error
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if forward:
+            has_next, has_previous = has_more, cursor is not None
+        else:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+
+        next_cursor = previous_cursor = None
+        next_query = previous_query = ''
+        if rows and has_next:
+            next_cursor = self.get_cursor(rows[-1], ordering)
+            next_query = self.get_page_query(self.after_kwarg, next_cursor)
+        if rows and has_previous:
+            previous_cursor = self.get_cursor(rows[0], ordering)
+            previous_query = self.get_page_query(self.before_kwarg, previous_cursor)
+        page = KeysetPage(rows, next_cursor, previous_cursor, next_query, previous_query)
+        return None, page, rows, page.has_other_pages()
@@ -0,0 +1,92 @@
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+
+PROFILE_PARAM = '_profile'
+PROFILE_RATE_KEY = 'request_profiler:{minute}'
+
+
+class QueryTimer:
+    """Класс обертки выполнения запросов, запоминающей время каждого запроса."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def summary(self, limit: int) -> str:
+        """Метод возвращает сводку запросов: до limit самых долгих по суммарному времени."""
+        grouped = {}
+        for sql, duration in self.queries:
+            count, total = grouped.get(sql, (0, 0.0))
+            grouped[sql] = (count + 1, total + duration)
+        total = sum(duration for _, duration in self.queries)
+        lines = [f'SQL: {len(self.queries)} queries, {total * 1000:.1f} ms, '
+                 f'{len(grouped)} distinct', '']
+        for sql, (count, duration) in sorted(grouped.items(), key=lambda item: -item[1][1])[:limit]:
+            lines.append(f'{duration * 1000:9.1f} ms {count:5}x  {sql}')
+        return '\n'.join(lines)
+
+
+def allow_profile() -> bool:
+    """
+    Функция проверяет ограничение REQUEST_PROFILER_RATE профилируемых
+    запросов в минуту (общее для всех процессов, через кэш).
+    """
+    key = PROFILE_RATE_KEY.format(minute=int(time.time() // 60))
+    cache.add(key, 0, 60)
+    try:
+        return cache.incr(key) <= settings.REQUEST_PROFILER_RATE
+    except ValueError:
+        return False
+
+
+def profile_request(get_response, request) -> HttpResponse:
+    """
+    Функция обрабатывает запрос под cProfile и возвращает вместо страницы
+    отчет: время Python по функциям и время запросов к базе данных.
+
+    При _profile=pstats возвращается файл статистики cProfile для
+    просмотра в snakeviz, flameprof и аналогичных инструментах.
+    """
+    profiler = cProfile.Profile()
+    timer = QueryTimer()
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    elapsed = time.perf_counter() - started
+
+    if request.GET[PROFILE_PARAM] == 'pstats':
+        profiler.create_stats()
+        result = HttpResponse(marshal.dumps(profiler.stats),
+                              content_type='application/octet-stream')
+        result['Content-Disposition'] = 'attachment; filename="request.prof"'
+        return result
+
+    limit = settings.REQUEST_PROFILER_LIMIT
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream).strip_dirs()
+    stream.write(f'{request.method} {request.get_full_path()} -> {response.status_code}, '
+                 f'{elapsed * 1000:.1f} ms\n\n{timer.summary(limit)}\n\n')
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(limit)
+    return HttpResponse(stream.getvalue(), content_type='text/plain; charset=utf-8')
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_read_database: ContextVar[Optional[str]] = ContextVar('read_database', default=None)
+
+
+@contextmanager
+def read_from(alias: Optional[str]):
+    """
+    Контекстный менеджер направляет чтение моделей из READ_REPLICA_APPS
+    в базу alias (None — в основную базу) в текущем потоке или задаче.
+    """
+    token = _read_database.set(alias)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def get_read_database() -> Optional[str]:
+    """Функция возвращает базу, выбранную для чтения блоком read_from."""
+    return _read_database.get()
+
+
+class ReadReplicaRouter:
+    """
+    Класс маршрутизатора, отправляющий чтение в реплику READ_REPLICA_ALIAS
+    внутри блока read_from, а запись всегда в основную базу.
+
+    Маршрутизируются только модели приложений READ_REPLICA_APPS:
+    сессии и права пользователей читаются из основной базы, чтобы вход
+    в систему не зависел от задержки репликации.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        """Метод возвращает реплику для чтения модели model внутри блока read_from."""
+        alias = _read_database.get()
+        if alias and model._meta.app_label in settings.READ_REPLICA_APPS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        """Метод направляет запись в основную базу, если настроена реплика."""
+        if settings.READ_REPLICA_ALIAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        """Метод разрешает связи между объектами основной базы и реплики."""
+        databases = {DEFAULT_DB_ALIAS, settings.READ_REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
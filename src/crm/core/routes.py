@@ -0,0 +1,22 @@
+from typing import Iterator, Optional
+
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+def iter_routes(patterns: Optional[list] = None, namespace: str = '',
+                prefix: str = '') -> Iterator[tuple]:
+    """
+    Функция обходит URLconf проекта и возвращает кортежи
+    (полное имя маршрута, шаблон пути, имена параметров) для всех именованных маршрутов.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            nested = namespace
+            if pattern.namespace:
+                nested = f'{namespace}:{pattern.namespace}' if namespace else pattern.namespace
+            yield from iter_routes(pattern.url_patterns, nested, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, prefix + str(pattern.pattern), tuple(pattern.pattern.converters)
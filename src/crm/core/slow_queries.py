@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_KEY = 'slow_query_explain:{fingerprint}'
+
+# Списки параметров разной длины (IN (%s, %s, ...)) дают один отпечаток запроса.
+PARAMETER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+
+_PROJECT_DIR = str(settings.BASE_DIR)
+
+_store_lock = threading.Lock()
+_store: Optional[RotatingFileHandler] = None
+
+
+def get_origin(limit: int = 5) -> list:
+    """
+    Функция возвращает до limit последних кадров стека внутри проекта
+    в виде строк "файл:строка в функции" — откуда был выполнен запрос.
+    """
+    frames = [frame for frame in traceback.extract_stack()
+              if frame.filename.startswith(_PROJECT_DIR) and frame.filename != __file__]
+    return [f'{os.path.relpath(frame.filename, _PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+            for frame in frames[-limit:]]
+
+
+def explain(connection, sql: str, params) -> str:
+    """
+    Функция возвращает план выполнения запроса SELECT. Для PostgreSQL
+    запрос выполняется повторно с EXPLAIN (ANALYZE, BUFFERS).
+    """
+    options = {'analyze': True, 'buffers': True} if connection.vendor == 'postgresql' else {}
+    prefix = connection.ops.explain_query_prefix(**options)
+    # Ошибка плана не должна прерывать транзакцию, в которой выполнялся запрос.
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return '\n'.join(' '.join(str(value) for value in row) for row in cursor.fetchall())
+
+
+def get_fingerprint(sql: str) -> str:
+    """
+    Функция возвращает отпечаток запроса sql: хеш SQL без различий в
+    пробелах и в длине списков параметров.
+    """
+    normalized = ' '.join(PARAMETER_LIST.sub('%s', sql).split())
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def allow_explain(sql: str) -> bool:
+    """
+    Функция проверяет, можно ли получить план запроса sql: не чаще одного
+    раза в SLOW_QUERY_EXPLAIN_INTERVAL секунд на отпечаток запроса (общее
+    для всех процессов, через кэш). EXPLAIN ANALYZE выполняет запрос
+    повторно, и без ограничения при деградации базы удваивал бы нагрузку
+    от самых медленных запросов.
+    """
+    key = EXPLAIN_KEY.format(fingerprint=get_fingerprint(sql))
+    return cache.add(key, True, settings.SLOW_QUERY_EXPLAIN_INTERVAL)
+
+
+def _get_store() -> RotatingFileHandler:
+    global _store  # pylint: disable=global-statement
+    with _store_lock:
+        if _store is None or _store.baseFilename != os.path.abspath(settings.SLOW_QUERY_LOG):
+            if _store is not None:
+                _store.close()
+            os.makedirs(os.path.dirname(os.path.abspath(settings.SLOW_QUERY_LOG)), exist_ok=True)
+            _store = RotatingFileHandler(settings.SLOW_QUERY_LOG,
+                                         maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+                                         backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+                                         encoding='utf-8', delay=True)
+            _store.setFormatter(logging.Formatter('%(message)s'))
+        return _store
+
+
+def store_slow_query(entry: dict):
+    """Функция записывает медленный запрос строкой JSON в файл SLOW_QUERY_LOG."""
+    record = logging.makeLogRecord({'msg': json.dumps(entry, ensure_ascii=False, default=str)})
+    _get_store().handle(record)
+
+
+def read_slow_queries(limit: int = 100) -> list:
+    """
+    Функция возвращает до limit последних медленных запросов (сначала новые)
+    из файла SLOW_QUERY_LOG и его архивных копий.
+    """
+    entries = []
+    paths = [settings.SLOW_QUERY_LOG] + [f'{settings.SLOW_QUERY_LOG}.{number}' for number in
+                                         range(1, settings.SLOW_QUERY_LOG_BACKUP_COUNT + 1)]
+    for path in paths:
+        try:
+            with open(path, encoding='utf-8') as file:
+                lines = file.readlines()
+        except OSError:
+            continue
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+            if len(entries) >= limit:
+                return entries
+    return entries
+
+
+class SlowQueryLogger:
+    """
+    Класс обертки выполнения запросов (см. connection.execute_wrapper),
+    записывающей запросы дольше SLOW_QUERY_THRESHOLD_MS миллисекунд.
+
+    Для каждого такого запроса сохраняются SQL, параметры, маршрут запроса
+    request, место вызова в коде проекта и, для SELECT, план выполнения
+    (не чаще одного раза за интервал на запрос, см. allow_explain).
+    """
+
+    def __init__(self, connection, request=None):
+        self.connection = connection
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self.log(sql, params, many, duration)
+        return result
+
+    def log(self, sql: str, params, many: bool, duration: float):
+        """Метод записывает медленный запрос в журнал и в файл SLOW_QUERY_LOG."""
+        match = getattr(self.request, 'resolver_match', None)
+        entry = {
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 2),
+            'database': self.connection.alias,
+            'view': match.view_name if match else None,
+            'path': getattr(self.request, 'path', None),
+            'sql': sql,
+            'params': None if many else params,
+            'origin': get_origin(),
+            'plan': None,
+        }
+        if settings.SLOW_QUERY_EXPLAIN and not many and sql.lstrip()[:6].upper() == 'SELECT':
+            # Запросы кэша в базе и EXPLAIN не проверяются этой же оберткой.
+            self.explaining = True
+            try:
+                if allow_explain(sql):
+                    entry['plan'] = explain(self.connection, sql, params)
+            except DatabaseError as error:
+                entry['plan'] = f'EXPLAIN failed: {error}'
+            finally:
+                self.explaining = False
+        logger.warning('Slow query (%.1f ms) in %s: %s', entry['duration_ms'],
+                       entry['view'] or '-', sql)
+        store_slow_query(entry)
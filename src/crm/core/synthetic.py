@@ -0,0 +1,227 @@
+import datetime
+import io
+import random
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+
+from ..ads.models import Ads
+from ..ads.service import rebuild_campaign_stats
+from ..contracts.models import Contract
+from ..customers.models import Customer
+from ..leads.models import Lead
+from ..leads.service import TRANSLIT, get_name_key, normalize_phone
+from ..products.models import Product
+
+FIRST_NAMES = (
+    'Александр', 'Алексей', 'Анастасия', 'Андрей', 'Анна', 'Артем', 'Валентина', 'Виктор',
+    'Виктория', 'Дарья', 'Дмитрий', 'Евгений', 'Екатерина', 'Елена', 'Иван', 'Ирина',
+    'Кирилл', 'Ксения', 'Максим', 'Мария', 'Михаил', 'Наталья', 'Никита', 'Ольга', 'Павел',
+    'Полина', 'Роман', 'Светлана', 'Сергей', 'Софья', 'Татьяна', 'Юлия', 'Ярослав',
+    'Anna', 'David', 'Maria', 'Michael',
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+    'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров',
+    'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин',
+    'Захаров', 'Зайцев', 'Соловьев', 'Борисов', 'Яковлев', 'Григорьев', 'Романов',
+    'Воробьев', 'Сергеев', 'Кузьмин', 'Фролов', 'Ким', 'Ли', 'Smith', 'Brown',
+)
+# Женская форма фамилии для имен из FEMALE_NAMES (Иванов -> Иванова).
+FEMALE_NAMES = frozenset((
+    'Анастасия', 'Анна', 'Валентина', 'Виктория', 'Дарья', 'Екатерина', 'Елена', 'Ирина',
+    'Ксения', 'Мария', 'Наталья', 'Ольга', 'Полина', 'Светлана', 'Софья', 'Татьяна', 'Юлия',
+))
+PRODUCT_NAMES = (
+    'Разработка сайта', 'Поддержка сайта', 'Мобильное приложение', 'SEO-продвижение',
+    'Контекстная реклама', 'Аудит безопасности', 'Облачный хостинг', 'Внедрение CRM',
+    'Интеграция 1С', 'Чат-бот', 'Дизайн интерфейса', 'Техническая поддержка',
+    'Обучение сотрудников', 'Аналитика данных', 'Email-рассылки',
+)
+LEAD_COMMENTS = (
+    '', '', '', 'Перезвонить позже', 'Пока не готов', 'Цены слишком высокие',
+    'Просит коммерческое предложение', 'Сравнивает с конкурентами', 'Интересуется скидками',
+)
+PRICES = (5000, 12000, 25000, 40000, 75000, 120000, 250000)
+BUDGETS = (10000, 50000, 100000, 250000, 500000, 1000000)
+EMAIL_DOMAINS = ('mail.ru', 'yandex.ru', 'gmail.com', 'bk.ru', 'example.com')
+# Последний день, за который создаются контракты (данные не зависят от даты запуска).
+LAST_DAY = datetime.date(2024, 12, 31)
+HISTORY_DAYS = 3 * 365
+
+
+def copy_value(value) -> str:
+    """Функция возвращает значение в текстовом формате команды COPY PostgreSQL."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class SyntheticDataGenerator:
+    """
+    Класс генератора синтетических данных CRM: услуг, рекламных кампаний по
+    всем каналам продвижения, лидов, контрактов и покупателей.
+
+    Данные определяются только параметром seed. Первичные ключи назначаются
+    генератором (после наибольших существующих), поэтому связанные записи
+    вставляются без чтения ключей из базы: в PostgreSQL командой COPY,
+    в остальных базах пакетами bulk_create. Сигналы при этом не вызываются,
+    и счетчики CampaignStats новых кампаний пересчитываются в конце.
+    Генератор рассчитан на базу, в которую в это время никто не пишет.
+    """
+
+    def __init__(self, seed: int = 0, batch_size: int = 10_000,
+                 use_copy: Optional[bool] = None, text_size: int = 0):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.text_size = text_size
+
+    def generate(self, products: int, ads: int, leads: int,
+                 customers_share: float = 0.2) -> dict:
+        """
+        Метод создает products услуг, ads кампаний и leads лидов, из которых
+        доля customers_share заключила контракт и стала покупателями.
+        Возвращает число созданных записей каждой модели.
+        """
+        product_prices = self.create_products(products)
+        campaigns = self.create_ads(ads, product_prices)
+        counts = self.create_leads(leads, campaigns, customers_share)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Product, Ads, Lead, Contract, Customer]):
+                cursor.execute(sql)
+        rebuild_campaign_stats([ads_id for ads_id, _, _ in campaigns])
+        return {'products': len(product_prices), 'ads': len(campaigns), **counts}
+
+    def create_products(self, count: int) -> dict:
+        """Метод создает услуги и возвращает их цены по первичным ключам."""
+        first_id = self.next_id(Product)
+        prices = {}
+        rows = []
+        for product_id in range(first_id, first_id + count):
+            prices[product_id] = Decimal(self.random.choice(PRICES))
+            name = f'{PRODUCT_NAMES[(product_id - first_id) % len(PRODUCT_NAMES)]} {product_id}'
+            rows.append((product_id, name, self.text('Описание услуги'), prices[product_id]))
+        self.insert(Product, ('id', 'name', 'description', 'price'), rows)
+        return prices
+
+    def create_ads(self, count: int, product_prices: dict) -> list:
+        """
+        Метод создает рекламные кампании, равномерно распределенные по всем
+        каналам продвижения, и возвращает список (id, product_id, цена услуги).
+        """
+        first_id = self.next_id(Ads)
+        channels = Ads.PromotionChanel.values
+        product_ids = list(product_prices)
+        campaigns, rows = [], []
+        for number, ads_id in enumerate(range(first_id, first_id + count)):
+            product_id = self.random.choice(product_ids)
+            channel = channels[number % len(channels)]
+            campaigns.append((ads_id, product_id, product_prices[product_id]))
+            rows.append((ads_id, f'Кампания {ads_id}: {Ads.PromotionChanel(channel).label}',
+                         product_id, channel, self.text('Описание кампании'),
+                         Decimal(self.random.choice(BUDGETS))))
+        self.insert(Ads, ('id', 'name', 'product_id', 'promotion_channel', 'description',
+                          'budget'), rows)
+        return campaigns
+
+    def create_leads(self, count: int, campaigns: list, customers_share: float) -> dict:
+        """
+        Метод пакетами создает лидов, а для доли customers_share из них —
+        контракты и покупателей.
+        """
+        lead_id, contract_id, customer_id = (self.next_id(Lead), self.next_id(Contract),
+                                             self.next_id(Customer))
+        # Популярность кампаний неравномерна: часть кампаний приводит большинство лидов.
+        weights = [self.random.paretovariate(1.5) for _ in campaigns]
+        created = {'leads': 0, 'contracts': 0, 'customers': 0}
+        while created['leads'] < count:
+            size = min(self.batch_size, count - created['leads'])
+            leads, contracts, customers = [], [], []
+            for ads_id, product_id, price in self.random.choices(campaigns, weights, k=size):
+                converted = self.random.random() < customers_share
+                leads.append(self.lead_row(lead_id, ads_id, converted))
+                if converted:
+                    contracts.append(self.contract_row(contract_id, lead_id, ads_id,
+                                                       product_id, price))
+                    customers.append((customer_id, lead_id, ads_id, contract_id,
+                                      self.text('')))
+                    contract_id += 1
+                    customer_id += 1
+                lead_id += 1
+            self.insert(Lead, ('id', 'first_name', 'last_name', 'email', 'phone',
+                               'phone_normalized', 'name_key', 'ads_id', 'comment',
+                               'to_active'), leads)
+            self.insert(Contract, ('id', 'name', 'lead_id', 'ads_id', 'product_id', 'document',
+                                   'comment', 'cost', 'conclusion_day', 'start_day',
+                                   'end_day'), contracts)
+            self.insert(Customer, ('id', 'lead_id', 'ads_id', 'contract_id', 'comment'),
+                        customers)
+            created['leads'] += len(leads)
+            created['contracts'] += len(contracts)
+            created['customers'] += len(customers)
+        return created
+
+    def lead_row(self, lead_id: int, ads_id: int, converted: bool) -> tuple:
+        """Метод возвращает строку лида с именем и телефоном, проходящими валидацию модели."""
+        first_name = self.random.choice(FIRST_NAMES)
+        last_name = self.random.choice(LAST_NAMES)
+        if first_name in FEMALE_NAMES and last_name.endswith(('ов', 'ев', 'ин')):
+            last_name += 'а'
+        email = ''
+        if self.random.random() < 0.7:
+            login = f'{first_name}.{last_name}'.lower().translate(TRANSLIT)
+            email = f'{login}{lead_id}@{self.random.choice(EMAIL_DOMAINS)}'
+        prefix = self.random.choice(('+7', '+7', '+7', '8'))
+        phone = f'{prefix}9{self.random.randrange(10 ** 9):09d}'
+        comment = self.text(self.random.choice(LEAD_COMMENTS))
+        return (lead_id, first_name, last_name, email, phone, normalize_phone(phone),
+                get_name_key(first_name, last_name), ads_id, comment, converted)
+
+    def contract_row(self, contract_id: int, lead_id: int, ads_id: int, product_id: int,
+                     price: Decimal) -> tuple:
+        """Метод возвращает строку контракта со стоимостью около цены услуги и сроком действия."""
+        conclusion_day = LAST_DAY - datetime.timedelta(days=self.random.randrange(HISTORY_DAYS))
+        start_day = conclusion_day + datetime.timedelta(days=self.random.randrange(15))
+        end_day = start_day + datetime.timedelta(days=self.random.choice((30, 90, 180, 365, 730)))
+        cost = (price * Decimal(self.random.uniform(0.7, 1.5))).quantize(Decimal('0.01'))
+        return (contract_id, f'Договор № {contract_id}', lead_id, ads_id, product_id, None,
+                self.text(''), cost, conclusion_day, start_day, end_day)
+
+    def text(self, value: str) -> str:
+        """Метод дополняет текст value до text_size символов, если он задан."""
+        if len(value) >= self.text_size:
+            return value
+        filler = 'Lorem ipsum dolor sit amet. '
+        return (value + ' ' + filler * (self.text_size // len(filler) + 1))[:self.text_size]
+
+    @staticmethod
+    def next_id(model) -> int:
+        """Метод возвращает первый свободный первичный ключ модели."""
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def insert(self, model, fields: Iterable[str], rows: list):
+        """Метод вставляет строки rows (значения полей fields) в таблицу модели model."""
+        if not rows:
+            return
+        if not self.use_copy:
+            model.objects.bulk_create((model(**dict(zip(fields, row))) for row in rows),
+                                      batch_size=self.batch_size)
+            return
+        columns = [model._meta.get_field(field).column for field in fields]
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        table = connection.ops.quote_name(model._meta.db_table)
+        column_list = ', '.join(connection.ops.quote_name(column) for column in columns)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {table} ({column_list}) FROM STDIN', buffer)
@@ -0,0 +1,129 @@
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+PERFORMANCE_BASELINES_FILE = 'performance_baselines.json'
+
+# Значения перезаписываются по фактическим замерам при UPDATE_PERFORMANCE_BASELINES=1.
+UPDATE_PERFORMANCE_BASELINES = os.getenv('UPDATE_PERFORMANCE_BASELINES', '') == '1'
+
+# Допустимое время — базовое, умноженное на PERFORMANCE_LATENCY_TOLERANCE, но не
+# меньше базового плюс PERFORMANCE_LATENCY_SLACK_MS (первый запрос процесса
+# компилирует шаблоны). При нулевом множителе время не проверяется.
+PERFORMANCE_LATENCY_TOLERANCE = float(os.getenv('PERFORMANCE_LATENCY_TOLERANCE') or 5)
+PERFORMANCE_LATENCY_SLACK_MS = float(os.getenv('PERFORMANCE_LATENCY_SLACK_MS') or 250)
+
+_baselines = {}
+
+
+class QueryCountTestMixin:
+    """Миксин для тестов, проверяющих число SQL-запросов при обработке URL."""
+
+    def count_queries(self, url: str) -> int:
+        """Метод выполняет GET-запрос и возвращает число выполненных SQL-запросов."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, f'{url} returned {response.status_code}')
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url: str, add_rows: Callable[[], None]):
+        """
+        Метод проверяет, что число запросов при открытии url не меняется
+        после добавления новых строк функцией add_rows.
+        """
+        before = self.count_queries(url)
+        add_rows()
+        after = self.count_queries(url)
+        self.assertEqual(before, after,
+                         f'{url}: {before} queries before and {after} after adding rows')
+
+
+class PerformanceBudgetMixin:
+    """
+    Миксин для тестов, ограничивающих число SQL-запросов и время обработки
+    запросов к представлениям базовыми значениями.
+
+    Базовые значения хранятся в файле performance_baselines.json рядом с
+    модулем теста, ключ — "класс.метод теста". Чтобы записать их заново
+    (после намеренного изменения представления), запустите тесты без
+    --parallel с переменной окружения UPDATE_PERFORMANCE_BASELINES=1.
+    """
+
+    def get_baselines_path(self) -> str:
+        """Метод возвращает путь к файлу базовых значений модуля теста."""
+        module = sys.modules[type(self).__module__]
+        return os.path.join(os.path.dirname(module.__file__), PERFORMANCE_BASELINES_FILE)
+
+    def load_baselines(self) -> dict:
+        """Метод возвращает базовые значения модуля теста (файл читается один раз)."""
+        path = self.get_baselines_path()
+        if path not in _baselines:
+            try:
+                with open(path, encoding='utf-8') as file:
+                    _baselines[path] = json.load(file)
+            except FileNotFoundError:
+                _baselines[path] = {}
+        return _baselines[path]
+
+    def save_baseline(self, key: str, queries: int, latency_ms: float):
+        """Метод записывает базовые значения теста key в файл."""
+        baselines = self.load_baselines()
+        baselines[key] = {'queries': queries, 'latency_ms': round(latency_ms, 1)}
+        path = self.get_baselines_path()
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+            file.write('\n')
+        os.replace(f'{path}.tmp', path)
+
+    @contextmanager
+    def assertPerformance(self, name: Optional[str] = None):
+        """
+        Метод проверяет, что код внутри блока with выполняет не больше
+        SQL-запросов, чем записано в базовых значениях теста, и укладывается
+        в допустимое время. Несколько проверок в одном тесте различаются name.
+        """
+        key = f'{type(self).__name__}.{self._testMethodName}'
+        if name:
+            key = f'{key}.{name}'
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            yield
+            latency_ms = (time.perf_counter() - started) * 1000
+        queries = len(context.captured_queries)
+        if UPDATE_PERFORMANCE_BASELINES:
+            self.save_baseline(key, queries, latency_ms)
+            return
+
+        baseline = self.load_baselines().get(key)
+        if baseline is None:
+            self.fail(f'No performance baseline for {key}, '
+                      f'run the tests with UPDATE_PERFORMANCE_BASELINES=1')
+        if queries > baseline['queries']:
+            executed = '\n'.join(f'{number}. {query["sql"]}' for number, query
+                                 in enumerate(context.captured_queries, start=1))
+            self.fail(f'{key}: {queries} queries executed, the baseline is '
+                      f'{baseline["queries"]}\n{executed}')
+        if PERFORMANCE_LATENCY_TOLERANCE:
+            budget = max(baseline['latency_ms'] * PERFORMANCE_LATENCY_TOLERANCE,
+                         baseline['latency_ms'] + PERFORMANCE_LATENCY_SLACK_MS)
+            self.assertLessEqual(latency_ms, budget,
+                                 f'{key}: {latency_ms:.1f} ms, the budget is {budget:.1f} ms')
+
+
+def performance_budget(test_method: Callable) -> Callable:
+    """
+    Декоратор метода теста из класса с PerformanceBudgetMixin: весь тест
+    выполняется внутри assertPerformance.
+    """
+    @functools.wraps(test_method)
+    def wrapper(self, *args, **kwargs):
+        with self.assertPerformance():
+            return test_method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..management.commands.benchmark_urls import NAMESPACES, percentile
+from ..routes import iter_routes
+from ...leads.models import Lead
+
+
+class BenchmarkUrlsTest(TestCase):
+    """Тесты для команды benchmark_urls."""
+
+    def test_percentile(self):
+        """Тест проверяет перцентили методом ближайшего ранга."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 1), 100)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_report(self):
+        """
+        Тест проверяет, что отчет содержит все маршруты приложений CRM и
+        POST-запросы создания, а созданные данные откатываются.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            call_command('benchmark_urls', '--scales', '300', '--requests', '2',
+                         '--warmup', '0', '--output', path, stdout=StringIO())
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+
+        routes = report['scales']['300']['routes']
+        expected = {f'{name} GET' for name, _, params in iter_routes()
+                    if name.rpartition(':')[0] in NAMESPACES and not set(params) - {'pk'}}
+        expected |= {'crm.contracts:contract_create POST', 'crm.customers:customer_create POST'}
+        self.assertEqual(set(routes), expected)
+        for route, result in routes.items():
+            self.assertLess(result['status'], 400, route)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['peak_memory_kib'], 0)
+        self.assertEqual(routes['crm.customers:customer_create POST']['status'], 302)
+        self.assertEqual(routes['crm.contracts:contract_create POST']['status'], 302)
+        self.assertEqual(report['scales']['300']['counts']['leads'], 300)
+        self.assertFalse(Lead.objects.exists())
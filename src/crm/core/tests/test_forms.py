@@ -0,0 +1,39 @@
+from django import forms
+from django.test import TestCase
+
+from ..forms import BatchedModelForm
+from ...ads.forms import AdsForm
+from ...contracts.forms import ContractForm
+from ...customers.tests.test_models import CustomerModelMixinTest
+
+
+class BatchedModelFormTest(CustomerModelMixinTest, TestCase):
+    """Тесты для класса BatchedModelForm и загрузки клиента в MixinLeadAdsForm."""
+
+    def test_validation_exclusions_hook(self):
+        """
+        Тест проверяет, что закрытый метод ModelForm, который переопределяет
+        BatchedModelForm, существует и исключает поля из проверки моделью.
+        """
+        self.assertTrue(callable(getattr(forms.ModelForm, '_get_validation_exclusions', None)),
+                        'Django renamed ModelForm._get_validation_exclusions, '
+                        'update BatchedModelForm')
+        form = AdsForm({'name': 'Кампания', 'product': self.product.pk, 'promotion_channel': 1,
+                        'description': '-', 'budget': 10})
+        self.assertIsInstance(form, BatchedModelForm)
+        # Один запрос поля product: модель не проверяет внешний ключ повторно.
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid(), form.errors)
+        self.assertIn('product', form._get_validation_exclusions())
+
+    def test_lead_is_resolved_in_full_clean(self):
+        """Тест проверяет, что клиент загружается вместе с компанией и услугой до проверки полей."""
+        self.lead.to_active = False
+        self.lead.save()
+        form = ContractForm({'lead': self.lead.pk, 'ads': self.ads.pk, 'product': self.product.pk})
+        form.full_clean()
+        self.assertEqual(form.fields['lead'].resolved, {str(self.lead.pk): self.lead})
+        self.assertEqual(form.fields['ads'].resolved, {str(self.ads.pk): self.ads})
+        self.assertEqual(form.fields['product'].resolved, {str(self.product.pk): self.product})
+        self.assertEqual((form.cleaned_data['lead'], form.cleaned_data['ads'],
+                          form.cleaned_data['product']), (self.lead, self.ads, self.product))
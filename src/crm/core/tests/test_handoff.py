@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase
+
+from ..handoff import handoff_url, read_handoff
+from ...leads.views import LeadTransferToContractView
+from ...products.views import ProductTransferToAdsView
+
+User = get_user_model()
+
+
+class HandoffTest(SimpleTestCase):
+    """
+    Тесты передачи значений для предзаполнения форм через адрес перехода.
+
+    Тесты не обращаются ни к базе данных, ни к кэшу: токен проверяется
+    только подписью, поэтому его может принять любой процесс.
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def make_request(self, user, url='/'):
+        """Метод возвращает GET-запрос к url от имени user."""
+        request = self.factory.get(url)
+        request.user = user
+        return request
+
+    @staticmethod
+    def make_user(pk: int):
+        """Метод возвращает несохраненного суперпользователя с заданным pk."""
+        return User(pk=pk, is_active=True, is_superuser=True)
+
+    def test_round_trip(self):
+        """Тест проверяет, что пользователь получает переданные им значения."""
+        user = self.make_user(1)
+        url = handoff_url(self.make_request(user), 'crm.ads:ads_create', product_id=5)
+        self.assertEqual(urlsplit(url).path, '/ads/new/')
+        self.assertEqual(read_handoff(self.make_request(user, url)), {'product_id': 5})
+
+    def test_other_user_gets_nothing(self):
+        """Тест проверяет, что токен другого пользователя игнорируется."""
+        url = handoff_url(self.make_request(self.make_user(1)), 'crm.ads:ads_create',
+                          product_id=5)
+        self.assertEqual(read_handoff(self.make_request(self.make_user(2), url)), {})
+
+    def test_tampered_forged_or_expired_token(self):
+        """Тест проверяет, что поврежденный, поддельный и устаревший токены игнорируются."""
+        user = self.make_user(1)
+        url = handoff_url(self.make_request(user), 'crm.ads:ads_create', product_id=5)
+        self.assertEqual(read_handoff(self.make_request(user, url + 'x')), {})
+
+        with self.settings(SECRET_KEY='other-key'):
+            forged = handoff_url(self.make_request(user), 'crm.ads:ads_create', product_id=5)
+        self.assertEqual(read_handoff(self.make_request(user, forged)), {})
+
+        with mock.patch('crm.core.handoff.HANDOFF_MAX_AGE', -1):
+            self.assertEqual(read_handoff(self.make_request(user, url)), {})
+
+    def test_concurrent_transfers(self):
+        """
+        Тест проверяет, что одновременные переходы разных пользователей
+        к разным записям не влияют друг на друга.
+        """
+        views = (
+            (LeadTransferToContractView.as_view(), 'lead_id'),
+            (ProductTransferToAdsView.as_view(), 'product_id'),
+        )
+
+        def transfer(number: int):
+            user = self.make_user(number % 50 + 1)
+            view, key = views[number % 2]
+            response = view(self.make_request(user), pk=number)
+            return number, key, read_handoff(self.make_request(user, response.url))
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(transfer, range(1, 501)))
+
+        for number, key, values in results:
+            self.assertEqual(values, {key: number})
@@ -0,0 +1,197 @@
+import multiprocessing
+import re
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import (PROMETHEUS_CONTENT_TYPE, MetricsAggregator, RequestMetrics, aggregator,
+                       merge_metrics)
+
+User = get_user_model()
+
+
+def parse_server_timing(header: str) -> dict:
+    """Функция разбирает заголовок Server-Timing в словарь {метрика: (desc, dur)}."""
+    result = {}
+    for item in re.split(r',\s*(?=\w+;)', header):
+        name, *params = item.split(';')
+        values = dict(param.split('=', 1) for param in params)
+        result[name] = (values.get('desc', '').strip('"'), float(values.get('dur', 0)))
+    return result
+
+
+@override_settings(REQUEST_METRICS=True)
+class RequestMetricsMiddlewareTest(TestCase):
+    """Тесты для класса RequestMetricsMiddleware."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('metrics_user', password='test_password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        aggregator.reset()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        """Тест проверяет, что заголовок Server-Timing содержит замеры запроса."""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('crm.products:products_list'))
+        timing = parse_server_timing(response['Server-Timing'])
+        self.assertEqual(timing['db'][0], '3 queries')
+        self.assertGreater(timing['total'][1], 0)
+        self.assertGreater(timing['tpl'][1], 0)
+        self.assertLessEqual(timing['tpl'][1], timing['total'][1])
+
+    def test_cache_hits_and_misses(self):
+        """Тест проверяет учет попаданий и промахов кэша счетчиков главной страницы."""
+        first = self.client.get(reverse('crm.users:index'))
+        second = self.client.get(reverse('crm.users:index'))
+        self.assertEqual(parse_server_timing(first['Server-Timing'])['cache'][0],
+                         '0 hits, 1 misses')
+        self.assertEqual(parse_server_timing(second['Server-Timing'])['cache'][0],
+                         '1 hits, 0 misses')
+
+    def test_aggregated_by_view_name(self):
+        """Тест проверяет, что замеры накапливаются по именам маршрутов."""
+        for _ in range(3):
+            self.client.get(reverse('crm.leads:leads_list'))
+        self.client.get(reverse('crm.ads:ads_statistic'))
+        stats = aggregator.snapshot()['views']
+        self.assertEqual(stats['crm.leads:leads_list']['requests'], 3)
+        self.assertEqual(stats['crm.ads:ads_statistic']['requests'], 1)
+        self.assertGreater(stats['crm.leads:leads_list']['db_queries'], 0)
+        self.assertGreaterEqual(stats['crm.leads:leads_list']['total_max'],
+                                stats['crm.leads:leads_list']['total'] / 3)
+
+    @override_settings(REQUEST_METRICS=False, PROMETHEUS_METRICS=False)
+    def test_disabled(self):
+        """Тест проверяет, что при выключенных настройках замеры не выполняются."""
+        response = self.client.get(reverse('crm.products:products_list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(aggregator.snapshot()['views'], {})
+
+    @override_settings(REQUEST_METRICS=False, PROMETHEUS_METRICS=True)
+    def test_prometheus_only(self):
+        """
+        Тест проверяет, что замеры для /metrics накапливаются без заголовка
+        Server-Timing в ответах.
+        """
+        response = self.client.get(reverse('crm.products:products_list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(aggregator.snapshot()['views']['crm.products:products_list']['requests'],
+                         1)
+
+
+@override_settings(REQUEST_METRICS=False, PROMETHEUS_METRICS=True)
+class MetricsViewTest(TestCase):
+    """Тесты для класса MetricsView."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('metrics_user', password='test_password')
+
+    def setUp(self):
+        aggregator.reset()
+        cache.clear()
+
+    def test_prometheus_format(self):
+        """Тест проверяет гистограммы и счетчики страницы замеров."""
+        self.client.force_login(self.user)
+        for _ in range(3):
+            self.client.get(reverse('crm.leads:leads_list'))
+        self.client.get(reverse('crm.users:index'))
+        self.client.get(reverse('crm.users:index'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], PROMETHEUS_CONTENT_TYPE)
+        content = response.content.decode()
+        view = 'view="crm.leads:leads_list"'
+        self.assertIn(f'crm_request_duration_seconds_bucket{{{view},le="+Inf"}} 3', content)
+        self.assertIn(f'crm_request_duration_seconds_count{{{view}}} 3', content)
+        self.assertIn(f'crm_request_db_queries_count{{{view}}} 3', content)
+        self.assertIn('crm_cache_requests_total{cache="dashboard_counters",result="hit"} 1',
+                      content)
+        self.assertIn('crm_cache_hit_ratio{cache="dashboard_counters"} 0.5', content)
+        self.assertIn('crm_leads_converted_total 0', content)
+
+    def test_local_only(self):
+        """Тест проверяет, что страница замеров недоступна с внешних адресов."""
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 404)
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.1']):
+            response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        """
+        Тест проверяет, что с заданным METRICS_TOKEN страница замеров доступна
+        только с ключом, в том числе с локального адреса.
+        """
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1',
+                                   HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+
+def record_in_child_process(directory: str):
+    """Функция имитирует воркер: учитывает запрос и конверсию и записывает замеры."""
+    with override_settings(METRICS_DIR=directory):
+        metrics = RequestMetrics()
+        metrics.total, metrics.db_queries = 0.02, 4
+        aggregator.add('crm.leads:leads_list', metrics)
+        aggregator.increment('leads_converted', 2)
+        aggregator.flush()
+
+
+class MetricsAggregatorTest(SimpleTestCase):
+    """Тесты для класса MetricsAggregator."""
+
+    def test_histogram_buckets(self):
+        """Тест проверяет распределение запросов по корзинам гистограмм."""
+        metrics_aggregator = MetricsAggregator()
+        for total, queries in ((0.003, 0), (0.07, 3), (30, 500)):
+            metrics = RequestMetrics()
+            metrics.total, metrics.db_queries = total, queries
+            metrics_aggregator.add('view', metrics)
+        stats = metrics_aggregator.snapshot()['views']['view']
+        self.assertEqual(stats['latency_buckets'], [1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(stats['queries_buckets'], [1, 0, 1, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(stats['total_max'], 30)
+
+    def test_merge(self):
+        """Тест проверяет сложение счетчиков и гистограмм и выбор максимума."""
+        merged = merge_metrics(
+            {'views': {'a': {'requests': 1, 'total_max': 2.0, 'latency_buckets': [1, 0]}}},
+            {'views': {'a': {'requests': 2, 'total_max': 1.0, 'latency_buckets': [0, 2]},
+                       'b': {'requests': 1}}})
+        self.assertEqual(merged['views']['a'],
+                         {'requests': 3, 'total_max': 2.0, 'latency_buckets': [1, 2]})
+        self.assertEqual(merged['views']['b'], {'requests': 1})
+
+    def test_collect_across_processes(self):
+        """
+        Тест проверяет, что замеры, записанные другим процессом в METRICS_DIR,
+        объединяются с замерами текущего процесса.
+        """
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory):
+            aggregator.reset()
+            aggregator.increment('leads_converted')
+            process = multiprocessing.get_context('fork').Process(
+                target=record_in_child_process, args=(directory,))
+            process.start()
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+            collected = aggregator.collect()
+            aggregator.reset()
+        self.assertEqual(collected['counters']['leads_converted'], 3)
+        self.assertEqual(collected['views']['crm.leads:leads_list']['requests'], 1)
+        self.assertEqual(collected['views']['crm.leads:leads_list']['db_queries'], 4)
@@ -0,0 +1,95 @@
+from django.http import Http404
+from django.test import RequestFactory, TestCase
+from django.views.generic import ListView
+
+from ..mixins import KeysetPaginationMixin, encode_cursor
+from ...ads.tests.test_models import AdsModelMixinTest
+from ...leads.models import Lead
+
+
+class LeadPageView(KeysetPaginationMixin, ListView):
+    """Тестовое представление списка лидов по две записи на странице."""
+
+    model = Lead
+    paginate_by = 2
+
+
+class LeadByNamePageView(LeadPageView):
+    """Тестовое представление списка лидов, упорядоченного по фамилии."""
+
+    keyset_field = '-last_name'
+
+
+class KeysetPaginationMixinTest(AdsModelMixinTest, TestCase):
+    """Тесты для класса KeysetPaginationMixin."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Метод создает пять лидов, двое из которых с одинаковой фамилией."""
+        super().setUpTestData()
+        cls.leads = [Lead.objects.create(first_name='Иван', last_name=last_name,
+                                         phone='89996660000', ads=cls.ads)
+                     for last_name in ('Алексеев', 'Борисов', 'Борисов', 'Васильев', 'Глебов')]
+
+    def get_context(self, view_class=LeadPageView, **params) -> dict:
+        """Метод возвращает контекст шаблона представления для запроса с параметрами params."""
+        request = RequestFactory().get('/', params)
+        response = view_class.as_view()(request)
+        return response.context_data
+
+    def test_first_page(self):
+        """Тест проверяет первую страницу без подсчета общего числа записей."""
+        with self.assertNumQueries(1):
+            context = self.get_context()
+        self.assertEqual(context['object_list'], self.leads[:2])
+        self.assertTrue(context['is_paginated'])
+        self.assertFalse(context['page_obj'].has_previous())
+        self.assertTrue(context['page_obj'].has_next())
+
+    def test_walk_forward_and_back(self):
+        """Тест проверяет переходы по курсорам вперед до конца и обратно."""
+        context = self.get_context()
+        context = self.get_context(after=context['page_obj'].next_cursor)
+        self.assertEqual(context['object_list'], self.leads[2:4])
+        context = self.get_context(after=context['page_obj'].next_cursor)
+        self.assertEqual(context['object_list'], self.leads[4:])
+        self.assertFalse(context['page_obj'].has_next())
+        context = self.get_context(before=context['page_obj'].previous_cursor)
+        self.assertEqual(context['object_list'], self.leads[2:4])
+        context = self.get_context(before=context['page_obj'].previous_cursor)
+        self.assertEqual(context['object_list'], self.leads[:2])
+        self.assertFalse(context['page_obj'].has_previous())
+
+    def test_stable_under_inserts(self):
+        """Тест проверяет, что новые записи не сдвигают следующую страницу."""
+        context = self.get_context()
+        Lead.objects.create(first_name='Иван', last_name='Новиков',
+                            phone='89996660000', ads=self.ads)
+        context = self.get_context(after=context['page_obj'].next_cursor)
+        self.assertEqual(context['object_list'], self.leads[2:4])
+
+    def test_ordering_by_non_unique_field(self):
+        """Тест проверяет порядок по неуникальному полю с добавлением pk."""
+        pages = []
+        context = self.get_context(LeadByNamePageView)
+        pages.extend(context['object_list'])
+        while context['page_obj'].has_next():
+            context = self.get_context(LeadByNamePageView, after=context['page_obj'].next_cursor)
+            pages.extend(context['object_list'])
+        expected = sorted(self.leads, key=lambda lead: (lead.last_name, lead.pk), reverse=True)
+        self.assertEqual(pages, expected)
+
+    def test_invalid_cursor(self):
+        """Тест проверяет, что некорректный курсор приводит к ошибке 404."""
+        for cursor in ('not-a-cursor', encode_cursor(['abc']), encode_cursor([1, 2]),
+                       encode_cursor([2 ** 63]), encode_cursor([-2 ** 70])):
+            with self.subTest(cursor=cursor), self.assertRaises(Http404):
+                self.get_context(after=cursor)
+
+    def test_links_keep_other_parameters(self):
+        """Тест проверяет, что ссылки на соседние страницы сохраняют остальные параметры."""
+        context = self.get_context(q='Иван', after=encode_cursor([self.leads[0].pk]))
+        page = context['page_obj']
+        self.assertEqual(page.next_query, f'q=%D0%98%D0%B2%D0%B0%D0%BD&after={page.next_cursor}')
+        self.assertEqual(page.previous_query,
+                         f'q=%D0%98%D0%B2%D0%B0%D0%BD&before={page.previous_cursor}')
@@ -0,0 +1,208 @@
+import threading
+import time
+import unittest
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from django.db import OperationalError, connection, connections
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+
+from ..db.pool import (TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS, ConnectionPool,
+                       PoolTimeout, close_idle_connections, pool_stats)
+
+
+class FakeConnection:
+    """Класс соединения для тестов пула без обращения к базе данных."""
+
+    def __init__(self):
+        self.closed = 0
+        self.alive = True
+        self.rollbacks = 0
+        self.info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        if not self.alive:
+            raise OSError('server closed the connection unexpectedly')
+        return nullcontext(SimpleNamespace(execute=lambda sql: None))
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Тесты для класса ConnectionPool."""
+
+    def make_pool(self, **options) -> ConnectionPool:
+        """Метод возвращает пул без проверки соединений перед выдачей."""
+        return ConnectionPool('test', **{'pre_ping': False, **options})
+
+    def test_connection_is_reused(self):
+        """Тест проверяет, что возвращенное соединение выдается повторно."""
+        pool = self.make_pool()
+        first = pool.checkout(FakeConnection)
+        pool.release(first)
+        self.assertIs(pool.checkout(FakeConnection), first)
+        self.assertEqual(pool.stats()['connections_created'], 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+
+    def test_open_transaction_is_rolled_back(self):
+        """Тест проверяет откат незавершенной транзакции при возврате соединения."""
+        pool = self.make_pool()
+        conn = pool.checkout(FakeConnection)
+        conn.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        pool.release(conn)
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertIs(pool.checkout(FakeConnection), conn)
+
+    def test_closed_connection_is_discarded(self):
+        """Тест проверяет, что закрытое соединение не возвращается в пул."""
+        pool = self.make_pool()
+        conn = pool.checkout(FakeConnection)
+        conn.closed = 1
+        pool.release(conn)
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertIsNot(pool.checkout(FakeConnection), conn)
+
+    def test_wait_and_timeout(self):
+        """
+        Тест проверяет, что при занятом пуле поток ждет освобождения
+        соединения, а по истечении времени ожидания получает PoolTimeout.
+        """
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        conn = pool.checkout(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(FakeConnection)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+        pool.timeout = 5
+        threading.Timer(0.1, pool.release, args=(conn,)).start()
+        self.assertIs(pool.checkout(FakeConnection), conn)
+        self.assertGreaterEqual(pool.stats()['wait_seconds_max'], 0.05)
+
+    def test_idle_timeout(self):
+        """Тест проверяет, что простаивающее дольше idle_timeout соединение закрывается."""
+        pool = self.make_pool(idle_timeout=0)
+        conn = pool.checkout(FakeConnection)
+        pool.release(conn)
+        time.sleep(0.01)
+        self.assertIsNot(pool.checkout(FakeConnection), conn)
+        self.assertEqual(conn.closed, 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_pre_ping_replaces_broken_connection(self):
+        """Тест проверяет, что разорванное соединение заменяется новым перед выдачей."""
+        pool = ConnectionPool('test', pre_ping=True)
+        conn = pool.checkout(FakeConnection)
+        pool.release(conn)
+        conn.alive = False
+        self.assertIsNot(pool.checkout(FakeConnection), conn)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        """Тест проверяет, что ошибка подключения не занимает место в пуле."""
+        pool = self.make_pool(max_size=1)
+
+        def connect():
+            raise OSError('connection refused')
+
+        with self.assertRaises(OSError):
+            pool.checkout(connect)
+        self.assertEqual(pool.stats()['size'], 0)
+        pool.checkout(FakeConnection)
+
+    def test_concurrent_checkouts_are_bounded(self):
+        """Тест проверяет, что одновременно выдается не больше max_size соединений."""
+        pool = self.make_pool(max_size=5)
+        lock = threading.Lock()
+        in_use = set()
+        peak = []
+
+        def work(_):
+            conn = pool.checkout(FakeConnection)
+            with lock:
+                self.assertNotIn(id(conn), in_use)
+                in_use.add(id(conn))
+                peak.append(len(in_use))
+            time.sleep(0.001)
+            with lock:
+                in_use.discard(id(conn))
+            pool.release(conn)
+
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            list(executor.map(work, range(1000)))
+        self.assertLessEqual(max(peak), 5)
+        self.assertLessEqual(pool.stats()['connections_created'], 5)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL specific')
+class PooledBackendTest(SimpleTestCase):
+    """Тесты бэкенда postgresql_pool на настоящей базе данных."""
+
+    def setUp(self):
+        settings_dict = {**connections['default'].settings_dict,
+                         'ENGINE': 'crm.core.db.backends.postgresql_pool',
+                         'CONN_MAX_AGE': 0}
+        settings_dict['OPTIONS'] = {**settings_dict['OPTIONS'],
+                                    'POOL': {'max_size': 2, 'timeout': 0.2}}
+        backend = load_backend(settings_dict['ENGINE'])
+        self.wrapper = backend.DatabaseWrapper(settings_dict, alias='pool_test')
+        # Обработчики connection_created (django.contrib.postgres) ищут соединение по псевдониму.
+        connections['pool_test'] = self.wrapper
+
+    def tearDown(self):
+        self.wrapper.close()
+        del connections['pool_test']
+        close_idle_connections()
+
+    def fetch_one(self):
+        """Метод выполняет простой запрос через проверяемое соединение."""
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            return cursor.fetchone()[0]
+
+    def test_connection_returns_to_pool(self):
+        """Тест проверяет, что закрытое Django соединение возвращается в пул и переиспользуется."""
+        name = f'pool_test:{self.wrapper.settings_dict["NAME"]}'
+        self.assertEqual(self.fetch_one(), 1)
+        created = pool_stats()[name]['connections_created']
+        raw = self.wrapper.connection
+        self.wrapper.close()
+        self.assertFalse(raw.closed)
+        self.assertEqual(self.fetch_one(), 1)
+        self.assertIs(self.wrapper.connection, raw)
+        self.assertEqual(pool_stats()[name]['connections_created'], created)
+
+    def test_connection_closed_in_transaction_is_discarded(self):
+        """Тест проверяет, что соединение, закрытое внутри транзакции, не возвращается в пул."""
+        self.fetch_one()
+        raw = self.wrapper.connection
+        self.wrapper.in_atomic_block = True
+        try:
+            self.wrapper.close()
+        finally:
+            self.wrapper.in_atomic_block = False
+            self.wrapper.closed_in_transaction = False
+            self.wrapper.connection = None
+        self.assertTrue(raw.closed)
+
+    def test_pool_timeout_raises_operational_error(self):
+        """Тест проверяет, что исчерпание пула приводит к OperationalError."""
+        other = load_backend(self.wrapper.settings_dict['ENGINE']).DatabaseWrapper(
+            self.wrapper.settings_dict, alias='pool_test')
+        third = load_backend(self.wrapper.settings_dict['ENGINE']).DatabaseWrapper(
+            self.wrapper.settings_dict, alias='pool_test')
+        try:
+            self.fetch_one()
+            other.ensure_connection()
+            with self.assertRaises(OperationalError):
+                third.ensure_connection()
+        finally:
+            other.close()
+            third.close()
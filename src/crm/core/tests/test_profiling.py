@@ -0,0 +1,54 @@
+import marshal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class RequestProfilerMiddlewareTest(TestCase):
+    """Тесты для класса RequestProfilerMiddleware."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('profile_staff', password='test_password')
+        cls.user = User.objects.create_user('profile_user', password='test_password')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('crm.products:products_list')
+
+    def test_staff_receives_report(self):
+        """Тест проверяет, что сотрудник получает отчет о времени функций и запросов."""
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'_profile': '1'})
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        content = response.content.decode()
+        self.assertIn(f'GET {self.url}?_profile=1 -> 200', content)
+        self.assertIn('SQL: ', content)
+        self.assertIn('products_product', content)
+        self.assertIn('cumulative', content)
+        self.assertIn('(get)', content)
+
+    def test_pstats_download(self):
+        """Тест проверяет выгрузку статистики cProfile."""
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'_profile': 'pstats'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="request.prof"')
+        self.assertIsInstance(marshal.loads(response.content), dict)
+
+    def test_other_users_get_page(self):
+        """Тест проверяет, что для остальных пользователей параметр ничего не меняет."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('crm.users:index'), {'_profile': '1'})
+        self.assertTemplateUsed(response, 'users/index.html')
+
+    @override_settings(REQUEST_PROFILER_RATE=2)
+    def test_rate_limit(self):
+        """Тест проверяет ограничение числа профилируемых запросов в минуту."""
+        self.client.force_login(self.staff)
+        statuses = [self.client.get(self.url, {'_profile': '1'}).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(self.client.get(self.url).status_code, 200)
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+
+from ..routes import iter_routes
+from ..testing import QueryCountTestMixin
+from ...ads.models import Ads
+from ...contracts.models import Contract
+from ...customers.models import Customer
+from ...customers.tests.test_models import CustomerModelMixinTest
+from ...leads.models import Lead
+from ...products.models import Product
+
+User = get_user_model()
+
+
+class ConstantQueriesTest(QueryCountTestMixin, CustomerModelMixinTest, TestCase):
+    """Тесты постоянного числа запросов для всех страниц из crm/urls.py."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Метод создает тестовые данные и суперпользователя."""
+        super().setUpTestData()
+        User.objects.create_superuser('admin', password='admin_password')
+
+    def setUp(self):
+        self.client.login(username='admin', password='admin_password')
+
+    def add_rows(self):
+        """Метод добавляет по несколько связанных записей в каждую таблицу."""
+        cache.clear()
+        for number in range(3):
+            product = Product.objects.create(name=f'Услуга {number}', description='-', price=1)
+            ads = Ads.objects.create(name=f'Кампания {number}', description='-',
+                                     budget=100, product=product)
+            lead = Lead.objects.create(first_name='Петр', last_name='Петров',
+                                       phone='89996660001', ads=ads)
+            Lead.objects.create(first_name='Анна', last_name='Сидорова',
+                                phone='89996660002', ads=ads)
+            contract = Contract.objects.create(name=f'Договор {number}', lead=lead, ads=ads,
+                                               product=product, cost=100,
+                                               conclusion_day='2024-01-01',
+                                               start_day='2024-01-05', end_day='2024-01-30')
+            Customer.objects.create(lead=lead, ads=ads, contract=contract)
+
+    def test_routes_render_in_constant_queries(self):
+        """Тест проверяет, что число запросов каждой страницы не зависит от числа строк."""
+        objects = {'crm.products': self.product, 'crm.ads': self.ads, 'crm.leads': self.lead,
+                   'crm.contracts': self.contract, 'crm.customers': self.customer,
+                   'crm.users': None}
+        checked = 0
+        for name, _, params in iter_routes():
+            namespace = name.rpartition(':')[0]
+            if namespace not in objects or set(params) - {'pk'}:
+                continue
+            kwargs = {'pk': objects[namespace].pk} if 'pk' in params else {}
+            with self.subTest(route=name), transaction.atomic():
+                cache.clear()
+                self.assertConstantQueries(reverse(name, kwargs=kwargs), self.add_rows)
+                transaction.set_rollback(True)
+            checked += 1
+        self.assertGreaterEqual(checked, 30)
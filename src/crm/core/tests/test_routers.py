@@ -0,0 +1,162 @@
+import unittest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.views.generic import DetailView, ListView, UpdateView, View
+
+from ..middleware import ReadReplicaMiddleware, read_only
+from ..routers import get_read_database, read_from
+from ...leads.models import Lead
+from ...products.models import Product
+
+User = get_user_model()
+
+# Отдельная тестовая база-реплика (не зеркало основной) есть только в
+# настройках, где она описана явно.
+SEPARATE_REPLICA = ('replica' in settings.DATABASES
+                    and not settings.DATABASES['replica'].get('TEST', {}).get('MIRROR'))
+
+
+def read_database_view(view_class):
+    """Функция возвращает представление, отвечающее базой для чтения лидов."""
+    class RecordingView(view_class):
+        model = Lead
+
+        def dispatch(self, request, *args, **kwargs):
+            return HttpResponse(router.db_for_read(Lead))
+
+    return RecordingView.as_view()
+
+
+@override_settings(READ_REPLICA_ALIAS='replica')
+class ReadReplicaRouterTest(SimpleTestCase):
+    """Тесты для класса ReadReplicaRouter."""
+
+    def test_reads_from_replica_inside_read_from(self):
+        """Тест проверяет, что чтение направляется в реплику только внутри read_from."""
+        self.assertEqual(router.db_for_read(Lead), DEFAULT_DB_ALIAS)
+        with read_from('replica'):
+            self.assertEqual(get_read_database(), 'replica')
+            self.assertEqual(router.db_for_read(Lead), 'replica')
+            self.assertEqual(router.db_for_read(Product), 'replica')
+        self.assertIsNone(get_read_database())
+
+    def test_auth_and_sessions_read_from_primary(self):
+        """Тест проверяет, что пользователи и сессии всегда читаются из основной базы."""
+        with read_from('replica'):
+            self.assertEqual(router.db_for_read(User), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_read(Permission), DEFAULT_DB_ALIAS)
+
+    def test_writes_go_to_primary(self):
+        """Тест проверяет, что запись выполняется в основную базу даже внутри read_from."""
+        with read_from('replica'):
+            self.assertEqual(router.db_for_write(Lead), DEFAULT_DB_ALIAS)
+
+    def test_relation_between_primary_and_replica(self):
+        """Тест проверяет, что связи между объектами основной базы и реплики разрешены."""
+        product, lead = Product(), Lead()
+        product._state.db, lead._state.db = 'replica', DEFAULT_DB_ALIAS
+        self.assertTrue(router.allow_relation(product, lead))
+
+
+@override_settings(READ_REPLICA_ALIAS='replica')
+class ReadReplicaMiddlewareTest(SimpleTestCase):
+    """Тесты для класса ReadReplicaMiddleware."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def call(self, view, request) -> HttpResponse:
+        """Метод обрабатывает запрос представлением view через промежуточный слой."""
+        def get_response(request):
+            return middleware.process_view(request, view, (), {}) or view(request)
+
+        middleware = ReadReplicaMiddleware(get_response)
+        return middleware(request)
+
+    def test_read_only_views_read_from_replica(self):
+        """Тест проверяет чтение из реплики списков, детальных и помеченных представлений."""
+        @read_only
+        def function_view(request):
+            return HttpResponse(router.db_for_read(Lead))
+
+        for view in (read_database_view(ListView), read_database_view(DetailView),
+                     function_view):
+            with self.subTest(view=view):
+                response = self.call(view, self.factory.get('/'))
+                self.assertEqual(response.content, b'replica')
+        self.assertIsNone(get_read_database())
+
+    def test_other_views_read_from_primary(self):
+        """Тест проверяет, что формы и запросы, изменяющие данные, читают из основной базы."""
+        for view, request in ((read_database_view(UpdateView), self.factory.get('/')),
+                              (read_database_view(View), self.factory.get('/')),
+                              (read_database_view(ListView), self.factory.post('/'))):
+            with self.subTest(view=view, method=request.method):
+                self.assertEqual(self.call(view, request).content, b'default')
+
+    def test_read_your_writes_after_post(self):
+        """
+        Тест проверяет, что после изменения данных пользователь получает
+        cookie и на время READ_REPLICA_STICKY_SECONDS читает из основной базы.
+        """
+        view = read_database_view(ListView)
+        response = self.call(view, self.factory.post('/'))
+        cookie = response.cookies[settings.READ_REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.READ_REPLICA_STICKY_SECONDS)
+        self.assertTrue(cookie['httponly'])
+
+        request = self.factory.get('/')
+        request.COOKIES[settings.READ_REPLICA_STICKY_COOKIE] = cookie.value
+        self.assertEqual(self.call(view, request).content, b'default')
+
+    @override_settings(READ_REPLICA_ALIAS=None)
+    def test_disabled_without_replica(self):
+        """Тест проверяет, что без настроенной реплики промежуточный слой отключается."""
+        with self.assertRaises(MiddlewareNotUsed):
+            ReadReplicaMiddleware(lambda request: HttpResponse())
+
+
+@unittest.skipUnless(SEPARATE_REPLICA, 'Requires a separate replica test database')
+@override_settings(READ_REPLICA_ALIAS='replica')
+class ReadReplicaIntegrationTest(TestCase):
+    """
+    Тесты чтения из отдельной тестовой базы-реплики.
+
+    Реплика не наполняется основной базой, поэтому услуга, созданная только
+    в ней, видна лишь при чтении из реплики.
+    """
+
+    databases = {'default', 'replica'} if SEPARATE_REPLICA else {'default'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('replica_user', password='test_password')
+        cls.product = Product.objects.using('replica').create(
+            name='Услуга из реплики', description='Описание', price=100)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_list_reads_from_replica(self):
+        """Тест проверяет, что список услуг читается из реплики."""
+        response = self.client.get(reverse('crm.products:products_list'))
+        self.assertContains(response, self.product.name)
+        response = self.client.get(reverse('crm.products:product_detail',
+                                           args=[self.product.pk]))
+        self.assertContains(response, self.product.name)
+
+    def test_sticky_cookie_reads_from_primary(self):
+        """Тест проверяет, что после изменения данных список читается из основной базы."""
+        self.client.post(reverse('crm.products:product_create'),
+                         {'name': 'Новая услуга', 'description': 'Описание', 'price': 10})
+        self.assertIn(settings.READ_REPLICA_STICKY_COOKIE, self.client.cookies)
+        response = self.client.get(reverse('crm.products:products_list'))
+        self.assertContains(response, 'Новая услуга')
+        self.assertNotContains(response, self.product.name)
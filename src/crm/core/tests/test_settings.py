@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+
+SCRIPT = '''
+import json
+from crm.crm import settings
+print(json.dumps({
+    'DEBUG': settings.DEBUG,
+    'CACHE': settings.CACHES['default']['BACKEND'],
+    'CONN_MAX_AGE': settings.DATABASES['default']['CONN_MAX_AGE'],
+    'CONN_HEALTH_CHECKS': settings.DATABASES['default']['CONN_HEALTH_CHECKS'],
+    'SESSION_ENGINE': getattr(settings, 'SESSION_ENGINE', None),
+    'ENGINE': settings.DATABASES['default']['ENGINE'],
+    'POOL': settings.DATABASES['default']['OPTIONS'].get('POOL'),
+    'LOADERS': settings.TEMPLATES[0]['OPTIONS']['loaders'],
+    'ALLOWED_HOSTS': settings.ALLOWED_HOSTS,
+}))
+'''
+
+
+class SettingsProfileTest(SimpleTestCase):
+    """Тесты выбора профиля настроек переменной окружения CRM_PROFILE."""
+
+    @staticmethod
+    def load_settings(**env) -> dict:
+        """Метод загружает модуль настроек в отдельном процессе с переменными env."""
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path),
+                           CRM_PROFILE='', REDIS_URL='', CONN_MAX_AGE='', ALLOWED_HOSTS='',
+                           DB_POOL_SIZE='')
+        environment.update(env)
+        output = subprocess.run([sys.executable, '-c', SCRIPT], env=environment,
+                                capture_output=True, check=True, text=True).stdout
+        return json.loads(output)
+
+    def test_development_profile(self):
+        """Тест проверяет настройки профиля разработки."""
+        values = self.load_settings()
+        self.assertTrue(values['DEBUG'])
+        self.assertEqual(values['CACHE'], 'django.core.cache.backends.locmem.LocMemCache')
+        self.assertEqual(values['CONN_MAX_AGE'], 0)
+        self.assertIsNone(values['SESSION_ENGINE'])
+        self.assertEqual(values['LOADERS'][0], 'django.template.loaders.filesystem.Loader')
+
+    def test_production_profile(self):
+        """Тест проверяет настройки профиля эксплуатации."""
+        values = self.load_settings(CRM_PROFILE='production', ALLOWED_HOSTS='crm.example.com')
+        self.assertFalse(values['DEBUG'])
+        self.assertEqual(values['CACHE'], 'django.core.cache.backends.db.DatabaseCache')
+        self.assertEqual(values['CONN_MAX_AGE'], 60)
+        self.assertTrue(values['CONN_HEALTH_CHECKS'])
+        self.assertEqual(values['SESSION_ENGINE'], 'django.contrib.sessions.backends.cached_db')
+        self.assertEqual(values['LOADERS'][0][0], 'django.template.loaders.cached.Loader')
+        self.assertEqual(values['ALLOWED_HOSTS'], ['crm.example.com'])
+
+    def test_redis_cache(self):
+        """Тест проверяет выбор Redis при заданной переменной REDIS_URL."""
+        values = self.load_settings(CRM_PROFILE='production', REDIS_URL='redis://127.0.0.1:6379')
+        self.assertEqual(values['CACHE'], 'django.core.cache.backends.redis.RedisCache')
+
+    def test_connection_pool(self):
+        """Тест проверяет подключение пула соединений переменной DB_POOL_SIZE."""
+        values = self.load_settings(CRM_PROFILE='production', DB_POOL_SIZE='20')
+        self.assertEqual(values['ENGINE'], 'crm.core.db.backends.postgresql_pool')
+        self.assertEqual(values['CONN_MAX_AGE'], 0)
+        self.assertEqual(values['POOL'], {'max_size': 20, 'timeout': 10.0, 'idle_timeout': 300.0})
@@ -0,0 +1,106 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from ..slow_queries import get_fingerprint, read_slow_queries, store_slow_query
+from ...products.models import Product
+
+User = get_user_model()
+
+
+class SlowQueryLogTest(TestCase):
+    """Тесты журнала медленных запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('slow_user', password='test_password')
+        Product.objects.create(name='Услуга', description='Описание', price=10)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = os.path.join(directory.name, 'slow.jsonl')
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def get_slow(self, url: str, **data):
+        """Метод запрашивает страницу url (POST при data), записывая все запросы как медленные."""
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=1e-6, SLOW_QUERY_LOG=self.log), \
+                self.assertLogs('crm.core.slow_queries', 'WARNING'):
+            if data:
+                self.client.post(url, data)
+            else:
+                self.client.get(url)
+
+    def test_slow_select_is_logged_with_plan(self):
+        """Тест проверяет запись медленного SELECT с маршрутом, местом вызова и планом."""
+        self.get_slow(reverse('crm.products:products_list'))
+        with self.settings(SLOW_QUERY_LOG=self.log):
+            entries = read_slow_queries()
+        entry = next(entry for entry in entries if 'products_product' in entry['sql'])
+        self.assertEqual(entry['view'], 'crm.products:products_list')
+        self.assertEqual(entry['path'], '/products/')
+        self.assertTrue(entry['origin'])
+        self.assertIsNotNone(entry['plan'])
+        if connection.vendor == 'postgresql':
+            self.assertIn('actual time', entry['plan'])
+            self.assertIn('Buffers', entry['plan'])
+
+    def test_explain_is_throttled(self):
+        """Тест проверяет, что план одного и того же запроса получается не чаще интервала."""
+        for _ in range(2):
+            self.get_slow(reverse('crm.products:products_list'))
+        with self.settings(SLOW_QUERY_LOG=self.log):
+            plans = [entry['plan'] for entry in read_slow_queries()
+                     if 'FROM "products_product"' in entry['sql']]
+        self.assertEqual(len(plans), 2)
+        self.assertIsNone(plans[0])
+        self.assertIsNotNone(plans[1])
+        self.assertEqual(get_fingerprint('SELECT 1 WHERE id IN (%s, %s)'),
+                         get_fingerprint('SELECT  1 WHERE id IN (%s,%s, %s)'))
+        self.assertNotEqual(get_fingerprint('SELECT 1'), get_fingerprint('SELECT 2'))
+
+    def test_fast_queries_are_not_logged(self):
+        """Тест проверяет, что запросы быстрее порога не записываются."""
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=60000, SLOW_QUERY_LOG=self.log):
+            self.client.get(reverse('crm.products:products_list'))
+            self.assertEqual(read_slow_queries(), [])
+
+    def test_write_without_explain(self):
+        """Тест проверяет, что изменяющие запросы записываются без плана выполнения."""
+        self.get_slow(reverse('crm.products:product_create'),
+                      name='Новая', description='Описание', price=5)
+        with self.settings(SLOW_QUERY_LOG=self.log):
+            entries = read_slow_queries()
+        entry = next(entry for entry in entries if entry['sql'].startswith('INSERT'))
+        self.assertIsNone(entry['plan'])
+        self.assertEqual(entry['view'], 'crm.products:product_create')
+
+    def test_rotation(self):
+        """Тест проверяет, что записи читаются и из архивных копий файла журнала."""
+        with self.settings(SLOW_QUERY_LOG=self.log, SLOW_QUERY_LOG_MAX_BYTES=200,
+                           SLOW_QUERY_LOG_BACKUP_COUNT=10):
+            for number in range(5):
+                store_slow_query({'sql': f'SELECT {number}', 'padding': 'x' * 100})
+            entries = read_slow_queries()
+        self.assertTrue(os.path.exists(f'{self.log}.1'))
+        self.assertEqual([entry['sql'] for entry in entries],
+                         [f'SELECT {number}' for number in reversed(range(5))])
+
+    def test_page_is_staff_only(self):
+        """Тест проверяет, что страница медленных запросов доступна только персоналу."""
+        with self.settings(SLOW_QUERY_LOG=self.log):
+            store_slow_query({'sql': 'SELECT 42', 'duration_ms': 500, 'origin': ['a.py:1 in f']})
+            response = self.client.get(reverse('slow_queries'))
+            self.assertContains(response, 'SELECT 42')
+            self.assertContains(response, 'a.py:1 in f')
+
+            User.objects.create_user('regular_user', password='test_password')
+            self.client.login(username='regular_user', password='test_password')
+            response = self.client.get(reverse('slow_queries'))
+            self.assertEqual(response.status_code, 403)
@@ -0,0 +1,72 @@
+from django.db import connection, transaction
+from django.test import TestCase
+
+from ..synthetic import SyntheticDataGenerator
+from ...ads.models import Ads
+from ...ads.service import find_campaign_stats_drift
+from ...contracts.models import Contract
+from ...customers.models import Customer
+from ...leads.models import Lead
+
+
+class SyntheticDataGeneratorTest(TestCase):
+    """Тесты для класса SyntheticDataGenerator."""
+
+    def generate(self, seed: int = 0, **options) -> dict:
+        """Метод создает небольшой набор данных."""
+        return SyntheticDataGenerator(seed, batch_size=100, **options).generate(
+            products=3, ads=10, leads=500, customers_share=0.3)
+
+    def snapshot(self) -> list:
+        """Метод возвращает содержимое таблиц лидов и контрактов."""
+        return [list(Lead.objects.order_by('pk').values_list()),
+                list(Contract.objects.order_by('pk').values_list())]
+
+    def check_dataset(self, counts: dict):
+        """Метод проверяет связность и правдоподобие созданных данных."""
+        self.assertEqual(counts['leads'], 500)
+        self.assertEqual(Lead.objects.count(), 500)
+        self.assertEqual(Customer.objects.count(), counts['customers'])
+        self.assertEqual(Contract.objects.count(), counts['contracts'])
+        self.assertTrue(100 < counts['customers'] < 200)
+        self.assertEqual(Lead.objects.filter(to_active=True).count(), counts['customers'])
+        self.assertEqual(set(Ads.objects.values_list('promotion_channel', flat=True)),
+                         set(Ads.PromotionChanel.values))
+        for lead in Lead.objects.all():
+            Lead.name_validator(lead.first_name)
+            Lead.name_validator(lead.last_name)
+            Lead.number_validator(lead.phone)
+        for contract in Contract.objects.select_related('ads', 'lead'):
+            self.assertLessEqual(contract.conclusion_day, contract.start_day)
+            self.assertLess(contract.start_day, contract.end_day)
+            self.assertEqual(contract.lead.ads_id, contract.ads_id)
+            self.assertEqual(contract.ads.product_id, contract.product_id)
+        self.assertEqual(find_campaign_stats_drift(), [])
+        # Последовательности первичных ключей сдвинуты за созданные записи.
+        lead = Lead.objects.create(first_name='Новый', last_name='Лид', phone='+79990000000',
+                                   ads=Ads.objects.first())
+        self.assertGreater(lead.pk, max(Lead.objects.exclude(pk=lead.pk)
+                                        .values_list('pk', flat=True)))
+
+    def test_bulk_create(self):
+        """Тест проверяет создание данных пакетами bulk_create."""
+        self.check_dataset(self.generate(use_copy=False))
+
+    def test_copy(self):
+        """Тест проверяет создание данных командой COPY (PostgreSQL)."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('PostgreSQL specific')
+        self.check_dataset(self.generate(text_size=50))
+        self.assertEqual({len(comment) for comment in
+                          Customer.objects.values_list('comment', flat=True)}, {50})
+
+    def test_deterministic(self):
+        """Тест проверяет, что одинаковый seed дает одинаковые данные, а разный — разные."""
+        snapshots = []
+        for seed in (1, 1, 2):
+            with transaction.atomic():
+                self.generate(seed)
+                snapshots.append(self.snapshot())
+                transaction.set_rollback(True)
+        self.assertEqual(snapshots[0], snapshots[1])
+        self.assertNotEqual(snapshots[0], snapshots[2])
@@ -0,0 +1,37 @@
+from django.test import TestCase
+
+from ...contracts.forms import ContractForm
+from ...customers.tests.test_models import CustomerModelMixinTest
+from ...leads.models import Lead
+
+
+class AutocompleteSelectTest(CustomerModelMixinTest, TestCase):
+    """Тесты для виджета AutocompleteSelect."""
+
+    def test_renders_only_selected_option(self):
+        """Тест проверяет, что в разметку попадают только пустой и выбранный варианты."""
+        Lead.objects.bulk_create(
+            Lead(first_name='Петр', last_name=f'Петров {number}', phone='89990000000',
+                 ads=self.ads)
+            for number in range(10))
+        form = ContractForm(initial={'lead': self.lead.pk})
+        html = str(form['lead'])
+        self.assertEqual(html.count('<option'), 2)
+        self.assertIn(f'<option value="{self.lead.pk}" selected>{self.lead}</option>', html)
+        self.assertIn('data-autocomplete-url="/leads/autocomplete/?to_active=0"', html)
+
+    def test_render_queries_do_not_depend_on_table_size(self):
+        """Тест проверяет, что пустая форма отрисовывается без запросов к связанным таблицам."""
+        form = ContractForm()
+        with self.assertNumQueries(0):
+            for name in ('lead', 'ads', 'product'):
+                str(form[name])
+
+    def test_invalid_value_is_ignored(self):
+        """Тест проверяет, что некорректное значение не приводит к ошибке отрисовки."""
+        form = ContractForm(data={'lead': 'abc'})
+        self.assertEqual(str(form['lead']).count('<option'), 1)
+
+    def test_media(self):
+        """Тест проверяет подключение скрипта автодополнения."""
+        self.assertIn('autocomplete.js', str(ContractForm().media))
@@ -0,0 +1,102 @@
+import hmac
+
+from django.conf import settings
+from django.contrib.auth.mixins import PermissionRequiredMixin, UserPassesTestMixin
+from django.db.models import Q, QuerySet
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views import View
+from django.views.generic import TemplateView
+
+from .metrics import PROMETHEUS_CONTENT_TYPE, aggregator, render_prometheus
+from .slow_queries import read_slow_queries
+
+
+class AutocompleteView(PermissionRequiredMixin, View):
+    """
+    Базовый класс JSON-эндпоинта автодополнения для выбора связанной записи.
+
+    Возвращает не более page_size записей, у которых одно из полей
+    search_fields начинается с параметра q, упорядоченных по pk. Следующая
+    страница запрашивается параметром after со значением next из ответа.
+
+    В PostgreSQL для каждого поля search_fields модели нужен индекс поиска
+    по началу (см. get_prefix_index и AddSearchIndexes), иначе редкое
+    начало читает всю таблицу. Поля связанных моделей (например,
+    lead__last_name) по такому индексу не ищутся.
+    """
+
+    queryset = None
+    search_fields: tuple = ()
+    page_size = 20
+    read_only = True
+
+    def get_queryset(self) -> QuerySet:
+        """Метод возвращает записи, доступные для выбора."""
+        return self.queryset.all()
+
+    def get_label(self, obj) -> str:
+        """Метод возвращает текст варианта выбора."""
+        return str(obj)
+
+    def get(self, request, *args, **kwargs):
+        """Метод get возвращает страницу найденных записей в формате JSON."""
+        queryset = self.get_queryset().order_by('pk')
+        term = request.GET.get('q', '').strip()
+        if term:
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f'{field}__istartswith': term})
+            queryset = queryset.filter(condition)
+        after = request.GET.get('after', '')
+        if after.isdigit():
+            queryset = queryset.filter(pk__gt=int(after))
+
+        rows = list(queryset[:self.page_size + 1])
+        next_cursor = rows[self.page_size - 1].pk if len(rows) > self.page_size else None
+        return JsonResponse({
+            'results': [{'id': obj.pk, 'text': self.get_label(obj)}
+                        for obj in rows[:self.page_size]],
+            'next': next_cursor,
+        })
+
+
+class MetricsView(View):
+    """
+    Класс страницы замеров в текстовом формате Prometheus.
+
+    Замеры объединяются по всем процессам приложения (см. MetricsAggregator).
+    Страница доступна только с адресов METRICS_ALLOWED_IPS, а если задана
+    настройка METRICS_TOKEN — только с заголовком "Authorization: Bearer
+    <METRICS_TOKEN>". Для остальных запросов ее не существует.
+    """
+
+    def has_access(self, request) -> bool:
+        """Метод проверяет, доступна ли страница замеров запросу request."""
+        if settings.METRICS_TOKEN:
+            scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+            return (scheme.lower() == 'bearer'
+                    and hmac.compare_digest(token.strip(), settings.METRICS_TOKEN))
+        return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+    def get(self, request, *args, **kwargs):
+        """Метод get возвращает замеры всех процессов приложения."""
+        if not self.has_access(request):
+            raise Http404
+        return HttpResponse(render_prometheus(aggregator.collect()),
+                            content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class SlowQueryListView(UserPassesTestMixin, TemplateView):
+    """Класс страницы последних медленных запросов к базе данных (только для персонала)."""
+
+    template_name = 'core/slow-queries.html'
+    limit = 100
+
+    def test_func(self) -> bool:
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['queries'] = read_slow_queries(self.limit)
+        context['threshold'] = settings.SLOW_QUERY_THRESHOLD_MS
+        return context
@@ -0,0 +1,53 @@
+from typing import Optional
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.utils.http import urlencode
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Класс виджета выбора связанной записи через JSON-эндпоинт автодополнения.
+
+    В разметку попадает только выбранный вариант (и пустой), остальные
+    подгружаются скриптом autocomplete.js по мере ввода, поэтому
+    отрисовка формы не зависит от размера таблицы.
+    """
+
+    class Media:
+        js = ('autocomplete.js',)
+
+    def __init__(self, url_name: str, params: Optional[dict] = None, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.params = params or {}
+
+    def get_url(self) -> str:
+        """Метод возвращает адрес эндпоинта автодополнения."""
+        url = reverse(self.url_name)
+        return f'{url}?{urlencode(self.params)}' if self.params else url
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = self.get_url()
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """Метод строит варианты выбора только для выбранных значений."""
+        field = self.choices.field
+        options = []
+        if field.empty_label is not None:
+            options.append(self.create_option(name, '', field.empty_label, False, 0))
+
+        selected = [item for item in value if item not in field.empty_values]
+        if selected:
+            try:
+                objects = list(self.choices.queryset.filter(pk__in=selected))
+            except (ValidationError, ValueError, TypeError):
+                objects = []
+            for obj in objects:
+                option_value, label = self.choices.choice(obj)
+                options.append(self.create_option(name, option_value, label, True,
+                                                  len(options), attrs=attrs))
+        return [(None, options, 0)]
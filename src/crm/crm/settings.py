@@ -27,10 +27,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = str(os.getenv("SECRET_KEY"))
 
+# Settings profile: "development" (default) or "production".
+# The production profile turns off debug mode, keeps database connections open
+# between requests and stores the cache and sessions in a store shared by all
+# worker processes.
+CRM_PROFILE = os.getenv("CRM_PROFILE", "development")
+
+PRODUCTION = CRM_PROFILE == "production"
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host]
 
 
 # Application definition
@@ -42,7 +50,9 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
+    'crm.core.apps.CoreConfig',
     'crm.users.apps.UsersConfig',
     'crm.products.apps.ProductsConfig',
     'crm.ads.apps.AdsConfig',
@@ -52,11 +62,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'crm.core.middleware.RequestMetricsMiddleware',
+    'crm.core.middleware.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'crm.core.middleware.RequestProfilerMiddleware',
+    'crm.core.middleware.ReadReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,7 +81,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates/'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -75,10 +88,20 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
         },
     },
 ]
 
+if PRODUCTION:
+    # Compiled templates are kept in memory for the lifetime of the worker.
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', TEMPLATES[0]['OPTIONS']['loaders']),
+    ]
+
 WSGI_APPLICATION = 'crm.crm.wsgi.application'
 
 
@@ -96,9 +119,74 @@ DATABASES = {
         'OPTIONS': {
             'client_encoding': 'UTF8'
         },
+        'CONN_MAX_AGE': int(os.getenv("CONN_MAX_AGE") or (60 if PRODUCTION else 0)),
+        'CONN_HEALTH_CHECKS': PRODUCTION,
     }
 }
 
+# In-process connection pool (see crm/core/db/backends/postgresql_pool).
+# Connections are returned to the pool at the end of each request, so
+# CONN_MAX_AGE is not used together with it.
+if int(os.getenv("DB_POOL_SIZE") or 0):
+    DATABASES['default'].update({
+        'ENGINE': 'crm.core.db.backends.postgresql_pool',
+        'CONN_MAX_AGE': 0,
+    })
+    DATABASES['default']['OPTIONS']['POOL'] = {
+        'max_size': int(os.getenv("DB_POOL_SIZE")),
+        'timeout': float(os.getenv("DB_POOL_TIMEOUT") or 10),
+        'idle_timeout': float(os.getenv("DB_POOL_IDLE_TIMEOUT") or 300),
+    }
+
+# Read replica (see crm/core/routers.py). List, detail and statistics pages
+# read from it; a user who has just changed data keeps reading from the
+# primary database for READ_REPLICA_STICKY_SECONDS.
+DATABASE_ROUTERS = ['crm.core.routers.ReadReplicaRouter']
+READ_REPLICA_ALIAS = None
+READ_REPLICA_APPS = ('products', 'ads', 'leads', 'contracts', 'customers')
+READ_REPLICA_STICKY_COOKIE = 'crm_use_primary'
+READ_REPLICA_STICKY_SECONDS = int(os.getenv("READ_REPLICA_STICKY_SECONDS") or 10)
+if os.getenv("POSTGRESQL_REPLICA_HOST"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv("POSTGRESQL_REPLICA_NAME") or DATABASES['default']['NAME'],
+        'HOST': os.getenv("POSTGRESQL_REPLICA_HOST"),
+        'PORT': os.getenv("POSTGRESQL_REPLICA_PORT") or DATABASES['default']['PORT'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICA_ALIAS = 'replica'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+if os.getenv("REDIS_URL"):
+    # Requires the redis package (see requirements/production.txt).
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+elif PRODUCTION:
+    # The table is created by "django-admin createcachetable".
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'crm_cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+if PRODUCTION:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -161,3 +249,63 @@ LOGOUT_URL = reverse_lazy('crm.users:index')
 LOGIN_REDIRECT_URL = reverse_lazy('crm.users:index')
 
 LOGOUT_REDIRECT_URL = reverse_lazy('crm.users:index')
+
+# Per-request timings in the Server-Timing header (see crm/core/metrics.py).
+REQUEST_METRICS = os.getenv("REQUEST_METRICS", "") == "1"
+
+# Metrics of all worker processes are merged through per-process files in
+# METRICS_DIR; the directory should be emptied when the application starts.
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL") or 1)
+
+# Per-view histograms and cache ratios for /metrics are collected when
+# PROMETHEUS_METRICS=1 or METRICS_DIR is set, without the Server-Timing header.
+PROMETHEUS_METRICS = os.getenv("PROMETHEUS_METRICS", "") == "1" or bool(METRICS_DIR)
+
+# /metrics is served to the addresses in METRICS_ALLOWED_IPS, or, when
+# METRICS_TOKEN is set, only to requests with "Authorization: Bearer <token>".
+# Behind a reverse proxy on the same host every request comes from 127.0.0.1,
+# so the proxy must not forward /metrics (or a token must be set).
+METRICS_ALLOWED_IPS = [address.strip() for address in
+                       (os.getenv("METRICS_ALLOWED_IPS") or "127.0.0.1,::1").split(",")
+                       if address.strip()]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Slow-query log (see crm/core/slow_queries.py), disabled when the threshold
+# is 0. SELECT plans are captured with EXPLAIN (ANALYZE, BUFFERS), which runs
+# the slow query once more, so each query (normalized SQL) is explained at
+# most once per SLOW_QUERY_EXPLAIN_INTERVAL seconds.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS") or 0)
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL") or 300)
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG") or str(BASE_DIR / 'logs' / 'slow_queries.jsonl')
+SLOW_QUERY_LOG_MAX_BYTES = 5 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUP_COUNT = 3
+
+# Staff can profile any page with ?_profile=1 (?_profile=pstats downloads
+# the raw cProfile data); at most REQUEST_PROFILER_RATE requests a minute.
+REQUEST_PROFILER = os.getenv("REQUEST_PROFILER", "1") == "1"
+REQUEST_PROFILER_RATE = int(os.getenv("REQUEST_PROFILER_RATE") or 10)
+REQUEST_PROFILER_LIMIT = 40
+
+# Lead import from CSV/XLSX files (see crm/leads/importer.py). Rows are saved
+# in transactions of LEAD_IMPORT_BATCH_SIZE; reports of rejected rows are kept
+# in LEAD_IMPORT_REPORT_DIR, which is not served as media.
+LEAD_IMPORT_BATCH_SIZE = int(os.getenv("LEAD_IMPORT_BATCH_SIZE") or 1000)
+LEAD_IMPORT_REPORT_DIR = (os.getenv("LEAD_IMPORT_REPORT_DIR")
+                          or str(BASE_DIR / 'imports'))
+
+# Lead intake API (see crm/leads/intake.py). Accepted leads are buffered in
+# each worker and saved when LEAD_INTAKE_BUFFER_SIZE leads are waiting or the
+# oldest has waited LEAD_INTAKE_FLUSH_INTERVAL seconds; 0 saves them at once.
+LEAD_INTAKE_BUFFER_SIZE = int(os.getenv("LEAD_INTAKE_BUFFER_SIZE") or 500)
+LEAD_INTAKE_FLUSH_INTERVAL = float(os.getenv("LEAD_INTAKE_FLUSH_INTERVAL") or 0.5)
+LEAD_INTAKE_MAX_BATCH = 1000
+
+# Dashboard counters on the index page are cached for DASHBOARD_COUNTERS_TIMEOUT
+# seconds; with DASHBOARD_COUNTERS_APPROXIMATE the tables larger than the
+# threshold are counted from the planner statistics (see crm/users/service.py).
+DASHBOARD_COUNTERS_TIMEOUT = int(os.getenv("DASHBOARD_COUNTERS_TIMEOUT") or 30)
+DASHBOARD_COUNTERS_APPROXIMATE = os.getenv("DASHBOARD_COUNTERS_APPROXIMATE", "") == "1"
+DASHBOARD_COUNTERS_APPROXIMATE_THRESHOLD = int(
+    os.getenv("DASHBOARD_COUNTERS_APPROXIMATE_THRESHOLD") or 1000000)
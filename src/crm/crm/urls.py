@@ -19,6 +19,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 
+from ..core.views import MetricsView, SlowQueryListView
+from ..leads.views import LeadIntakeView
 from ..crm import settings
 
 urlpatterns = [
@@ -26,6 +28,9 @@ urlpatterns = [
     path('login/', auth_views.LoginView.as_view(
         template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('slow-queries/', SlowQueryListView.as_view(), name='slow_queries'),
+    path('api/leads/', LeadIntakeView.as_view(), name='lead_intake'),
     path('products/', include('crm.products.urls')),
     path('ads/', include('crm.ads.urls')),
     path('leads/', include('crm.leads.urls')),
@@ -3,16 +3,19 @@ from django import forms
 from .models import Customer
 from ..contracts.mixins import MixinLeadAdsForm
 from ..contracts.models import Contract
+from ..core.forms import BatchedModelChoiceField
+from ..core.widgets import AutocompleteSelect
 
 
 class CustomerForm(MixinLeadAdsForm):
     """Класс формы для создания или редактирования покупателя."""
 
-    contract = forms.ModelChoiceField(
-        queryset=Contract.objects.all(),
+    contract = BatchedModelChoiceField(
+        queryset=Contract.objects.select_related('lead', 'product'),
         empty_label="Контракт не выбран",
         required=False,
-        label='Контракт'
+        label='Контракт',
+        widget=AutocompleteSelect('crm.contracts:contracts_autocomplete'),
     )
 
     class Meta:
@@ -21,14 +24,35 @@ class CustomerForm(MixinLeadAdsForm):
 
     def clean_contract(self):
         """Метод проверяет соответствует ли выбранный контракт пользователю и компании"""
-        ads = self.cleaned_data['ads']
-        lead = self.cleaned_data['lead']
+        ads = self.cleaned_data.get('ads')
+        lead = self.cleaned_data.get('lead')
         contract = self.cleaned_data['contract']
         if contract is not None:
-            if lead.id != contract.lead.id:
+            if lead is not None and lead.id != contract.lead_id:
                 self.add_error('contract', 'Выбранный контракт не соответствует'
                                            ' выбранному пользователю')
-            if ads.id != contract.ads.id:
+            if ads is not None and ads.id != contract.ads_id:
                 self.add_error('contract', 'Выбранный контракт не соответствует'
                                            ' выбранной рекламной компании')
         return contract
+
+
+class CustomerUpdateForm(forms.ModelForm):
+    """
+    Класс формы для редактирования покупателя.
+
+    В отличие от CustomerForm позволяет выбрать клиента, уже переведенного в активные.
+    """
+
+    class Meta:
+        model = Customer
+        fields = '__all__'
+        widgets = {
+            'lead': AutocompleteSelect('crm.leads:leads_autocomplete'),
+            'ads': AutocompleteSelect('crm.ads:ads_autocomplete'),
+            'contract': AutocompleteSelect('crm.contracts:contracts_autocomplete'),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['contract'].queryset = Contract.objects.select_related('lead', 'product')
@@ -5,6 +5,8 @@ from django.test import TestCase
 from django.urls import reverse
 from django.urls import reverse_lazy
 
+from crm.core.metrics import aggregator
+from crm.core.testing import PerformanceBudgetMixin, performance_budget
 from crm.customers.forms import CustomerForm
 from crm.customers.models import Customer
 from crm.customers.tests.test_models import CustomerModelMixinTest
@@ -12,7 +14,7 @@ from crm.customers.tests.test_models import CustomerModelMixinTest
 User = get_user_model()
 
 
-class CustomerMixinViewTest(CustomerModelMixinTest, TestCase):
+class CustomerMixinViewTest(PerformanceBudgetMixin, CustomerModelMixinTest, TestCase):
     """Миксин для тестов классов ContractView."""
 
     @classmethod
@@ -32,6 +34,7 @@ class CustomerCreateViewTest(CustomerMixinViewTest, TestCase):
         self.user.user_permissions.add(*self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_url(self):
         """
         Тест проверяет, что после успешного создания
@@ -51,6 +54,15 @@ class CustomerCreateViewTest(CustomerMixinViewTest, TestCase):
         self.assertEqual(Customer.objects.count(), customer_count + 1)
         self.assertRedirects(response, reverse_lazy('crm.customers:customers_list'))
 
+    def test_conversion_counted(self):
+        """Тест проверяет, что создание покупателя учитывается в счетчике конверсий лидов."""
+        converted = aggregator.snapshot()['counters'].get('leads_converted', 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('crm.customers:customer_create'),
+                             data={'lead': self.lead.pk, 'ads': self.ads.pk,
+                                   'contract': self.contract.pk, 'comment': '2222'})
+        self.assertEqual(aggregator.snapshot()['counters']['leads_converted'], converted + 1)
+
     def test_form_class(self):
         """Тест проверяет, что используется форма на основе класса CustomerForm."""
         response = self.client.get(reverse('crm.customers:customer_create'))
@@ -62,6 +74,7 @@ class CustomerCreateViewTest(CustomerMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.customers:customer_create'))
         self.assertTemplateUsed(response, 'customers/customers-create.html')
 
+    @performance_budget
     def test_with_permission_add_customer(self):
         """
         Тест проверяет, что с разрешением add_customer
@@ -86,6 +99,7 @@ class CustomerListViewTest(CustomerMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_count_customer_in_list(self):
         """Тест проверяет, что список покупателей содержит 1 элемент."""
         response = self.client.get(reverse_lazy('crm.customers:customers_list'))
@@ -96,6 +110,7 @@ class CustomerListViewTest(CustomerMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.customers:customers_list'))
         self.assertTemplateUsed(response, 'customers/customers-list.html')
 
+    @performance_budget
     def test_with_permission_view_customer(self):
         """
         Тест проверяет, что с разрешением view_customer
@@ -126,6 +141,7 @@ class CustomerDetailViewTest(CustomerMixinViewTest, TestCase):
                                            kwargs={'pk': self.customer.pk}))
         self.assertTemplateUsed(response, 'customers/customers-detail.html')
 
+    @performance_budget
     def test_with_permission_view_customer(self):
         """
         Тест проверяет, что с разрешением view_customer
@@ -156,6 +172,7 @@ class CustomerUpdateViewTest(CustomerMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_update_contract(self):
         """
         Тест проверяет, что после успешного обновления данных
@@ -186,6 +203,7 @@ class CustomerUpdateViewTest(CustomerMixinViewTest, TestCase):
                                            kwargs={'pk': self.customer.pk}))
         self.assertTemplateUsed(response, 'customers/customers-edit.html')
 
+    @performance_budget
     def test_with_permission_change_customer(self):
         """
         Тест проверяет, что с разрешением change_customer
@@ -212,6 +230,7 @@ class CustomerDeleteViewTest(CustomerMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_delete_customer(self):
         """
         Тест проверяет, что после успешного удаления покупателя
@@ -231,6 +250,7 @@ class CustomerDeleteViewTest(CustomerMixinViewTest, TestCase):
                                            kwargs={'pk': self.customer.pk}))
         self.assertTemplateUsed(response, 'customers/customers-delete.html')
 
+    @performance_budget
     def test_with_permission_delete_customer(self):
         """
         Тест проверяет, что с разрешением delete_customer
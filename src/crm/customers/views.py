@@ -5,16 +5,19 @@ from django.urls import reverse_lazy
 from django.views import View
 from django.views.generic import ListView, UpdateView, DetailView, DeleteView
 
-from .forms import CustomerForm
+from .forms import CustomerForm, CustomerUpdateForm
 from .models import Customer
 from ..contracts.views import get_data_for_form
+from ..core.metrics import count_event
+from ..core.mixins import KeysetPaginationMixin
 
 
-class CustomerListView(PermissionRequiredMixin, ListView):
+class CustomerListView(PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     """Класс для отображения списка покупателей."""
 
     permission_required = "customers.view_customer"
-    model = Customer
+    queryset = (Customer.objects.select_related('lead')
+                .only('lead__first_name', 'lead__last_name'))
     template_name = 'customers/customers-list.html'
     context_object_name = 'customers'
 
@@ -23,7 +26,7 @@ class CustomerDetailView(PermissionRequiredMixin, DetailView):
     """Класс для детального отображения покупателя."""
 
     permission_required = "customers.view_customer"
-    model = Customer
+    queryset = Customer.objects.select_related('lead')
     template_name = 'customers/customers-detail.html'
 
 
@@ -36,11 +39,11 @@ class CustomerCreateView(PermissionRequiredMixin, View):
 
     def get(self, request):
         """
-        Метод get проверяет есть ли в кэше параметр lead_id:
-        если есть, то выдает форму с предзаполнеными данными,
+        Метод get проверяет передан ли в запросе параметр lead_id:
+        если передан, то выдает форму с предзаполнеными данными,
         иначе выдает пустую.
         """
-        dict_data_for_form = get_data_for_form()
+        dict_data_for_form = get_data_for_form(request)
         if dict_data_for_form is not None:
             form = CustomerForm(data=dict_data_for_form)
         else:
@@ -58,6 +61,7 @@ class CustomerCreateView(PermissionRequiredMixin, View):
                 lead.to_active = True
                 lead.save()
                 form.save()
+                transaction.on_commit(lambda: count_event('leads_converted'))
                 return redirect(self.success_url)
 
         return render(request, self.template_name, {'form': form})
@@ -68,8 +72,8 @@ class CustomerUpdateView(PermissionRequiredMixin, UpdateView):
 
     permission_required = "customers.change_customer"
     model = Customer
+    form_class = CustomerUpdateForm
     template_name = 'customers/customers-edit.html'
-    fields = '__all__'
     success_url = reverse_lazy('crm.customers:customers_list')
 
 
@@ -77,6 +81,6 @@ class CustomerDeleteView(PermissionRequiredMixin, DeleteView):
     """Класс для удаления покупателя."""
 
     permission_required = "customers.delete_customer"
-    model = Customer
+    queryset = Customer.objects.select_related('lead')
     template_name = 'customers/customers-delete.html'
     success_url = reverse_lazy('crm.customers:customers_list')
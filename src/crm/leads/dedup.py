@@ -0,0 +1,218 @@
+import itertools
+from typing import Iterable, Iterator, NamedTuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Lower
+
+from .models import Lead, LeadDuplicate
+from ..contracts.models import Contract
+from ..customers.models import Customer
+
+# Веса в оценке сходства пары: совпадение телефона или почты, совпадение
+# обоих, частичное совпадение контакта (последние PHONE_TAIL_LENGTH цифр
+# телефона или имя ящика на другом домене) и сходство имен (от 0 до 1).
+# Одно имя без общего контакта порог не проходит.
+CONTACT_WEIGHT = 0.4
+BOTH_CONTACTS_WEIGHT = 0.1
+PARTIAL_CONTACT_WEIGHT = 0.2
+NAME_WEIGHT = 0.5
+
+PHONE_TAIL_LENGTH = 7
+
+# Пары с оценкой не ниже порога попадают в очередь на проверку. Общий телефон
+# с непохожим именем (например, у членов семьи) порог не проходит.
+DEFAULT_THRESHOLD = 0.65
+
+# Блоки больше этого размера (например, "Иван Иванов" или телефон-заглушка)
+# не сравниваются: совпадение такого ключа не говорит о дубле, а число пар растет квадратично.
+DEFAULT_MAX_BLOCK = 50
+
+# Ключи блоков (поле Candidate и выражение в базе) в порядке проверки: пара,
+# совпавшая по более раннему ключу, в следующих блоках не сравнивается повторно.
+BLOCKING_KEYS = (
+    ('phone', F('phone_normalized')),
+    ('email', Lower('email')),
+    ('name_key', F('name_key')),
+)
+
+
+class Candidate(NamedTuple):
+    """Класс признаков потенциального клиента для сравнения."""
+
+    pk: int
+    phone: str
+    email: str
+    name_key: str
+    trigrams: frozenset
+
+    @classmethod
+    def from_row(cls, pk: int, phone: str, email: str, name_key: str) -> 'Candidate':
+        """Метод создает признаки по значениям полей лида."""
+        return cls(pk, phone, email.strip().lower(), name_key, get_trigrams(name_key))
+
+
+def get_trigrams(text: str) -> frozenset:
+    """
+    Функция возвращает множество триграмм строки как в pg_trgm: каждое
+    слово дополняется двумя пробелами в начале и одним в конце.
+    """
+    trigrams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        trigrams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return frozenset(trigrams)
+
+
+def score_pair(first: Candidate, second: Candidate) -> tuple:
+    """
+    Функция возвращает оценку сходства двух лидов от 0 до 1 и список
+    совпадений. Имена сравниваются коэффициентом Жаккара их триграмм.
+    """
+    reasons = []
+    if first.phone and first.phone == second.phone:
+        reasons.append('phone')
+    if first.email and first.email == second.email:
+        reasons.append('email')
+    score = CONTACT_WEIGHT if reasons else 0.0
+    if len(reasons) == 2:
+        score += BOTH_CONTACTS_WEIGHT
+    if not reasons:
+        if first.phone and first.phone[-PHONE_TAIL_LENGTH:] == second.phone[-PHONE_TAIL_LENGTH:]:
+            reasons.append('phone_tail')
+        if first.email and first.email.partition('@')[0] == second.email.partition('@')[0]:
+            reasons.append('email_login')
+        score = PARTIAL_CONTACT_WEIGHT if reasons else 0.0
+    if first.trigrams and second.trigrams:
+        similarity = (len(first.trigrams & second.trigrams)
+                      / len(first.trigrams | second.trigrams))
+        score += NAME_WEIGHT * similarity
+        if similarity >= 0.5:
+            reasons.append('name')
+    return round(score, 3), reasons
+
+
+def score_block(kind: str, block: list, threshold: float) -> Iterator[LeadDuplicate]:
+    """
+    Функция сравнивает все пары блока block (лиды с общим ключом kind) и
+    возвращает предложения для пар с оценкой не ниже threshold. Пары,
+    совпавшие по ключу, который проверяется раньше kind, пропускаются.
+    """
+    kinds = [name for name, _ in BLOCKING_KEYS]
+    earlier = kinds[:kinds.index(kind)]
+    for first, second in itertools.combinations(block, 2):
+        if any(getattr(first, name) and getattr(first, name) == getattr(second, name)
+               for name in earlier):
+            continue
+        score, reasons = score_pair(first, second)
+        if score >= threshold:
+            lead, duplicate = sorted((first.pk, second.pk))
+            yield LeadDuplicate(lead_id=lead, duplicate_id=duplicate, score=score,
+                                reasons=','.join(reasons))
+
+
+def iter_blocks(kind: str, expression, max_block: int,
+                chunk_size: int = 2000) -> Iterator[list]:
+    """
+    Функция возвращает блоки лидов с одинаковым ключом kind. Ключи, которые
+    встречаются от 2 до max_block раз, выбираются группировкой в базе, а лиды
+    читаются одним упорядоченным по ключу потоком (iterator), поэтому в
+    памяти находится только текущий блок.
+    """
+    keys = (Lead.objects.annotate(key=expression).exclude(key='').values('key')
+            .annotate(size=Count('pk')).filter(size__gt=1, size__lte=max_block).values('key'))
+    rows = (Lead.objects.annotate(key=expression).filter(key__in=keys).order_by('key', 'pk')
+            .values_list('key', 'pk', 'phone_normalized', 'email', 'name_key')
+            .iterator(chunk_size=chunk_size))
+    for _, group in itertools.groupby(rows, key=lambda row: row[0]):
+        yield [Candidate.from_row(*row[1:]) for row in group]
+
+
+def save_duplicates(duplicates: Iterable[LeadDuplicate]) -> int:
+    """Функция сохраняет предложения, пропуская уже известные пары, и возвращает их число."""
+    duplicates = list(duplicates)
+    LeadDuplicate.objects.bulk_create(duplicates, ignore_conflicts=True)
+    return len(duplicates)
+
+
+def find_lead_duplicates(threshold: float = DEFAULT_THRESHOLD,
+                         max_block: int = DEFAULT_MAX_BLOCK, batch_size: int = 1000) -> dict:
+    """
+    Функция ищет дубли среди всех потенциальных клиентов и записывает
+    предложения объединения в очередь LeadDuplicate пачками по batch_size.
+    Возвращает число сравненных блоков и пар и найденных предложений.
+    """
+    result = {'blocks': 0, 'pairs': 0, 'duplicates': 0}
+    batch = []
+    for kind, expression in BLOCKING_KEYS:
+        for block in iter_blocks(kind, expression, max_block):
+            result['blocks'] += 1
+            result['pairs'] += len(block) * (len(block) - 1) // 2
+            batch.extend(score_block(kind, block, threshold))
+            if len(batch) >= batch_size:
+                result['duplicates'] += save_duplicates(batch)
+                batch = []
+    result['duplicates'] += save_duplicates(batch)
+    return result
+
+
+def check_lead(lead: Lead, threshold: float = DEFAULT_THRESHOLD,
+               max_block: int = DEFAULT_MAX_BLOCK) -> list:
+    """
+    Функция ищет дубли одного лида по тем же индексам (телефон, почта, ключ
+    имени), записывает предложения в очередь и возвращает их. Как и в
+    find_lead_duplicates, ключ имени, который встречается чаще max_block
+    раз, не учитывается.
+    """
+    fields = ('pk', 'phone_normalized', 'email', 'name_key')
+    queryset = Lead.objects.exclude(pk=lead.pk)
+    condition = Q(pk__in=[])
+    if lead.phone_normalized:
+        condition |= Q(phone_normalized=lead.phone_normalized)
+    if lead.email:
+        condition |= Q(email_lower=lead.email.strip().lower())
+    rows = {row[0]: row for row in queryset.alias(email_lower=Lower('email')).filter(condition)
+            .values_list(*fields)[:max_block]}
+    if lead.name_key:
+        namesakes = list(queryset.filter(name_key=lead.name_key).values_list(*fields)[:max_block])
+        if len(namesakes) < max_block:
+            rows.update((row[0], row) for row in namesakes)
+    candidate = Candidate.from_row(lead.pk, lead.phone_normalized, lead.email, lead.name_key)
+    duplicates = []
+    for row in rows.values():
+        score, reasons = score_pair(candidate, Candidate.from_row(*row))
+        if score >= threshold:
+            first, second = sorted((lead.pk, row[0]))
+            duplicates.append(LeadDuplicate(lead_id=first, duplicate_id=second, score=score,
+                                            reasons=','.join(reasons)))
+    save_duplicates(duplicates)
+    return duplicates
+
+
+def merge_leads(suggestion: LeadDuplicate) -> bool:
+    """
+    Функция объединяет пару предложения suggestion: контракты и покупатели
+    более позднего лида переходят к более раннему, пустые поля раннего
+    заполняются значениями позднего, поздний лид удаляется (счетчики его
+    кампании уменьшаются сигналами).
+
+    Оба лида перечитываются с блокировкой строк (в порядке pk, чтобы
+    встречные объединения не взаимоблокировались), поэтому одновременное
+    объединение пересекающихся пар выполняется по очереди. Возвращает
+    False, если один из лидов уже удален (например, другим объединением).
+    """
+    with transaction.atomic():
+        leads = Lead.objects.select_for_update().filter(
+            pk__in=(suggestion.lead_id, suggestion.duplicate_id)).order_by('pk').in_bulk()
+        lead, duplicate = leads.get(suggestion.lead_id), leads.get(suggestion.duplicate_id)
+        if lead is None or duplicate is None:
+            return False
+        Contract.objects.filter(lead=duplicate).update(lead=lead)
+        Customer.objects.filter(lead=duplicate).update(lead=lead)
+        lead.email = lead.email or duplicate.email
+        lead.comment = '\n'.join(comment for comment in (lead.comment, duplicate.comment)
+                                 if comment)
+        lead.to_active = lead.to_active or duplicate.to_active
+        lead.save(update_fields=['email', 'comment', 'to_active'])
+        duplicate.delete()
+    return True
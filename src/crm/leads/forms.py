@@ -1,6 +1,8 @@
 from django import forms
 
 from .models import Lead
+from ..ads.models import Ads
+from ..core.widgets import AutocompleteSelect
 
 
 class LeadForm(forms.ModelForm):
@@ -9,9 +11,28 @@ class LeadForm(forms.ModelForm):
     class Meta:
         model = Lead
         fields = '__all__'
+        widgets = {'ads': AutocompleteSelect('crm.ads:ads_autocomplete')}
 
     phone = forms.CharField(
         widget=forms.TextInput(attrs={'placeholder': '+7 (___) ___-__-__', 'id': 'phone'}),
         label='Телефон',
         required=True,
     )
+
+
+class LeadImportForm(forms.Form):
+    """Класс формы импорта потенциальных клиентов из файла CSV или XLSX."""
+
+    file = forms.FileField(label='Файл CSV или XLSX')
+    ads = forms.ModelChoiceField(
+        queryset=Ads.objects.all(),
+        required=False,
+        label='Рекламная кампания',
+        help_text='Для строк без столбца или значения кампании',
+        widget=AutocompleteSelect('crm.ads:ads_autocomplete'),
+    )
+    encoding = forms.ChoiceField(
+        choices=(('utf-8-sig', 'UTF-8'), ('cp1251', 'Windows-1251')),
+        initial='utf-8-sig',
+        label='Кодировка CSV',
+    )
@@ -0,0 +1,227 @@
+import csv
+import io
+import os
+import re
+import zipfile
+from collections import Counter
+from typing import Iterator, Optional, TextIO
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Lead
+from ..ads.models import Ads
+from ..ads.service import increment_campaign_stats
+
+FIELDS = ('first_name', 'last_name', 'email', 'phone', 'ads', 'comment')
+
+REQUIRED_FIELDS = ('first_name', 'last_name', 'phone')
+
+# Поля лида, которые проверяются полями модели Lead (кампания проверяется отдельно).
+LEAD_FIELDS = ('first_name', 'last_name', 'email', 'phone', 'comment')
+
+# Заголовки столбцов файла (без учета регистра) для каждого поля лида.
+COLUMN_ALIASES = {
+    'first_name': ('first_name', 'имя'),
+    'last_name': ('last_name', 'фамилия'),
+    'email': ('email', 'e-mail', 'почта'),
+    'phone': ('phone', 'телефон'),
+    'ads': ('ads', 'ads_id', 'кампания', 'рекламная кампания'),
+    'comment': ('comment', 'комментарий'),
+}
+
+PHONE_SEPARATORS = re.compile(r'[\s()\-.]')
+
+REQUIRED_MESSAGE = 'This field is required.'
+
+# Размер фрагмента (в символах), которыми CSV-файл проверяется на кодировку.
+DECODE_CHUNK_SIZE = 1 << 20
+
+
+class LeadImportError(Exception):
+    """Исключение для файла, который нельзя импортировать целиком."""
+
+
+def iter_csv(file, encoding: str = 'utf-8-sig') -> Iterator[list]:
+    """
+    Функция построчно читает CSV-файл (бинарный поток file) и возвращает
+    списки значений. Разделитель (запятая, точка с запятой или табуляция)
+    определяется по началу файла.
+
+    Перед чтением строк файл целиком проверяется на соответствие кодировке
+    encoding: ошибка в середине файла иначе прервала бы импорт, когда
+    первые пачки лидов уже сохранены.
+    """
+    text = io.TextIOWrapper(file, encoding=encoding, newline='')
+    try:
+        while text.read(DECODE_CHUNK_SIZE):
+            pass
+        text.seek(0)
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(text, dialect)
+    except UnicodeDecodeError as error:
+        raise LeadImportError(f'The file is not in the {encoding} encoding') from error
+    finally:
+        text.detach()
+
+
+def iter_xlsx(file) -> Iterator[list]:
+    """Функция построчно читает первый лист файла XLSX без загрузки его в память целиком."""
+    try:
+        # pylint: disable=import-outside-toplevel
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError as error:
+        raise LeadImportError('XLSX import requires the openpyxl package') from error
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as error:
+        raise LeadImportError('The file is not a valid XLSX workbook') from error
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else
+                   str(int(value)) if isinstance(value, float) and value.is_integer() else
+                   str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def read_table(file, name: str, encoding: str = 'utf-8-sig') -> Iterator[list]:
+    """Функция выбирает способ чтения файла file по расширению имени name."""
+    extension = os.path.splitext(name)[1].lower()
+    if extension == '.xlsx':
+        return iter_xlsx(file)
+    if extension in ('.csv', '.txt'):
+        return iter_csv(file, encoding)
+    raise LeadImportError('Only CSV and XLSX files can be imported')
+
+
+def clean_lead(values: dict, ads_id: Optional[int]) -> tuple:
+    """
+    Функция проверяет значения полей лида values (строки) полями модели Lead
+    (обязательность, длина, валидаторы) и возвращает (лид кампании ads_id
+    или None, список ошибок). Разделители в номере телефона (пробелы,
+    скобки, дефисы) отбрасываются.
+    """
+    values = {**values, 'phone': PHONE_SEPARATORS.sub('', values['phone'])}
+    cleaned, errors = {}, []
+    for name in LEAD_FIELDS:
+        if name in REQUIRED_FIELDS and not values[name]:
+            errors.append(f'{name}: {REQUIRED_MESSAGE}')
+            continue
+        try:
+            cleaned[name] = Lead._meta.get_field(name).clean(values[name], None)
+        except ValidationError as error:
+            errors.extend(f'{name}: {message}' for message in error.messages)
+    if errors:
+        return None, errors
+    return Lead(ads_id=ads_id, **cleaned), errors
+
+
+def save_leads(leads: list):
+    """Функция сохраняет пачку лидов и увеличивает счетчики их кампаний в одной транзакции."""
+    with transaction.atomic():
+        Lead.objects.bulk_create(leads)
+        for ads_id, count in Counter(lead.ads_id for lead in leads).items():
+            increment_campaign_stats(ads_id, leads_count=count)
+
+
+class LeadImporter:
+    """
+    Класс импорта потенциальных клиентов из таблицы (см. read_table).
+
+    Строки проверяются валидаторами модели Lead, рекламная кампания
+    определяется по номеру или уникальному названию через словарь,
+    загруженный одним запросом. Корректные строки сохраняются через
+    bulk_create пачками по batch_size, каждая пачка вместе с увеличением
+    счетчиков CampaignStats — в отдельной транзакции. Ошибочные строки
+    записываются в CSV-отчет, поэтому память не зависит от размера файла.
+    """
+
+    def __init__(self, default_ads_id: Optional[int] = None, batch_size: int = 1000):
+        self.default_ads_id = default_ads_id
+        self.batch_size = batch_size
+        self.ads_ids = {}
+        names = Counter()
+        for pk, name in Ads.objects.values_list('pk', 'name'):
+            self.ads_ids[str(pk)] = pk
+            names[name.casefold()] += 1
+            self.ads_ids.setdefault(name.casefold(), pk)
+        self.ambiguous = {name for name, count in names.items() if count > 1}
+
+    def get_columns(self, header: list) -> dict:
+        """Метод возвращает номера столбцов полей лида по строке заголовков."""
+        positions = {value.strip().casefold(): index for index, value in enumerate(header)}
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in positions:
+                    columns[field] = positions[alias]
+                    break
+        required = REQUIRED_FIELDS if self.default_ads_id else REQUIRED_FIELDS + ('ads',)
+        missing = [field for field in required if field not in columns]
+        if missing:
+            raise LeadImportError(f'Missing columns: {", ".join(missing)}')
+        return columns
+
+    def clean(self, values: dict) -> tuple:
+        """Метод проверяет значения строки и возвращает (лид или None, список ошибок)."""
+        errors = []
+        ads_id = self.default_ads_id
+        if values['ads']:
+            key = values['ads'].casefold()
+            ads_id = self.ads_ids.get(key)
+            if key in self.ambiguous:
+                errors.append(f'ads: Several campaigns are named "{values["ads"]}".')
+            elif ads_id is None:
+                errors.append(f'ads: Campaign "{values["ads"]}" does not exist.')
+        elif ads_id is None:
+            errors.append(f'ads: {REQUIRED_MESSAGE}')
+        lead, lead_errors = clean_lead(values, ads_id)
+        errors = lead_errors + errors
+        return (None if errors else lead), errors
+
+    def run(self, table: Iterator[list], report: Optional[TextIO] = None) -> dict:
+        """
+        Метод импортирует строки таблицы table (первая строка — заголовки) и
+        возвращает число строк, сохраненных лидов и ошибочных строк. Ошибочные
+        строки с номером строки файла и текстом ошибок пишутся в report.
+        """
+        header = next(table, None)
+        if header is None:
+            raise LeadImportError('The file is empty')
+        columns = self.get_columns(header)
+        writer = csv.writer(report) if report is not None else None
+        if writer:
+            writer.writerow(('line',) + FIELDS + ('errors',))
+
+        result = {'rows': 0, 'imported': 0, 'errors': 0}
+        batch = []
+        for line, row in enumerate(table, start=2):
+            if not any(value.strip() for value in row):
+                continue
+            result['rows'] += 1
+            values = {field: row[columns[field]].strip()
+                      if field in columns and columns[field] < len(row) else ''
+                      for field in FIELDS}
+            lead, errors = self.clean(values)
+            if lead is None:
+                result['errors'] += 1
+                if writer:
+                    writer.writerow((line,) + tuple(values[field] for field in FIELDS)
+                                    + ('; '.join(errors),))
+                continue
+            batch.append(lead)
+            if len(batch) >= self.batch_size:
+                save_leads(batch)
+                result['imported'] += len(batch)
+                batch = []
+        if batch:
+            save_leads(batch)
+            result['imported'] += len(batch)
+        return result
@@ -0,0 +1,234 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import (DatabaseError, InterfaceError, OperationalError, close_old_connections,
+                       connection, transaction)
+from django.utils import timezone
+
+from .importer import clean_lead, save_leads
+from .models import IntakeKey, IntakeToken
+
+logger = logging.getLogger(__name__)
+
+INTAKE_FIELDS = ('first_name', 'last_name', 'email', 'phone', 'comment')
+
+# Ключи доступа кэшируются в процессе: отзыв ключа действует не позже чем через это время.
+TOKEN_CACHE_SECONDS = 60
+
+# Наибольшее число ключей в кэше процесса; давно не использованные вытесняются.
+TOKEN_CACHE_SIZE = 1000
+
+# Кэшируются только действующие ключи: хэш ключа -> (кампания, срок), от
+# давно использованного к недавно использованному.
+_tokens = OrderedDict()
+_tokens_lock = threading.Lock()
+
+
+def authenticate(request) -> Optional[int]:
+    """
+    Функция проверяет ключ из заголовка "Authorization: Bearer <ключ>" и
+    возвращает номер рекламной кампании ключа или None.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    token_hash = IntakeToken.hash_token(token.strip())
+    with _tokens_lock:
+        cached = _tokens.get(token_hash)
+        if cached is not None:
+            if cached[1] > time.monotonic():
+                _tokens.move_to_end(token_hash)
+                return cached[0]
+            del _tokens[token_hash]
+    ads_id = (IntakeToken.objects.filter(token_hash=token_hash, is_active=True)
+              .values_list('ads_id', flat=True).first())
+    if ads_id is not None:
+        with _tokens_lock:
+            now = time.monotonic()
+            for expired in [key for key, (_, expires) in _tokens.items() if expires <= now]:
+                del _tokens[expired]
+            _tokens[token_hash] = (ads_id, now + TOKEN_CACHE_SECONDS)
+            _tokens.move_to_end(token_hash)
+            while len(_tokens) > TOKEN_CACHE_SIZE:
+                _tokens.popitem(last=False)
+    return ads_id
+
+
+def clean_item(item, ads_id: int) -> tuple:
+    """Функция проверяет один лид из JSON и возвращает (лид или None, список ошибок)."""
+    if not isinstance(item, dict):
+        return None, ['A lead must be a JSON object.']
+    values = {field: str(item.get(field) or '').strip() for field in INTAKE_FIELDS}
+    return clean_lead(values, ads_id)
+
+
+def claim_keys(keys: list) -> set:
+    """
+    Функция сохраняет ключи идемпотентности и возвращает те из них, которых
+    еще не было. Используется INSERT ... ON CONFLICT DO NOTHING RETURNING,
+    поэтому при одновременной записи одного ключа несколькими процессами
+    его получает ровно один.
+    """
+    table = connection.ops.quote_name(IntakeKey._meta.db_table)
+    column = connection.ops.quote_name('key')
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    claimed = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start:start + 1000]
+            values = ', '.join(['(%s, %s)'] * len(chunk))
+            cursor.execute(f'INSERT INTO {table} ({column}, created_at) VALUES {values} '
+                           f'ON CONFLICT ({column}) DO NOTHING RETURNING {column}',
+                           [param for key in chunk for param in (key, created_at)])
+            claimed.update(row[0] for row in cursor.fetchall())
+    return claimed
+
+
+def find_known_keys(keys: Iterable[str]) -> set:
+    """Функция возвращает ключи из keys, уже сохраненные в базе."""
+    keys = list(keys)
+    if not keys:
+        return set()
+    return set(IntakeKey.objects.filter(key__in=keys).values_list('key', flat=True))
+
+
+def save_intake(entries: list) -> int:
+    """
+    Функция сохраняет пары (ключ идемпотентности или None, лид) и
+    возвращает число сохраненных лидов. Лиды, ключи которых уже заняты,
+    пропускаются.
+    """
+    with transaction.atomic():
+        claimed = claim_keys([key for key, _ in entries if key is not None])
+        leads = [lead for key, lead in entries if key is None or key in claimed]
+        if leads:
+            save_leads(leads)
+    return len(leads)
+
+
+class LeadIntakeBuffer:
+    """
+    Класс буфера принятых лидов процесса.
+
+    Лиды накапливаются в памяти и сохраняются одной транзакцией (см.
+    save_intake), когда их набирается LEAD_INTAKE_BUFFER_SIZE или самый
+    старый ждет дольше LEAD_INTAKE_FLUSH_INTERVAL секунд; второе условие
+    проверяет фоновый поток. При нулевом LEAD_INTAKE_BUFFER_SIZE лиды
+    сохраняются сразу. Ошибка соединения с базой возвращает лиды в буфер.
+    Пачка, которую нельзя сохранить из-за данных (например, удалена
+    кампания), делится пополам, пока ошибочные лиды не останутся по
+    одному: отбрасываются только они.
+    """
+
+    def __init__(self, background: bool = True):
+        self.background = background
+        self._lock = threading.Lock()
+        self._entries = []
+        self._keys = set()
+        self._oldest = None
+        self._pid = os.getpid()
+        self._flusher = None
+
+    def pending_keys(self, keys: Iterable[str]) -> set:
+        """Метод возвращает ключи из keys, лиды которых ждут сохранения в буфере."""
+        with self._lock:
+            self._check_pid()
+            return self._keys.intersection(keys)
+
+    def add(self, entries: list):
+        """Метод добавляет пары (ключ идемпотентности или None, лид) в буфер."""
+        if settings.LEAD_INTAKE_BUFFER_SIZE <= 0:
+            save_intake(entries)
+            return
+        with self._lock:
+            self._check_pid()
+            self._entries.extend(entries)
+            self._keys.update(key for key, _ in entries if key is not None)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._entries) >= settings.LEAD_INTAKE_BUFFER_SIZE
+        if self.background:
+            self._start_flusher()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Метод сохраняет все лиды буфера и возвращает число сохраненных."""
+        with self._lock:
+            self._check_pid()
+            entries, self._entries = self._entries, []
+            self._keys = set()
+            self._oldest = None
+        if not entries:
+            return 0
+        saved = 0
+        chunks = [entries]
+        while chunks:
+            chunk = chunks.pop()
+            try:
+                saved += save_intake(chunk)
+            except (OperationalError, InterfaceError):
+                remaining = chunk + [entry for rest in reversed(chunks) for entry in rest]
+                logger.exception('Could not save %d intake leads, will retry', len(remaining))
+                self._requeue(remaining)
+                break
+            except DatabaseError:
+                if len(chunk) == 1:
+                    logger.exception('Dropped intake lead "%s" (idempotency key %s) that '
+                                     'could not be saved', chunk[0][1], chunk[0][0])
+                    continue
+                middle = len(chunk) // 2
+                chunks.extend((chunk[middle:], chunk[:middle]))
+        return saved
+
+    def _requeue(self, entries: list):
+        """Метод возвращает несохраненные пары entries в начало буфера."""
+        with self._lock:
+            self._entries[:0] = entries
+            self._keys.update(key for key, _ in entries if key is not None)
+            self._oldest = self._oldest or time.monotonic()
+
+    def flush_if_due(self) -> int:
+        """Метод сохраняет лиды буфера, если самый старый ждет дольше интервала сохранения."""
+        oldest = self._oldest
+        if oldest is None or time.monotonic() - oldest < settings.LEAD_INTAKE_FLUSH_INTERVAL:
+            return 0
+        return self.flush()
+
+    def _start_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            if self._flusher is None:
+                atexit.register(self.flush)
+            self._flusher = threading.Thread(target=self._run_flusher, name='lead-intake-flusher',
+                                             daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(max(settings.LEAD_INTAKE_FLUSH_INTERVAL / 4, 0.01))
+            try:
+                self.flush_if_due()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception('Lead intake flush failed')
+            finally:
+                close_old_connections()
+
+    def _check_pid(self):
+        """Метод очищает буфер, унаследованный от родительского процесса при fork."""
+        if self._pid != os.getpid():
+            self._entries, self._keys, self._oldest = [], set(), None
+            self._pid = os.getpid()
+            self._flusher = None
+
+
+intake_buffer = LeadIntakeBuffer()
@@ -0,0 +1,134 @@
+import json
+import secrets
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+
+from ...models import IntakeKey, IntakeToken, Lead
+from ....ads.models import Ads, CampaignStats
+from ....core.management.commands.benchmark_load import _Server
+from ....products.models import Product
+
+FIRST_NAMES = ('Иван', 'Петр', 'Анна', 'Мария', 'Olga', 'John')
+
+
+class Command(BaseCommand):
+    """
+    Команда нагружает эндпоинт приема лидов (см. LeadIntakeView).
+
+    Сервер запускается в отдельном процессе, несколько потоков-клиентов
+    отправляют пачки лидов с уникальными ключами идемпотентности, часть
+    запросов повторяется целиком, как при обрыве соединения. После
+    остановки сервера проверяется, что каждый лид сохранен ровно один раз
+    и счетчик лидов кампании совпадает с их числом. Временная кампания и
+    ее лиды удаляются.
+    """
+
+    help = 'Load test of the lead intake API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=100_000)
+        parser.add_argument('--batch', type=int, default=100, help='Leads per request')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--retry-share', type=float, default=0.1,
+                            help='Share of requests that are sent twice')
+        parser.add_argument('--profile', default='production')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--server', choices=('gunicorn', 'runserver'), default='gunicorn')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of gunicorn worker processes')
+
+    def handle(self, *args, **options):
+        product = Product.objects.order_by('pk').first()
+        if product is None:
+            raise CommandError('Create a product first, for example with generate_data')
+        ads = Ads.objects.create(name=f'benchmark-intake-{secrets.token_hex(4)}',
+                                 description='-', budget=0, product=product)
+        _, token = IntakeToken.issue(ads, 'benchmark_intake')
+        try:
+            with _Server(options['profile'], options):
+                result = self.run_clients(token, options)
+            saved = Lead.objects.filter(ads=ads).count()
+            counted = CampaignStats.objects.get(ads=ads).leads_count
+        finally:
+            # Лиды удаляются одним запросом, без сигналов пересчета счетчиков по каждому.
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(Lead._meta.db_table)} '
+                               f'WHERE ads_id = %s', [ads.pk])
+            IntakeKey.objects.filter(key__startswith=f'{ads.pk}:').delete()
+            ads.delete()
+
+        self.stdout.write(
+            f'{result["accepted"]} leads in {result["elapsed"]:.1f}s: '
+            f'{result["accepted"] / result["elapsed"]:.0f} leads/s, '
+            f'{result["requests"] / result["elapsed"]:.0f} req/s, '
+            f'p50 {result["p50"]:.1f} ms, p95 {result["p95"]:.1f} ms, '
+            f'p99 {result["p99"]:.1f} ms, duplicates {result["duplicates"]}, '
+            f'errors {result["errors"]}')
+        if saved != result['accepted'] or counted != saved:
+            raise CommandError(f'{result["accepted"]} leads accepted, but {saved} saved '
+                               f'and {counted} counted')
+        self.stdout.write(self.style.SUCCESS(f'All {saved} accepted leads saved exactly once'))
+
+    def run_clients(self, token: str, options: dict) -> dict:
+        """Метод отправляет лиды в нескольких потоках и возвращает сводку замеров."""
+        url = f'http://127.0.0.1:{options["port"]}{reverse("lead_intake")}'
+        headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+        concurrency = options['concurrency']
+        per_client = max(1, options['leads'] // options['batch'] // concurrency)
+        retry_every = round(1 / options['retry_share']) if options['retry_share'] else 0
+        barrier = threading.Barrier(concurrency)
+
+        def send(body: bytes) -> dict:
+            request = urllib.request.Request(url, body, headers)
+            with urllib.request.urlopen(request) as response:
+                return json.load(response)
+
+        def client(number: int) -> dict:
+            stats = {'accepted': 0, 'duplicates': 0, 'errors': 0, 'latencies': []}
+            barrier.wait()
+            for index in range(per_client):
+                first = (number * per_client + index) * options['batch']
+                body = json.dumps([{
+                    'first_name': FIRST_NAMES[item % len(FIRST_NAMES)],
+                    'last_name': 'Нагрузочный',
+                    'phone': f'8999{first + item:07d}',
+                    'idempotency_key': f'{number}-{index}-{item}',
+                } for item in range(options['batch'])]).encode()
+                attempts = 2 if retry_every and index % retry_every == 0 else 1
+                for _ in range(attempts):
+                    started = time.perf_counter()
+                    try:
+                        result = send(body)
+                    except OSError:
+                        stats['errors'] += 1
+                        continue
+                    finally:
+                        stats['latencies'].append(time.perf_counter() - started)
+                    stats['accepted'] += result['accepted']
+                    stats['duplicates'] += result['duplicate']
+            return stats
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(client, range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(value * 1000 for result in results for value in result['latencies'])
+        quantiles = statistics.quantiles(latencies, n=100)
+        return {
+            'elapsed': elapsed,
+            'requests': len(latencies),
+            'accepted': sum(result['accepted'] for result in results),
+            'duplicates': sum(result['duplicates'] for result in results),
+            'errors': sum(result['errors'] for result in results),
+            'p50': quantiles[49],
+            'p95': quantiles[94],
+            'p99': quantiles[98],
+        }
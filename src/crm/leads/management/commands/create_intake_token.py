@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import IntakeToken
+from ....ads.models import Ads
+
+
+class Command(BaseCommand):
+    """Команда выдает ключ доступа рекламной кампании к приему лидов (см. LeadIntakeView)."""
+
+    help = 'Issue an intake API token for a campaign'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ads', type=int, help='Campaign id')
+        parser.add_argument('--name', default='', help='Name of the ad platform')
+
+    def handle(self, *args, **options):
+        ads = Ads.objects.filter(pk=options['ads']).first()
+        if ads is None:
+            raise CommandError(f'Campaign {options["ads"]} does not exist')
+        _, token = IntakeToken.issue(ads, options['name'])
+        self.stdout.write(token)
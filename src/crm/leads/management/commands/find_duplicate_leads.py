@@ -0,0 +1,33 @@
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...dedup import DEFAULT_MAX_BLOCK, DEFAULT_THRESHOLD, find_lead_duplicates
+
+
+class Command(BaseCommand):
+    """
+    Команда ищет дубли среди всех потенциальных клиентов (см.
+    find_lead_duplicates) и записывает предложения объединения в очередь
+    на проверку.
+    """
+
+    help = 'Find duplicate leads and queue merge suggestions for review'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Minimal similarity score of a suggested pair')
+        parser.add_argument('--max-block', type=int, default=DEFAULT_MAX_BLOCK,
+                            help='Larger groups of leads with the same key are skipped')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = find_lead_duplicates(options['threshold'], options['max_block'],
+                                      options['batch_size'])
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+        self.stdout.write(self.style.SUCCESS(
+            f'Compared {result["pairs"]} pairs in {result["blocks"]} blocks '
+            f'in {time.perf_counter() - started:.1f}s, suggested {result["duplicates"]} '
+            f'duplicates, peak memory {peak} MB'))
@@ -0,0 +1,44 @@
+import contextlib
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importer import LeadImporter, LeadImportError, read_table
+from ....ads.models import Ads
+
+
+class Command(BaseCommand):
+    """
+    Команда импортирует потенциальных клиентов из файла CSV или XLSX
+    (см. LeadImporter) и записывает строки с ошибками в отчет --report.
+    """
+
+    help = 'Import leads from a CSV or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--ads', type=int,
+                            help='Campaign id for rows without a campaign')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Encoding of a CSV file')
+        parser.add_argument('--batch-size', type=int, default=settings.LEAD_IMPORT_BATCH_SIZE)
+        parser.add_argument('--report', help='Path of the CSV report of rejected rows')
+
+    def handle(self, *args, **options):
+        if options['ads'] is not None and not Ads.objects.filter(pk=options['ads']).exists():
+            raise CommandError(f'Campaign {options["ads"]} does not exist')
+        started = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            file = stack.enter_context(open(options['path'], 'rb'))
+            report = None
+            if options['report']:
+                report = stack.enter_context(
+                    open(options['report'], 'w', encoding='utf-8-sig', newline=''))
+            try:
+                result = LeadImporter(options['ads'], options['batch_size']).run(
+                    read_table(file, options['path'], options['encoding']), report)
+            except LeadImportError as error:
+                raise CommandError(str(error)) from error
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result["imported"]} of {result["rows"]} rows '
+            f'in {time.perf_counter() - started:.1f}s, rejected {result["errors"]}'))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['to_active', 'id'], name='leads_to_active_id_idx'),
+        ),
+    ]
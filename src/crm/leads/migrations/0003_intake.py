@@ -0,0 +1,42 @@
+# Generated by Django 4.2.10 on 2026-10-18 18:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0002_campaignstats'),
+        ('leads', '0002_lead_to_active_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntakeKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Ключ')),
+                ('created_at', models.DateTimeField(verbose_name='Принят')),
+            ],
+            options={
+                'verbose_name': 'ключ идемпотентности',
+                'verbose_name_plural': 'ключи идемпотентности',
+            },
+        ),
+        migrations.CreateModel(
+            name='IntakeToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=150, verbose_name='Название')),
+                ('token_hash', models.CharField(editable=False, max_length=64, unique=True)),
+                ('is_active', models.BooleanField(default=True, verbose_name='Действует')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Выдан')),
+                ('ads', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intake_tokens', to='ads.ads', verbose_name='Рекламная кампания')),
+            ],
+            options={
+                'verbose_name': 'ключ приема лидов',
+                'verbose_name_plural': 'ключи приема лидов',
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.10 on 2026-10-18 18:57
+
+from django.db import migrations, models, transaction
+import django.db.models.functions.text
+
+from ..service import normalize_phone
+
+BATCH_SIZE = 10000
+
+
+def backfill_phone_normalized(apps, schema_editor):
+    """
+    Функция заполняет нормализованные телефоны существующих лидов пачками
+    по BATCH_SIZE, каждая пачка — в отдельной транзакции. В PostgreSQL
+    пачка обновляется одним запросом UPDATE ... FROM (VALUES ...).
+    """
+    Lead = apps.get_model('leads', 'Lead')
+    connection = schema_editor.connection
+    table = connection.ops.quote_name(Lead._meta.db_table)
+    last_id = 0
+    while True:
+        rows = list(Lead.objects.using(connection.alias).filter(pk__gt=last_id)
+                    .order_by('pk').values_list('pk', 'phone')[:BATCH_SIZE])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        with transaction.atomic(using=connection.alias):
+            if connection.vendor == 'postgresql':
+                values = ', '.join(['(%s, %s)'] * len(rows))
+                with connection.cursor() as cursor:
+                    cursor.execute(f'UPDATE {table} SET phone_normalized = v.phone '
+                                   f'FROM (VALUES {values}) AS v (id, phone) '
+                                   f'WHERE {table}.id = v.id',
+                                   [param for pk, phone in rows
+                                    for param in (pk, normalize_phone(phone))])
+            else:
+                Lead.objects.using(connection.alias).bulk_update(
+                    [Lead(pk=pk, phone_normalized=normalize_phone(phone)) for pk, phone in rows],
+                    ['phone_normalized'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    # Заполнение идет пачками в отдельных транзакциях, а индексы строятся после него.
+    atomic = False
+
+    dependencies = [
+        ('leads', '0003_intake'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='phone_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Телефон в формате E.164'),
+        ),
+        migrations.RunPython(backfill_phone_normalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['phone_normalized'], name='leads_phone_normalized_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(django.db.models.functions.text.Right('phone_normalized', 10), name='leads_phone_suffix_idx'),
+        ),
+    ]
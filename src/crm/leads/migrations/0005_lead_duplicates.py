@@ -0,0 +1,98 @@
+# Generated by Django 4.2.10 on 2026-10-18 19:19
+
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+import django.db.models.functions.text
+
+from ..service import get_name_key
+
+BATCH_SIZE = 10000
+
+
+def backfill_name_key(apps, schema_editor):
+    """
+    Функция заполняет ключи имен существующих лидов пачками по BATCH_SIZE,
+    каждая пачка — в отдельной транзакции (как в 0004_phone_normalized).
+    """
+    Lead = apps.get_model('leads', 'Lead')
+    connection = schema_editor.connection
+    table = connection.ops.quote_name(Lead._meta.db_table)
+    last_id = 0
+    while True:
+        rows = list(Lead.objects.using(connection.alias).filter(pk__gt=last_id)
+                    .order_by('pk').values_list('pk', 'first_name', 'last_name')[:BATCH_SIZE])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        with transaction.atomic(using=connection.alias):
+            if connection.vendor == 'postgresql':
+                values = ', '.join(['(%s, %s)'] * len(rows))
+                with connection.cursor() as cursor:
+                    cursor.execute(f'UPDATE {table} SET name_key = v.name_key '
+                                   f'FROM (VALUES {values}) AS v (id, name_key) '
+                                   f'WHERE {table}.id = v.id',
+                                   [param for pk, first_name, last_name in rows
+                                    for param in (pk, get_name_key(first_name, last_name))])
+            else:
+                Lead.objects.using(connection.alias).bulk_update(
+                    [Lead(pk=pk, name_key=get_name_key(first_name, last_name))
+                     for pk, first_name, last_name in rows],
+                    ['name_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    # Заполнение идет пачками в отдельных транзакциях, а индексы строятся после него.
+    atomic = False
+
+    dependencies = [
+        ('leads', '0004_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Ключ имени'),
+        ),
+        migrations.RunPython(backfill_name_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['name_key'], name='leads_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='leads_email_lower_idx'),
+        ),
+        migrations.CreateModel(
+            name='LeadDuplicate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('reasons', models.CharField(max_length=50, verbose_name='Совпадения')),
+                ('rejected', models.BooleanField(default=False, verbose_name='Отклонено')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Найдено')),
+            ],
+            options={
+                'verbose_name': 'возможный дубль лида',
+                'verbose_name_plural': 'возможные дубли лидов',
+            },
+        ),
+        migrations.AddField(
+            model_name='leadduplicate',
+            name='duplicate',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='originals', to='leads.lead', verbose_name='Возможный дубль'),
+        ),
+        migrations.AddField(
+            model_name='leadduplicate',
+            name='lead',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicates', to='leads.lead', verbose_name='Потенциальный клиент'),
+        ),
+        migrations.AddIndex(
+            model_name='leadduplicate',
+            index=models.Index(fields=['rejected', '-score', '-id'], name='leads_duplicate_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leadduplicate',
+            constraint=models.UniqueConstraint(fields=('lead', 'duplicate'), name='leads_duplicate_pair_unique'),
+        ),
+    ]
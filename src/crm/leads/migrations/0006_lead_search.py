@@ -0,0 +1,85 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:05
+
+import django.contrib.postgres.search
+from django.db import migrations, transaction
+
+from ...core.db.search import AddSearchIndexes
+
+BATCH_SIZE = 10000
+
+# Вектор лида: имя и фамилия в конфигурации russian (русские слова
+# приводятся к основе русским стеммером, латинские — английским) и ключ
+# имени в латинице. Почты в векторе нет: каждая почта — отдельная лексема,
+# и поиск по началу слова перебирал бы их все; она ищется индексами
+# leads_email_lower_idx и триграммным. {row} — префикс столбцов ("NEW." в
+# триггере).
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian', {row}first_name || ' ' || {row}last_name), 'A') || "
+    "setweight(to_tsvector('simple', {row}name_key), 'B')"
+)
+
+
+def create_search_vector(apps, schema_editor):
+    """
+    Функция создает триггер, который заполняет search_vector при вставке
+    лида и изменении его имени, заполняет вектор существующих лидов пачками
+    по BATCH_SIZE (каждая пачка — в отдельной транзакции), строит по нему
+    GIN-индекс и собирает статистику для планировщика. Только для PostgreSQL.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    Lead = apps.get_model('leads', 'Lead')
+    table = connection.ops.quote_name(Lead._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            CREATE OR REPLACE FUNCTION leads_lead_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER leads_lead_search_vector
+            BEFORE INSERT OR UPDATE OF first_name, last_name, name_key ON {table}
+            FOR EACH ROW EXECUTE FUNCTION leads_lead_search_vector()
+        ''')
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+        max_id = cursor.fetchone()[0]
+    for first_id in range(0, max_id, BATCH_SIZE):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {table} SET search_vector = {SEARCH_VECTOR_SQL.format(row="")} '
+                           f'WHERE id > %s AND id <= %s', [first_id, first_id + BATCH_SIZE])
+    schema_editor.execute(f'CREATE INDEX leads_search_vector_idx ON {table} '
+                          f'USING gin (search_vector)')
+    schema_editor.execute(f'ANALYZE {table}')
+
+
+def drop_search_vector(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    table = connection.ops.quote_name(apps.get_model('leads', 'Lead')._meta.db_table)
+    schema_editor.execute('DROP INDEX IF EXISTS leads_search_vector_idx')
+    schema_editor.execute(f'DROP TRIGGER IF EXISTS leads_lead_search_vector ON {table}')
+    schema_editor.execute('DROP FUNCTION IF EXISTS leads_lead_search_vector()')
+
+
+class Migration(migrations.Migration):
+    # Заполнение идет пачками в отдельных транзакциях, а индексы строятся после него.
+    atomic = False
+
+    dependencies = [
+        ('leads', '0005_lead_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_vector, drop_search_vector),
+        AddSearchIndexes(model_name='lead', trigram=['first_name', 'last_name', 'email']),
+    ]
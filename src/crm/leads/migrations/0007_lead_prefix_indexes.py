@@ -0,0 +1,16 @@
+# Generated by Django 4.2.10 on 2026-10-18 22:40
+
+from django.db import migrations
+
+from ...core.db.search import AddSearchIndexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0006_lead_search'),
+    ]
+
+    operations = [
+        AddSearchIndexes(model_name='lead', prefix=['last_name', 'first_name', 'phone']),
+    ]
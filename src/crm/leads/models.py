@@ -1,12 +1,44 @@
+import hashlib
+import secrets
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Lower, Right
 from django.urls import reverse
 
-from .service import UnicodeNameValidator, UnicodeNumberValidator
+from .service import (NAME_KEY_LENGTH, PHONE_SUFFIX_LENGTH, UnicodeNameValidator,
+                      UnicodeNumberValidator, get_name_key, normalize_phone)
 from ..ads.models import Ads
 
 
+class LeadQuerySet(models.QuerySet):
+    """Класс набора записей потенциальных клиентов."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Метод заполняет вычисляемые поля, так как bulk_create не вызывает save."""
+        objs = list(objs)
+        for obj in objs:
+            obj.fill_computed_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Lead(models.Model):
-    """Класс модели потенциального клиента."""
+    """
+    Класс модели потенциального клиента.
+
+    Поле phone_normalized хранит телефон в виде E.164 (см. normalize_phone),
+    а name_key — ключ имени (см. get_name_key); оба заполняются при
+    сохранении. По телефону и его последним PHONE_SUFFIX_LENGTH цифрам
+    построены индексы для поиска звонящего, по телефону, почте без учета
+    регистра и ключу имени ищутся дубли (см. dedup.py).
+
+    Поле search_vector (только PostgreSQL) поддерживается триггером базы
+    (см. миграцию 0006_lead_search) и индексируется GIN-индексом для
+    глобального поиска (см. users/search.py).
+    """
+
+    COMPUTED_FIELDS = {'phone': 'phone_normalized', 'first_name': 'name_key',
+                       'last_name': 'name_key'}
 
     name_validator = UnicodeNameValidator()
     number_validator = UnicodeNumberValidator()
@@ -21,6 +53,12 @@ class Lead(models.Model):
     phone = models.CharField(max_length=14,
                              validators=[number_validator],
                              verbose_name='Телефон потенциального клиента')
+    phone_normalized = models.CharField(max_length=16, blank=True, default='', editable=False,
+                                        verbose_name='Телефон в формате E.164')
+    name_key = models.CharField(max_length=NAME_KEY_LENGTH, blank=True, default='',
+                                editable=False, verbose_name='Ключ имени')
+    search_vector = SearchVectorField(null=True, editable=False,
+                                      verbose_name='Поисковый вектор')
     ads = models.ForeignKey(
         Ads,
         on_delete=models.CASCADE,
@@ -28,10 +66,34 @@ class Lead(models.Model):
     comment = models.TextField(blank=True, verbose_name='Комментарий')
     to_active = models.BooleanField(default=False, verbose_name='Перевод в активные')
 
+    objects = LeadQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'потенциальный клиент'
         verbose_name_plural = 'потенциальные клиенты'
         permissions = [("can_transfer_to_active", "Can transfer to active")]
+        indexes = [
+            models.Index(fields=['to_active', 'id'], name='leads_to_active_id_idx'),
+            models.Index(fields=['phone_normalized'], name='leads_phone_normalized_idx'),
+            models.Index(Right('phone_normalized', PHONE_SUFFIX_LENGTH),
+                         name='leads_phone_suffix_idx'),
+            models.Index(fields=['name_key'], name='leads_name_key_idx'),
+            models.Index(Lower('email'), name='leads_email_lower_idx'),
+        ]
+
+    def fill_computed_fields(self):
+        """Метод заполняет нормализованный телефон и ключ имени."""
+        self.phone_normalized = normalize_phone(self.phone)
+        self.name_key = get_name_key(self.first_name, self.last_name)
+
+    def save(self, *args, **kwargs):
+        self.fill_computed_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *(self.COMPUTED_FIELDS[field]
+                                                         for field in update_fields
+                                                         if field in self.COMPUTED_FIELDS)}
+        super().save(*args, **kwargs)
 
     def get_absolute_url(self) -> str:
         """Метод возвращает абсолютный адрес потенциального клиента."""
@@ -44,3 +106,83 @@ class Lead(models.Model):
     def is_active(self) -> bool:
         """Метод проверяет переведен ли потенциальный клиент в активные."""
         return self.to_active
+
+
+class IntakeToken(models.Model):
+    """
+    Класс модели ключа доступа рекламной площадки к приему лидов кампании.
+
+    Хранится только SHA-256 ключа, сам ключ показывается один раз при выдаче.
+    """
+
+    ads = models.ForeignKey(
+        Ads,
+        on_delete=models.CASCADE,
+        related_name='intake_tokens',
+        verbose_name='Рекламная кампания')
+    name = models.CharField(max_length=150, blank=True, verbose_name='Название')
+    token_hash = models.CharField(max_length=64, unique=True, editable=False)
+    is_active = models.BooleanField(default=True, verbose_name='Действует')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Выдан')
+
+    class Meta:
+        verbose_name = 'ключ приема лидов'
+        verbose_name_plural = 'ключи приема лидов'
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        """Метод возвращает хэш ключа token для поиска в базе."""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, ads: Ads, name: str = '') -> tuple:
+        """Метод выдает новый ключ кампании ads и возвращает (запись, ключ)."""
+        token = secrets.token_urlsafe(32)
+        return cls.objects.create(ads=ads, name=name, token_hash=cls.hash_token(token)), token
+
+    def __str__(self) -> str:
+        return self.name or f'{self.ads} #{self.pk}'
+
+
+class IntakeKey(models.Model):
+    """
+    Класс модели ключа идемпотентности принятого лида: повторная отправка
+    лида с тем же ключом (например, после обрыва соединения) не создает дубль.
+    """
+
+    key = models.CharField(max_length=255, unique=True, verbose_name='Ключ')
+    created_at = models.DateTimeField(verbose_name='Принят')
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности'
+        verbose_name_plural = 'ключи идемпотентности'
+
+
+class LeadDuplicate(models.Model):
+    """
+    Класс модели предложения объединить два потенциальных клиента (см. dedup.py).
+
+    lead — более ранний лид, duplicate — более поздний, который при
+    объединении удаляется. Отклоненные предложения остаются в базе, чтобы
+    поиск дублей не предлагал ту же пару снова.
+    """
+
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='duplicates',
+                             verbose_name='Потенциальный клиент')
+    duplicate = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='originals',
+                                  verbose_name='Возможный дубль')
+    score = models.FloatField(verbose_name='Сходство')
+    reasons = models.CharField(max_length=50, verbose_name='Совпадения')
+    rejected = models.BooleanField(default=False, verbose_name='Отклонено')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Найдено')
+
+    class Meta:
+        verbose_name = 'возможный дубль лида'
+        verbose_name_plural = 'возможные дубли лидов'
+        constraints = [models.UniqueConstraint(fields=['lead', 'duplicate'],
+                                               name='leads_duplicate_pair_unique')]
+        indexes = [models.Index(fields=['rejected', '-score', '-id'],
+                                name='leads_duplicate_queue_idx')]
+
+    def __str__(self) -> str:
+        return f'{self.lead} / {self.duplicate} ({self.score:.2f})'
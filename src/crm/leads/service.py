@@ -1,6 +1,28 @@
+import re
+
 from django.core import validators
 from django.utils.deconstruct import deconstructible
 
+# Код страны для номеров без него: десяти цифр или одиннадцати, начинающихся с 8.
+DEFAULT_COUNTRY_CODE = '7'
+
+# Число последних цифр номера, по которым звонящий ищется без учета кода страны.
+PHONE_SUFFIX_LENGTH = 10
+
+NON_DIGITS = re.compile(r'[^0-9]')
+
+NAME_TOKENS = re.compile(r'[a-z]+')
+
+# Транслитерация кириллицы, чтобы "Иван Иванов" и "Ivan Ivanov" давали один ключ имени.
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh',
+    'щ': 'sch', 'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+})
+
+NAME_KEY_LENGTH = 255
+
 
 @deconstructible
 class UnicodeNameValidator(validators.RegexValidator):
@@ -15,6 +37,31 @@ class UnicodeNameValidator(validators.RegexValidator):
 class UnicodeNumberValidator(validators.RegexValidator):
     """Класс валидатора номера телефона."""
 
-    regex = r"^\+?\d{1,3}\d{10}"
+    regex = r"^\+?\d{1,3}\d{10}\Z"
     message = "Enter a valid number. The number must consist of a region code and 10 digits "
     flags = 0
+
+
+def normalize_phone(phone: str) -> str:
+    """
+    Функция приводит номер телефона к виду E.164: "+", код страны и номер
+    без разделителей. Для номеров без кода страны (10 цифр или 11 цифр,
+    начинающихся с 8) подставляется DEFAULT_COUNTRY_CODE. Для строки без
+    цифр возвращается пустая строка.
+    """
+    digits = NON_DIGITS.sub('', phone or '')
+    if len(digits) == PHONE_SUFFIX_LENGTH:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    elif len(digits) == PHONE_SUFFIX_LENGTH + 1 and digits[0] == '8':
+        digits = DEFAULT_COUNTRY_CODE + digits[1:]
+    return f'+{digits}' if digits else ''
+
+
+def get_name_key(first_name: str, last_name: str) -> str:
+    """
+    Функция возвращает ключ имени для поиска дублей: слова имени и фамилии
+    в нижнем регистре, транслитерированные в латиницу и упорядоченные по
+    алфавиту, поэтому ключ не зависит от алфавита и порядка слов.
+    """
+    text = f'{first_name} {last_name}'.casefold().translate(TRANSLIT)
+    return ' '.join(sorted(NAME_TOKENS.findall(text)))[:NAME_KEY_LENGTH]
@@ -0,0 +1,205 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..dedup import (Candidate, check_lead, find_lead_duplicates, get_trigrams, merge_leads,
+                     score_pair)
+from ..models import Lead, LeadDuplicate
+from ..service import get_name_key
+from ...ads.models import CampaignStats
+from ...ads.service import find_campaign_stats_drift
+from ...contracts.models import Contract
+from ...customers.tests.test_models import CustomerModelMixinTest
+
+User = get_user_model()
+
+
+class LeadDedupTest(CustomerModelMixinTest, TestCase):
+    """Тесты для поиска и объединения дублей потенциальных клиентов."""
+
+    def create_lead(self, first_name: str, last_name: str, phone: str, **fields) -> Lead:
+        """Метод создает потенциального клиента тестовой кампании."""
+        return Lead.objects.create(first_name=first_name, last_name=last_name, phone=phone,
+                                   ads=self.ads, **fields)
+
+    def test_name_key(self):
+        """Тест проверяет, что ключ имени не зависит от алфавита, регистра и порядка слов."""
+        self.assertEqual(get_name_key('Иван', 'Иванов'), 'ivan ivanov')
+        self.assertEqual(get_name_key('IVANOV', 'Ivan'), 'ivan ivanov')
+        self.assertEqual(get_name_key('Пётр', 'Щукин'), 'petr schukin')
+
+    def test_score_pair(self):
+        """Тест проверяет оценку сходства по контактам и триграммам имен."""
+        def candidate(pk, phone, email, first_name, last_name):
+            return Candidate.from_row(pk, phone, email, get_name_key(first_name, last_name))
+
+        self.assertEqual(get_trigrams('ivan'), {'  i', ' iv', 'iva', 'van', 'an '})
+        original = candidate(1, '+79996660000', 'ivan@example.com', 'Иван', 'Иванов')
+        self.assertEqual(score_pair(original, candidate(2, '+79996660000', 'IVAN@example.com',
+                                                        'Ivan', 'Ivanov')),
+                         (1.0, ['phone', 'email', 'name']))
+        score, reasons = score_pair(original, candidate(3, '+79996660000', '', 'Анна',
+                                                        'Иванова'))
+        self.assertEqual((score, reasons), (0.6, ['phone']))
+        score, _ = score_pair(original, candidate(4, '', '', 'Иван', 'Иванов'))
+        self.assertEqual(score, 0.5)
+        self.assertEqual(score_pair(original, candidate(5, '+79166660000', 'ivan@mail.ru',
+                                                        'Иван', 'Иванов')),
+                         (0.7, ['phone_tail', 'email_login', 'name']))
+
+    def test_find_lead_duplicates(self):
+        """
+        Тест проверяет, что поиск находит дубли по телефону, почте и имени с
+        частично совпадающим телефоном, не предлагает похожих только по имени
+        или только по телефону и не повторяет известные пары.
+        """
+        translit = self.create_lead('Ivan', 'Ivanov', '+79996660000')
+        by_email = self.create_lead('Иванов', 'Иван', '89990000001', email='TEST@test.com')
+        foreign = self.create_lead('Иван', 'Иванов', '+375296660000')
+        self.create_lead('Анна', 'Иванова', '89996660000')
+        self.create_lead('Иван', 'Иванов', '89990000002')
+
+        result = find_lead_duplicates()
+        self.assertEqual(result['duplicates'], 4)
+        self.assertEqual(
+            set(LeadDuplicate.objects.values_list('lead_id', 'duplicate_id', 'reasons')),
+            {(self.lead.pk, translit.pk, 'phone,name'),
+             (self.lead.pk, by_email.pk, 'email,name'),
+             (self.lead.pk, foreign.pk, 'phone_tail,name'),
+             (translit.pk, foreign.pk, 'phone_tail,name')})
+        LeadDuplicate.objects.filter(duplicate=by_email).update(rejected=True)
+        find_lead_duplicates()
+        self.assertEqual(LeadDuplicate.objects.count(), 4)
+        self.assertEqual(LeadDuplicate.objects.filter(rejected=True).count(), 1)
+
+    def test_max_block(self):
+        """Тест проверяет, что слишком большие блоки не сравниваются."""
+        for _ in range(3):
+            self.create_lead('Иван', 'Иванов', '89996660000')
+        self.assertEqual(find_lead_duplicates(max_block=3)['blocks'], 0)
+        self.assertEqual(find_lead_duplicates(max_block=4)['duplicates'], 6)
+
+    def test_check_lead(self):
+        """Тест проверяет поиск дублей одного лида по индексам."""
+        lead = self.create_lead('Ivan', 'Ivanov', '9996660000')
+        [duplicate] = check_lead(lead)
+        self.assertEqual((duplicate.lead_id, duplicate.duplicate_id),
+                         (self.lead.pk, lead.pk))
+        self.assertTrue(LeadDuplicate.objects.filter(duplicate=lead).exists())
+        self.assertEqual(check_lead(self.create_lead('Петр', 'Петров', '89991112233')), [])
+        self.assertEqual(len(check_lead(self.create_lead('Иван', 'Иванов', '+79166660000'))), 2)
+        self.assertEqual(check_lead(self.create_lead('Иван', 'Иванов', '+79266660000'),
+                                    max_block=3), [])
+
+    def test_merge_leads(self):
+        """Тест проверяет перенос контрактов и покупателей и счетчики кампании при объединении."""
+        duplicate = self.create_lead('Ivan', 'Ivanov', '89996660000', comment='Повторно')
+        Contract.objects.filter(pk=self.contract.pk).update(lead=duplicate)
+        self.customer.lead = duplicate
+        self.customer.save()
+        check_lead(duplicate)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(merge_leads(LeadDuplicate.objects.get(duplicate=duplicate)))
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', ' '.join(query['sql'] for query in queries))
+
+        self.assertFalse(Lead.objects.filter(pk=duplicate.pk).exists())
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.comment, 'Ох\nПовторно')
+        self.assertEqual(Contract.objects.get(pk=self.contract.pk).lead, self.lead)
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.lead, self.lead)
+        self.assertEqual(CampaignStats.objects.get(ads=self.ads).leads_count, 1)
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    def test_merge_deleted_lead(self):
+        """
+        Тест проверяет, что пара, лид которой удален после чтения предложения
+        (например, встречным объединением), не объединяется.
+        """
+        duplicate = self.create_lead('Ivan', 'Ivanov', '89996660000')
+        check_lead(duplicate)
+        suggestion = LeadDuplicate.objects.get(duplicate=duplicate)
+        Contract.objects.filter(pk=self.contract.pk).update(lead=duplicate)
+        self.lead.delete()
+        self.assertFalse(merge_leads(suggestion))
+        self.assertEqual(Contract.objects.get(pk=self.contract.pk).lead, duplicate)
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    def test_command(self):
+        """Тест проверяет команду find_duplicate_leads."""
+        self.create_lead('Ivan', 'Ivanov', '89996660000')
+        stdout = StringIO()
+        call_command('find_duplicate_leads', stdout=stdout)
+        self.assertIn('suggested 1 duplicates', stdout.getvalue())
+
+
+class LeadDuplicateViewTest(CustomerModelMixinTest, TestCase):
+    """Тесты для классов LeadDuplicateListView и LeadDuplicateResolveView и проверки дублей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Метод создает пользователя с разрешениями на лиды и очередь дублей."""
+        super().setUpTestData()
+        cls.user = User.objects.create_user('test_user', password='test_password')
+        cls.user.user_permissions.add(*Permission.objects.filter(codename__in=(
+            'add_lead', 'view_lead', 'delete_lead', 'view_leadduplicate',
+            'change_leadduplicate')))
+
+    def setUp(self):
+        """Метод авторизует пользователя и создает возможный дубль."""
+        self.client.login(username='test_user', password='test_password')
+        self.duplicate = Lead.objects.create(first_name='Ivan', last_name='Ivanov',
+                                             phone='89996660000', ads=self.ads)
+        check_lead(self.duplicate)
+        self.suggestion = LeadDuplicate.objects.get(duplicate=self.duplicate)
+
+    def test_create_warns_about_duplicates(self):
+        """Тест проверяет сообщение о возможных дублях после создания лида."""
+        response = self.client.post(reverse('crm.leads:leads_create'), {
+            'first_name': 'Иван', 'last_name': 'Иванов', 'phone': '+79996660000',
+            'ads': self.ads.pk, 'email': '', 'comment': ''}, follow=True)
+        [message] = response.context['messages']
+        self.assertIn('похож на уже созданных', str(message))
+        self.assertIn(self.duplicate.get_absolute_url(), str(message))
+        self.assertEqual(LeadDuplicate.objects.count(), 3)
+
+    def test_list(self):
+        """Тест проверяет очередь дублей без отклоненных пар."""
+        response = self.client.get(reverse('crm.leads:leads_duplicates'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['duplicates']), [self.suggestion])
+        self.suggestion.rejected = True
+        self.suggestion.save()
+        response = self.client.get(reverse('crm.leads:leads_duplicates'))
+        self.assertEqual(list(response.context['duplicates']), [])
+
+    def test_merge(self):
+        """Тест проверяет объединение пары из очереди."""
+        url = reverse('crm.leads:leads_duplicate_resolve', args=[self.suggestion.pk])
+        response = self.client.post(url, {'action': 'merge'})
+        self.assertRedirects(response, reverse('crm.leads:leads_duplicates'))
+        self.assertFalse(Lead.objects.filter(pk=self.duplicate.pk).exists())
+        self.assertEqual(self.client.post(url, {'action': 'merge'}).status_code, 404)
+
+    def test_reject(self):
+        """Тест проверяет отклонение пары и ответ на неизвестное действие."""
+        url = reverse('crm.leads:leads_duplicate_resolve', args=[self.suggestion.pk])
+        self.assertEqual(self.client.post(url, {'action': 'delete'}).status_code, 400)
+        self.client.post(url, {'action': 'reject'})
+        self.suggestion.refresh_from_db()
+        self.assertTrue(self.suggestion.rejected)
+        self.assertTrue(Lead.objects.filter(pk=self.duplicate.pk).exists())
+
+    def test_without_permission(self):
+        """Тест проверяет, что без разрешений очередь и решения недоступны."""
+        self.user.user_permissions.clear()
+        self.assertEqual(self.client.get(reverse('crm.leads:leads_duplicates')).status_code, 403)
+        url = reverse('crm.leads:leads_duplicate_resolve', args=[self.suggestion.pk])
+        self.assertEqual(self.client.post(url, {'action': 'merge'}).status_code, 403)
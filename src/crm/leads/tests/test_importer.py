@@ -0,0 +1,230 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..importer import LeadImporter, LeadImportError, read_table
+from ..models import Lead
+from ..tests.test_models import LeadModelMixinTest
+from ...ads.models import Ads, CampaignStats
+from ...ads.service import find_campaign_stats_drift
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+User = get_user_model()
+
+CSV_DATA = (
+    'Имя;Фамилия;Телефон;Почта;Кампания;Комментарий\n'
+    'Петр;Петров;+7 (999) 111-22-33;petr@example.com;{ads};\n'
+    'Анна;Сидорова;89991112234;;Test ads;Повторно\n'
+    'R2D2;Дроид;89991112235;;{ads};\n'
+    'Мария;Иванова;12345;не почта;{ads};\n'
+    ';;;;;\n'
+    'Олег;Смирнов;89991112236;;Нет такой;\n'
+    'Ольга;Смирнова;89991112237;;;\n'
+)
+
+
+class LeadImporterTest(LeadModelMixinTest, TestCase):
+    """Тесты для класса LeadImporter."""
+
+    def run_import(self, data: str, name: str = 'leads.csv', **options) -> tuple:
+        """Метод импортирует текст data как файл name и возвращает итог и строки отчета."""
+        report = StringIO()
+        table = read_table(io.BytesIO(data.encode('utf-8')), name)
+        result = LeadImporter(batch_size=2, **options).run(table, report)
+        return result, list(csv.reader(StringIO(report.getvalue())))
+
+    def test_import(self):
+        """
+        Тест проверяет сохранение корректных строк, отчет об ошибочных строках
+        и увеличение счетчиков кампании.
+        """
+        result, report = self.run_import(CSV_DATA.format(ads=self.ads.pk))
+        self.assertEqual(result, {'rows': 6, 'imported': 2, 'errors': 4})
+        self.assertEqual(set(Lead.objects.values_list('phone', flat=True)),
+                         {'89996660000', '+79991112233', '89991112234'})
+        self.assertEqual(report[0][0], 'line')
+        self.assertEqual([row[0] for row in report[1:]], ['4', '5', '7', '8'])
+        self.assertIn('first_name: Enter a valid name', report[1][-1])
+        self.assertIn('phone: Enter a valid number', report[2][-1])
+        self.assertIn('email: Enter a valid email address', report[2][-1])
+        self.assertIn('Campaign "Нет такой" does not exist', report[3][-1])
+        self.assertIn('ads: This field is required.', report[4][-1])
+        self.assertEqual(CampaignStats.objects.get(ads=self.ads).leads_count, 3)
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    def test_default_ads(self):
+        """Тест проверяет, что строки без кампании относятся к кампании по умолчанию."""
+        other = Ads.objects.create(name='Other', description='-', budget=1, product=self.product)
+        result, _ = self.run_import(CSV_DATA.format(ads=self.ads.pk), default_ads_id=other.pk)
+        self.assertEqual(result['imported'], 3)
+        self.assertEqual(Lead.objects.get(last_name='Смирнова').ads, other)
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    def test_ambiguous_ads_name(self):
+        """Тест проверяет, что кампания не выбирается по неуникальному названию."""
+        Ads.objects.create(name='Test ads', description='-', budget=1, product=self.product)
+        result, report = self.run_import(CSV_DATA.format(ads=self.ads.pk))
+        self.assertEqual(result['imported'], 1)
+        self.assertIn('Several campaigns are named "Test ads"', report[1][-1])
+
+    def test_model_field_limits(self):
+        """Тест проверяет, что значения длиннее полей модели попадают в отчет, а не в базу."""
+        email = f'{"a" * 250}@example.com'
+        result, report = self.run_import(
+            'first_name,last_name,phone,email,ads\n'
+            f'Петр,Петров,89991112233,{email},{self.ads.pk}\n'
+            f'{"П" * 151},Петров,89991112233,,{self.ads.pk}\n'
+            f'Петр,Петров,+7 (999) 111-22-33-444,,{self.ads.pk}\n')
+        self.assertEqual(result, {'rows': 3, 'imported': 0, 'errors': 3})
+        self.assertIn('email: Ensure this value has at most 254 characters', report[1][-1])
+        self.assertIn('first_name: Ensure this value has at most 150 characters', report[2][-1])
+        self.assertIn('phone: Ensure this value has at most 14 characters', report[3][-1])
+
+    def test_missing_columns(self):
+        """Тест проверяет, что файл без обязательных столбцов не импортируется."""
+        with self.assertRaisesMessage(LeadImportError, 'Missing columns: phone, ads'):
+            self.run_import('first_name,last_name\nПетр,Петров\n')
+        with self.assertRaisesMessage(LeadImportError, 'Only CSV and XLSX'):
+            self.run_import('', name='leads.xls')
+
+    @unittest.skipIf(openpyxl is None, 'openpyxl is not installed')
+    def test_xlsx(self):
+        """Тест проверяет импорт из файла XLSX с числовыми значениями ячеек."""
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['first_name', 'last_name', 'phone', 'ads'])
+        sheet.append(['Петр', 'Петров', 89991112233, self.ads.pk])
+        file = io.BytesIO()
+        workbook.save(file)
+        file.seek(0)
+        result = LeadImporter().run(read_table(file, 'leads.xlsx'))
+        self.assertEqual(result['imported'], 1)
+        self.assertEqual(Lead.objects.get(last_name='Петров').phone, '89991112233')
+
+
+class LeadImportViewTest(LeadModelMixinTest, TestCase):
+    """Тесты для классов LeadImportView и LeadImportReportView."""
+
+    def setUp(self):
+        """Метод подготавливает пользователя с разрешением add_lead и каталог отчетов."""
+        self.user = User.objects.create_user('test_user', password='test_password')
+        self.user.user_permissions.add(Permission.objects.get(codename='add_lead'))
+        self.client.login(username='test_user', password='test_password')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.report_dir = directory.name
+        settings = override_settings(LEAD_IMPORT_REPORT_DIR=self.report_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, data: str, **fields):
+        """Метод отправляет файл с текстом data на страницу импорта."""
+        file = SimpleUploadedFile('leads.csv', data.encode('cp1251'), content_type='text/csv')
+        return self.client.post(reverse('crm.leads:leads_import'),
+                                {'file': file, 'encoding': 'cp1251', **fields})
+
+    def test_import_and_report(self):
+        """Тест проверяет итог импорта и скачивание отчета об ошибках."""
+        response = self.upload(CSV_DATA.format(ads=self.ads.pk), ads=self.ads.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'leads/leads-import.html')
+        result = response.context['result']
+        self.assertEqual((result['imported'], result['errors']), (3, 3))
+
+        report = self.client.get(reverse('crm.leads:leads_import_report',
+                                         args=[result['report']]))
+        self.assertEqual(report.status_code, 200)
+        content = b''.join(report.streaming_content).decode('utf-8-sig')
+        self.assertEqual(len(list(csv.reader(StringIO(content)))), 4)
+
+    def test_without_errors(self):
+        """Тест проверяет, что без ошибочных строк отчет не сохраняется."""
+        response = self.upload('first_name,last_name,phone\nПетр,Петров,89991112233\n',
+                               ads=self.ads.pk)
+        self.assertEqual(response.context['result']['imported'], 1)
+        self.assertNotIn('report', response.context['result'])
+        self.assertEqual(os.listdir(self.report_dir), [])
+
+    def test_invalid_file(self):
+        """Тест проверяет, что ошибка файла выводится в форме."""
+        response = self.upload('first_name,last_name\nПетр,Петров\n')
+        self.assertFormError(response.context['form'], 'file', 'Missing columns: phone, ads')
+
+    def test_wrong_encoding(self):
+        """Тест проверяет, что файл не в выбранной кодировке дает ошибку формы без отчета."""
+        file = SimpleUploadedFile('leads.csv', CSV_DATA.format(ads=self.ads.pk).encode('cp1251'),
+                                  content_type='text/csv')
+        response = self.client.post(reverse('crm.leads:leads_import'),
+                                    {'file': file, 'encoding': 'utf-8-sig'})
+        self.assertFormError(response.context['form'], 'file',
+                             'The file is not in the utf-8-sig encoding')
+        self.assertEqual(os.listdir(self.report_dir), [])
+
+    @override_settings(LEAD_IMPORT_BATCH_SIZE=100)
+    def test_wrong_encoding_after_first_batch(self):
+        """
+        Тест проверяет, что неверный байт после первых пачек (и после буфера
+        чтения файла) обнаруживается до сохранения лидов, поэтому повторная
+        загрузка не создает дублей.
+        """
+        rows = ''.join(f'Петр,Петров,8999111{number:04},{self.ads.pk}\n'
+                       for number in range(1000))
+        data = f'first_name,last_name,phone,ads\n{rows}'.encode() + b'\xff\n'
+        file = SimpleUploadedFile('leads.csv', data, content_type='text/csv')
+        response = self.client.post(reverse('crm.leads:leads_import'),
+                                    {'file': file, 'encoding': 'utf-8-sig'})
+        self.assertFormError(response.context['form'], 'file',
+                             'The file is not in the utf-8-sig encoding')
+        self.assertFalse(Lead.objects.filter(last_name='Петров').exists())
+        self.assertEqual(os.listdir(self.report_dir), [])
+
+    def test_corrupt_xlsx(self):
+        """Тест проверяет, что поврежденный файл XLSX дает ошибку формы без отчета."""
+        file = SimpleUploadedFile('leads.xlsx', b'not a workbook',
+                                  content_type='application/octet-stream')
+        response = self.client.post(reverse('crm.leads:leads_import'),
+                                    {'file': file, 'encoding': 'utf-8-sig', 'ads': self.ads.pk})
+        expected = ('The file is not a valid XLSX workbook' if openpyxl else
+                    'XLSX import requires the openpyxl package')
+        self.assertFormError(response.context['form'], 'file', expected)
+        self.assertEqual(os.listdir(self.report_dir), [])
+
+    def test_without_permission_add_lead(self):
+        """Тест проверяет, что без разрешения add_lead пользователь получает ошибку 403."""
+        self.user.user_permissions.clear()
+        response = self.client.get(reverse('crm.leads:leads_import'))
+        self.assertEqual(response.status_code, 403)
+
+
+class ImportLeadsCommandTest(LeadModelMixinTest, TestCase):
+    """Тесты для команды import_leads."""
+
+    def test_command(self):
+        """Тест проверяет импорт файла командой и запись отчета."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'leads.csv')
+            report = os.path.join(directory, 'errors.csv')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(CSV_DATA.format(ads=self.ads.pk))
+            stdout = StringIO()
+            call_command('import_leads', path, '--ads', str(self.ads.pk), '--report', report,
+                         stdout=stdout)
+            with open(report, encoding='utf-8-sig') as file:
+                self.assertEqual(len(file.readlines()), 4)
+        self.assertIn('Imported 3 of 6 rows', stdout.getvalue())
+        with self.assertRaisesMessage(CommandError, 'Campaign 0 does not exist'):
+            call_command('import_leads', path, '--ads', '0')
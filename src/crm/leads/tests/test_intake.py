@@ -0,0 +1,243 @@
+import json
+import unittest
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import DataError, OperationalError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import intake
+from ..intake import LeadIntakeBuffer, authenticate, claim_keys, clean_item, save_intake
+from ..models import IntakeKey, IntakeToken, Lead
+from ..tests.test_models import LeadModelMixinTest
+from ...ads.models import CampaignStats
+from ...ads.service import find_campaign_stats_drift
+
+LEAD = {'first_name': 'Петр', 'last_name': 'Петров', 'phone': '+7 (999) 111-22-33'}
+
+
+@override_settings(LEAD_INTAKE_BUFFER_SIZE=0)
+class LeadIntakeViewTest(LeadModelMixinTest, TestCase):
+    """Тесты для класса LeadIntakeView."""
+
+    def setUp(self):
+        """Метод подготавливает ключ доступа кампании."""
+        self.token_object, self.token = IntakeToken.issue(self.ads, 'test')
+
+    def send(self, payload, token=None, **headers):
+        """Метод отправляет payload в формате JSON на эндпоинт приема лидов."""
+        return self.client.post(reverse('lead_intake'), json.dumps(payload),
+                                content_type='application/json',
+                                HTTP_AUTHORIZATION=f'Bearer {token or self.token}', **headers)
+
+    def test_single_lead(self):
+        """Тест проверяет прием одного лида и увеличение счетчика кампании."""
+        response = self.send(LEAD)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['accepted'], 1)
+        lead = Lead.objects.get(last_name='Петров')
+        self.assertEqual((lead.ads, lead.phone), (self.ads, '+79991112233'))
+        self.assertEqual(CampaignStats.objects.get(ads=self.ads).leads_count, 2)
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    def test_batch(self):
+        """Тест проверяет прием списка лидов с отклоненными элементами."""
+        response = self.send([LEAD, {**LEAD, 'phone': '12345'}, 'lead'])
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        self.assertEqual((data['accepted'], data['duplicate'], data['rejected']), (1, 0, 2))
+        self.assertIn('phone: Enter a valid number', data['results'][1]['errors'][0])
+        self.assertEqual(data['results'][2]['errors'], ['A lead must be a JSON object.'])
+        self.assertEqual(Lead.objects.filter(last_name='Петров').count(), 1)
+
+    def test_all_rejected(self):
+        """Тест проверяет ответ 400, если не принят ни один лид."""
+        response = self.send([{**LEAD, 'first_name': ''}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('first_name: This field is required.',
+                      response.json()['results'][0]['errors'])
+
+    def test_idempotency_key(self):
+        """Тест проверяет, что повторно отправленный лид с тем же ключом не сохраняется."""
+        batch = [{**LEAD, 'idempotency_key': 'a'}, {**LEAD, 'idempotency_key': 'a'}]
+        self.assertEqual(self.send(batch).json()['duplicate'], 1)
+        response = self.send(batch[0])
+        self.assertEqual((response.json()['accepted'], response.json()['duplicate']), (0, 1))
+        self.assertEqual(Lead.objects.filter(last_name='Петров').count(), 1)
+        self.assertEqual(CampaignStats.objects.get(ads=self.ads).leads_count, 2)
+
+    def test_idempotency_header(self):
+        """Тест проверяет ключ идемпотентности из заголовка Idempotency-Key."""
+        for _ in range(2):
+            self.send([LEAD, LEAD], HTTP_IDEMPOTENCY_KEY='request-1')
+        self.assertEqual(Lead.objects.filter(last_name='Петров').count(), 2)
+        self.assertEqual(set(IntakeKey.objects.values_list('key', flat=True)),
+                         {f'{self.ads.pk}:request-1:0', f'{self.ads.pk}:request-1:1'})
+
+    def test_without_token(self):
+        """Тест проверяет, что без действующего ключа возвращается ошибка 401."""
+        self.assertEqual(self.send(LEAD, token='wrong').status_code, 401)
+        self.assertEqual(self.client.post(reverse('lead_intake'), {}).status_code, 401)
+        self.assertFalse(Lead.objects.filter(last_name='Петров').exists())
+
+    def test_token_cache(self):
+        """
+        Тест проверяет, что в кэше процесса хранятся только действующие ключи,
+        а их число ограничено TOKEN_CACHE_SIZE.
+        """
+        intake._tokens.clear()
+        factory = RequestFactory()
+        for number in range(5):
+            request = factory.post('/', HTTP_AUTHORIZATION=f'Bearer wrong-{number}')
+            self.assertIsNone(authenticate(request))
+        self.assertEqual(len(intake._tokens), 0)
+        other_token = IntakeToken.issue(self.ads, 'other')[1]
+        with mock.patch.object(intake, 'TOKEN_CACHE_SIZE', 1):
+            for token in (self.token, other_token):
+                request = factory.post('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                self.assertEqual(authenticate(request), self.ads.pk)
+        self.assertEqual(list(intake._tokens), [IntakeToken.hash_token(other_token)])
+        intake._tokens.clear()
+        with mock.patch.object(intake, 'TOKEN_CACHE_SECONDS', -1):
+            request = factory.post('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+            self.assertEqual(authenticate(request), self.ads.pk)
+        request = factory.post('/', HTTP_AUTHORIZATION=f'Bearer {other_token}')
+        self.assertEqual(authenticate(request), self.ads.pk)
+        self.assertEqual(list(intake._tokens), [IntakeToken.hash_token(other_token)])
+
+    def test_invalid_body(self):
+        """Тест проверяет ответы на тело не в JSON и на слишком большую пачку."""
+        response = self.client.post(reverse('lead_intake'), 'lead', content_type='text/plain',
+                                    HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 400)
+        with override_settings(LEAD_INTAKE_MAX_BATCH=2):
+            self.assertEqual(self.send([LEAD] * 3).status_code, 413)
+
+
+class LeadIntakeBufferTest(LeadModelMixinTest, TestCase):
+    """Тесты для класса LeadIntakeBuffer."""
+
+    def entries(self, *keys) -> list:
+        """Метод возвращает пары (ключ, лид) для буфера."""
+        return [(key, clean_item(LEAD, self.ads.pk)[0]) for key in keys]
+
+    @override_settings(LEAD_INTAKE_BUFFER_SIZE=3, LEAD_INTAKE_FLUSH_INTERVAL=60)
+    def test_flush_by_size(self):
+        """Тест проверяет сохранение лидов, когда их набирается LEAD_INTAKE_BUFFER_SIZE."""
+        buffer = LeadIntakeBuffer(background=False)
+        buffer.add(self.entries('a', None))
+        self.assertEqual(buffer.pending_keys(['a', 'b']), {'a'})
+        self.assertEqual(buffer.flush_if_due(), 0)
+        self.assertFalse(Lead.objects.filter(last_name='Петров').exists())
+        buffer.add(self.entries('b'))
+        self.assertEqual(buffer.pending_keys(['a', 'b']), set())
+        self.assertEqual(Lead.objects.filter(last_name='Петров').count(), 3)
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    @override_settings(LEAD_INTAKE_BUFFER_SIZE=100, LEAD_INTAKE_FLUSH_INTERVAL=0)
+    def test_flush_by_time(self):
+        """Тест проверяет сохранение лидов по истечении LEAD_INTAKE_FLUSH_INTERVAL."""
+        buffer = LeadIntakeBuffer(background=False)
+        buffer.add(self.entries('a', 'b'))
+        self.assertEqual(buffer.flush_if_due(), 2)
+        buffer.add(self.entries('a'))
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(Lead.objects.filter(last_name='Петров').count(), 2)
+
+    @override_settings(LEAD_INTAKE_BUFFER_SIZE=100)
+    def test_retry_after_database_error(self):
+        """Тест проверяет, что при ошибке базы лиды остаются в буфере."""
+        buffer = LeadIntakeBuffer(background=False)
+        buffer.add(self.entries('a'))
+        with mock.patch('crm.leads.intake.save_intake', side_effect=OperationalError), \
+                self.assertLogs('crm.leads.intake', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.pending_keys(['a']), {'a'})
+        self.assertEqual(buffer.flush(), 1)
+
+    @override_settings(LEAD_INTAKE_BUFFER_SIZE=100)
+    def test_bad_lead_is_dropped_alone(self):
+        """
+        Тест проверяет, что лид, который нельзя сохранить, отбрасывается один,
+        а остальные лиды пачки сохраняются и не возвращаются в буфер.
+        """
+        buffer = LeadIntakeBuffer(background=False)
+        entries = self.entries('a', 'b', 'c', 'd', 'e')
+        entries[2][1].comment = 'Ошибка'
+
+        def save(chunk):
+            if any(lead.comment == 'Ошибка' for _, lead in chunk):
+                raise DataError('value too long')
+            return save_intake(chunk)
+
+        buffer.add(entries)
+        with mock.patch('crm.leads.intake.save_intake', side_effect=save), \
+                self.assertLogs('crm.leads.intake', 'ERROR') as logs:
+            self.assertEqual(buffer.flush(), 4)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('idempotency key c', logs.output[0])
+        self.assertEqual(buffer.pending_keys('abcde'), set())
+        self.assertEqual(set(IntakeKey.objects.values_list('key', flat=True)), set('abde'))
+        self.assertEqual(find_campaign_stats_drift(), [])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL specific')
+    @override_settings(LEAD_INTAKE_BUFFER_SIZE=100)
+    def test_too_long_email(self):
+        """Тест проверяет, что лид с почтой длиннее столбца не блокирует сохранение остальных."""
+        buffer = LeadIntakeBuffer(background=False)
+        entries = self.entries('a', 'b', 'c')
+        entries[1][1].email = f'{"a" * 64}@{"b" * 200}.com'
+        buffer.add(entries)
+        with self.assertLogs('crm.leads.intake', 'ERROR'):
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.pending_keys('abc'), set())
+        self.assertEqual(Lead.objects.filter(last_name='Петров').count(), 2)
+        self.assertEqual(buffer.flush(), 0)
+
+    @override_settings(LEAD_INTAKE_BUFFER_SIZE=100)
+    def test_retry_rest_after_connection_error(self):
+        """
+        Тест проверяет, что при ошибке соединения во время деления пачки в
+        буфер возвращаются только несохраненные лиды.
+        """
+        buffer = LeadIntakeBuffer(background=False)
+        entries = self.entries('a', 'b', 'c', 'd')
+        calls = []
+
+        def save(chunk):
+            calls.append(chunk)
+            if len(calls) == 1:
+                raise DataError('value too long')
+            if len(calls) == 3:
+                raise OperationalError('connection lost')
+            return save_intake(chunk)
+
+        buffer.add(entries)
+        with mock.patch('crm.leads.intake.save_intake', side_effect=save), \
+                self.assertLogs('crm.leads.intake', 'ERROR'):
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.pending_keys('abcd'), {'c', 'd'})
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(Lead.objects.filter(last_name='Петров').count(), 4)
+
+    def test_claim_keys(self):
+        """Тест проверяет, что claim_keys возвращает только новые ключи."""
+        self.assertEqual(claim_keys(['a', 'b']), {'a', 'b'})
+        self.assertEqual(claim_keys(['b', 'c']), {'c'})
+
+
+class CreateIntakeTokenCommandTest(LeadModelMixinTest, TestCase):
+    """Тесты для команды create_intake_token."""
+
+    def test_command(self):
+        """Тест проверяет выдачу ключа, по которому находится кампания."""
+        stdout = StringIO()
+        call_command('create_intake_token', str(self.ads.pk), '--name', 'Площадка',
+                     stdout=stdout)
+        token = IntakeToken.objects.get(token_hash=IntakeToken.hash_token(stdout.getvalue()
+                                                                          .strip()))
+        self.assertEqual((token.ads, token.name), (self.ads, 'Площадка'))
+        with self.assertRaisesMessage(CommandError, 'Campaign 0 does not exist'):
+            call_command('create_intake_token', '0')
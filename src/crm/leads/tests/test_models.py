@@ -1,6 +1,12 @@
+import importlib
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection
 from django.test import TestCase
 
 from ..models import Lead
+from ..service import normalize_phone
 from ...ads.tests.test_models import AdsModelMixinTest
 
 
@@ -61,3 +67,51 @@ class LeadModelTest(LeadModelMixinTest,TestCase):
     def test_get_absolute_url(self):
         """Тест проверяет, что метод get_absolute_url возвращает корректный URL."""
         self.assertEqual(self.lead.get_absolute_url(), f"/leads/{self.lead.id}/")
+
+
+class LeadPhoneNormalizedTest(LeadModelMixinTest, TestCase):
+    """Тесты для нормализованного телефона потенциального клиента."""
+
+    def test_normalize_phone(self):
+        """Тест проверяет приведение номеров к виду E.164."""
+        cases = {'89996660000': '+79996660000',
+                 '+7 (999) 666-00-00': '+79996660000',
+                 '9996660000': '+79996660000',
+                 '+375291112233': '+375291112233',
+                 '': ''}
+        for phone, expected in cases.items():
+            with self.subTest(phone=phone):
+                self.assertEqual(normalize_phone(phone), expected)
+
+    def test_save(self):
+        """Тест проверяет заполнение нормализованного телефона при сохранении."""
+        self.assertEqual(self.lead.phone_normalized, '+79996660000')
+        self.lead.phone = '+79991112233'
+        self.lead.save(update_fields=['phone'])
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.phone_normalized, '+79991112233')
+
+    def test_bulk_create(self):
+        """Тест проверяет заполнение нормализованного телефона в bulk_create."""
+        Lead.objects.bulk_create([Lead(first_name='Петр', last_name='Петров',
+                                       phone='89991112233', ads=self.ads)])
+        self.assertEqual(Lead.objects.get(last_name='Петров').phone_normalized,
+                         '+79991112233')
+
+    def test_backfill(self):
+        """Тест проверяет заполнение нормализованных телефонов миграцией."""
+        migration = importlib.import_module('crm.leads.migrations.0004_phone_normalized')
+        Lead.objects.bulk_create([Lead(first_name='Петр', last_name='Петров',
+                                       phone='89991112233', ads=self.ads)])
+        Lead.objects.update(phone_normalized='')
+        with mock.patch.object(migration, 'BATCH_SIZE', 1):
+            migration.backfill_phone_normalized(apps, mock.Mock(connection=connection))
+        self.assertEqual(set(Lead.objects.values_list('phone_normalized', flat=True)),
+                         {'+79996660000', '+79991112233'})
+
+    def test_backfill_name_key(self):
+        """Тест проверяет заполнение ключей имен миграцией."""
+        migration = importlib.import_module('crm.leads.migrations.0005_lead_duplicates')
+        Lead.objects.update(name_key='')
+        migration.backfill_name_key(apps, mock.Mock(connection=connection))
+        self.assertEqual(Lead.objects.get(pk=self.lead.pk).name_key, 'ivan ivanov')
@@ -1,20 +1,28 @@
+import unittest
+from urllib.parse import urlsplit
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.core.cache import cache
+from django.db import connection
 from django.http import HttpResponseRedirect
 from django.test import Client
 from django.test import TestCase
 from django.urls import reverse
 from django.urls import reverse_lazy
 
+from crm.core.db.search import get_prefix_index
+from crm.core.testing import PerformanceBudgetMixin, performance_budget
+from crm.customers.tests.test_models import CustomerModelMixinTest
 from crm.leads.forms import LeadForm
 from crm.leads.models import Lead
+from crm.leads.views import LeadAutocompleteView
 from crm.leads.tests.test_models import LeadModelMixinTest
 
 User = get_user_model()
 
 
-class LeadMixinViewTest(LeadModelMixinTest, TestCase):
+class LeadMixinViewTest(PerformanceBudgetMixin, LeadModelMixinTest, TestCase):
     """Миксин для тестов классов LeadView."""
 
     @classmethod
@@ -34,6 +42,7 @@ class LeadCreateViewTest(LeadMixinViewTest, TestCase):
         self.user.user_permissions.add(*self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_url(self):
         """
         Тест проверяет, что после успешного создания нового
@@ -66,6 +75,7 @@ class LeadCreateViewTest(LeadMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.leads:leads_create'))
         self.assertTemplateUsed(response, 'leads/leads-create.html')
 
+    @performance_budget
     def test_with_permission_add_lead(self):
         """
         Тест проверяет, что с разрешением add_lead
@@ -90,6 +100,7 @@ class LeadListViewTest(LeadMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_count_leads_in_list(self):
         """Тест проверяет, что список потенциальных клиентов содержит 1 элемент."""
         response = self.client.get(reverse_lazy('crm.leads:leads_list'))
@@ -100,6 +111,7 @@ class LeadListViewTest(LeadMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.leads:leads_list'))
         self.assertTemplateUsed(response, 'leads/leads-list.html')
 
+    @performance_budget
     def test_with_permission_view_lead(self):
         """
         Тест проверяет, что с разрешением view_lead пользователь
@@ -130,6 +142,7 @@ class LeadDetailViewTest(LeadMixinViewTest, TestCase):
                                            kwargs={'pk': self.lead.pk}))
         self.assertTemplateUsed(response, 'leads/leads-detail.html')
 
+    @performance_budget
     def test_with_permission_view_lead(self):
         """
         Тест проверяет, что с разрешением view_lead пользователь
@@ -163,6 +176,7 @@ class LeadUpdateViewTest(LeadMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_update_lead(self):
         """
         Тест проверяет, что после успешного обновления данных
@@ -196,6 +210,7 @@ class LeadUpdateViewTest(LeadMixinViewTest, TestCase):
                                            kwargs={'pk': self.lead.pk}))
         self.assertTemplateUsed(response, 'leads/leads-edit.html')
 
+    @performance_budget
     def test_with_permission_change_lead(self):
         """
         Тест проверяет, что с разрешением change_lead
@@ -222,6 +237,7 @@ class LeadDeleteViewTest(LeadMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_delete_lead(self):
         """
         Тест проверяет, что после успешного удаления клиента
@@ -240,6 +256,7 @@ class LeadDeleteViewTest(LeadMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.leads:leads_delete', kwargs={'pk': self.lead.pk}))
         self.assertTemplateUsed(response, 'leads/leads-delete.html')
 
+    @performance_budget
     def test_with_permission_delete_lead(self):
         """Тест проверяет, что с разрешением delete_lead пользователь может удалять клиентов."""
         response = self.client.get(reverse('crm.leads:leads_delete', kwargs={'pk': self.lead.pk}))
@@ -260,23 +277,22 @@ class LeadTransferToActiveViewTest(LeadMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
-    def test_product_id_cached_and_redirects(self):
+    def test_lead_id_handed_off_and_redirects(self):
         """
-        Тест проверяет, что в кэш сохраняется значение lead_id и
-        происходит перенаправление к созданию покупателя.
+        Тест проверяет, что значение lead_id передается в запросе
+        и форма создания покупателя предзаполняется им.
         """
-        cache.clear()
-        cached_lead_id = cache.get('lead_id')
-        self.assertIsNone(cached_lead_id)
-
+        self.user.user_permissions.add(Permission.objects.get(codename='add_customer'))
         response = self.client.get(reverse('crm.leads:leads_to_active',
                                            kwargs={'pk': self.lead.pk}))
-        cached_lead_id = cache.get('lead_id')
-        self.assertEqual(cached_lead_id, self.lead.pk)
-
         self.assertIsInstance(response, HttpResponseRedirect)
-        self.assertEqual(response.url, reverse('crm.customers:customer_create'))
+        self.assertEqual(urlsplit(response.url).path, reverse('crm.customers:customer_create'))
+
+        cache.clear()
+        response = self.client.get(response.url)
+        self.assertEqual(response.context['form']['lead'].value(), self.lead.pk)
 
+    @performance_budget
     def test_with_permission_can_transfer_to_active(self):
         """
         Тест проверяет, что с разрешением can_transfer_to_active
@@ -285,7 +301,7 @@ class LeadTransferToActiveViewTest(LeadMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.leads:leads_to_active',
                                            kwargs={'pk': self.lead.pk}))
         self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse('crm.customers:customer_create'))
+        self.assertEqual(urlsplit(response.url).path, reverse('crm.customers:customer_create'))
 
     def test_without_permission_can_transfer_to_active(self):
         """
@@ -307,23 +323,22 @@ class LeadTransferToContractViewTest(LeadMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
-    def test_product_id_cached_and_redirects(self):
+    def test_lead_id_handed_off_and_redirects(self):
         """
-        Тест проверяет, что в кэш сохраняется значение lead_id и
-        происходит перенаправление к созданию контракта.
+        Тест проверяет, что значение lead_id передается в запросе
+        и форма создания контракта предзаполняется им.
         """
-        cache.clear()
-        cached_lead_id = cache.get('lead_id')
-        self.assertIsNone(cached_lead_id)
-
         response = self.client.get(reverse('crm.leads:leads_to_contract',
                                            kwargs={'pk': self.lead.pk}))
-        cached_lead_id = cache.get('lead_id')
-        self.assertEqual(cached_lead_id, self.lead.pk)
-
         self.assertIsInstance(response, HttpResponseRedirect)
-        self.assertEqual(response.url, reverse('crm.contracts:contract_create'))
+        self.assertEqual(urlsplit(response.url).path, reverse('crm.contracts:contract_create'))
+
+        cache.clear()
+        response = self.client.get(response.url)
+        self.assertEqual(response.context['form']['lead'].value(), self.lead.pk)
+        self.assertEqual(response.context['form']['ads'].value(), self.ads.pk)
 
+    @performance_budget
     def test_with_permission_can_transfer_to_contract(self):
         """
         Тест проверяет, что с разрешением can_transfer_to_contract
@@ -332,7 +347,7 @@ class LeadTransferToContractViewTest(LeadMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.leads:leads_to_contract',
                                            kwargs={'pk': self.lead.pk}))
         self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse('crm.contracts:contract_create'))
+        self.assertEqual(urlsplit(response.url).path, reverse('crm.contracts:contract_create'))
 
     def test_without_permission_can_transfer_to_contract(self):
         """
@@ -343,3 +358,113 @@ class LeadTransferToContractViewTest(LeadMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.leads:leads_to_contract',
                                            kwargs={'pk': self.lead.pk}))
         self.assertEqual(response.status_code, 403)
+
+
+class LeadAutocompleteViewTest(LeadMixinViewTest, TestCase):
+    """Тесты для класса LeadAutocompleteView."""
+
+    def setUp(self):
+        """Метод подготавливает тестовые фикстуры пользователя, разрешения, клиента."""
+        self.permission = Permission.objects.get(codename='view_lead')
+        self.user.user_permissions.add(self.permission)
+        self.client.login(username='test_user', password='test_password')
+        self.url = reverse('crm.leads:leads_autocomplete')
+
+    @performance_budget
+    def test_prefix_search(self):
+        """Тест проверяет поиск по началу фамилии, имени и телефона без учета регистра."""
+        Lead.objects.create(first_name='Петр', last_name='Петров', phone='89991110000',
+                            ads=self.ads)
+        for term in ('иван', 'ИВАНОВ', '8999666'):
+            with self.subTest(term=term):
+                response = self.client.get(self.url, {'q': term})
+                self.assertEqual(response.json()['results'],
+                                 [{'id': self.lead.pk, 'text': str(self.lead)}])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL specific')
+    def test_prefix_indexes(self):
+        """Тест проверяет, что для поиска по началу полей созданы индексы."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'leads_lead'")
+            indexes = {row[0] for row in cursor.fetchall()}
+        for field in LeadAutocompleteView.search_fields:
+            self.assertIn(get_prefix_index(Lead, field).name, indexes)
+
+    def test_to_active_filter(self):
+        """Тест проверяет, что параметр to_active ограничивает выдачу."""
+        active = Lead.objects.create(first_name='Петр', last_name='Петров',
+                                     phone='89991110000', ads=self.ads, to_active=True)
+        response = self.client.get(self.url, {'to_active': '1'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [active.pk])
+        response = self.client.get(self.url, {'to_active': '0'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.lead.pk])
+
+    @performance_budget
+    def test_pagination(self):
+        """Тест проверяет, что выдача разбивается на страницы по курсору next."""
+        Lead.objects.bulk_create(
+            Lead(first_name='Иван', last_name=f'Иванов {number}', phone='89990000000',
+                 ads=self.ads)
+            for number in range(25))
+        first = self.client.get(self.url, {'q': 'Иван'}).json()
+        self.assertEqual(len(first['results']), 20)
+        second = self.client.get(self.url, {'q': 'Иван', 'after': first['next']}).json()
+        self.assertEqual(len(second['results']), 6)
+        self.assertIsNone(second['next'])
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_without_permission_view_lead(self):
+        """Тест проверяет, что без разрешения view_lead пользователь получает ошибку 403."""
+        self.user.user_permissions.remove(self.permission)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+
+class LeadPhoneLookupViewTest(PerformanceBudgetMixin, CustomerModelMixinTest, TestCase):
+    """Тесты для класса LeadPhoneLookupView."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Метод создает покупателя и пользователя с разрешением view_lead."""
+        super().setUpTestData()
+        cls.user = User.objects.create_user('test_user', password='test_password')
+        cls.user.user_permissions.add(Permission.objects.get(codename='view_lead'))
+
+    def setUp(self):
+        """Метод авторизует пользователя."""
+        self.client.login(username='test_user', password='test_password')
+        self.url = reverse('crm.leads:leads_lookup')
+
+    @performance_budget
+    def test_exact_match(self):
+        """Тест проверяет поиск по номеру в другом формате с покупателем и контрактом."""
+        response = self.client.get(self.url, {'phone': '+7 (999) 666-00-00'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['phone'], data['match']), ('+79996660000', 'exact'))
+        [lead] = data['leads']
+        self.assertEqual((lead['id'], lead['name']), (self.lead.pk, 'Иван Иванов'))
+        self.assertEqual([customer['id'] for customer in lead['customers']],
+                         [self.customer.pk])
+        self.assertEqual(lead['contracts'][0]['id'], self.contract.pk)
+        self.assertEqual(lead['contracts'][0]['end_day'], '2024-01-30')
+
+    def test_suffix_match(self):
+        """Тест проверяет поиск по последним 10 цифрам номера с другим кодом страны."""
+        data = self.client.get(self.url, {'phone': '+19996660000'}).json()
+        self.assertEqual(data['match'], 'suffix')
+        self.assertEqual([lead['id'] for lead in data['leads']], [self.lead.pk])
+
+    def test_not_found(self):
+        """Тест проверяет ответ для неизвестного и слишком короткого номера."""
+        for phone in ('89990000000', '12345', ''):
+            with self.subTest(phone=phone):
+                data = self.client.get(self.url, {'phone': phone}).json()
+                self.assertEqual((data['match'], data['leads']), (None, []))
+
+    def test_without_permission_view_lead(self):
+        """Тест проверяет, что без разрешения view_lead пользователь получает ошибку 403."""
+        self.user.user_permissions.clear()
+        response = self.client.get(self.url, {'phone': '89996660000'})
+        self.assertEqual(response.status_code, 403)
@@ -6,7 +6,13 @@ from .views import (LeadListView,
                     LeadUpdateView,
                     LeadDeleteView,
                     LeadTransferToActiveView,
-                    LeadTransferToContractView)
+                    LeadTransferToContractView,
+                    LeadAutocompleteView,
+                    LeadPhoneLookupView,
+                    LeadDuplicateListView,
+                    LeadDuplicateResolveView,
+                    LeadImportView,
+                    LeadImportReportView)
 
 app_name = 'crm.leads'
 
@@ -17,5 +23,12 @@ urlpatterns = [
     path('<int:pk>/delete/', LeadDeleteView.as_view(), name='leads_delete'),
     path('<int:pk>/to_active/', LeadTransferToActiveView.as_view(), name='leads_to_active'),
     path('<int:pk>/to_contract/', LeadTransferToContractView.as_view(), name='leads_to_contract'),
+    path('autocomplete/', LeadAutocompleteView.as_view(), name='leads_autocomplete'),
+    path('lookup/', LeadPhoneLookupView.as_view(), name='leads_lookup'),
+    path('duplicates/', LeadDuplicateListView.as_view(), name='leads_duplicates'),
+    path('duplicates/<int:duplicate>/', LeadDuplicateResolveView.as_view(),
+         name='leads_duplicate_resolve'),
+    path('import/', LeadImportView.as_view(), name='leads_import'),
+    path('import/<uuid:report>/', LeadImportReportView.as_view(), name='leads_import_report'),
     path('', LeadListView.as_view(), name='leads_list'),
 ]
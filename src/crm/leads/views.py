@@ -1,18 +1,39 @@
+import json
+import os
+import uuid
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.cache import cache
-from django.http import HttpResponseRedirect
-from django.urls import reverse_lazy
-from django.views.generic import ListView, UpdateView, CreateView, DetailView, DeleteView, View
+from django.db.models.functions import Right
+from django.http import (FileResponse, Http404, HttpResponseBadRequest, HttpResponseRedirect,
+                         JsonResponse)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.html import format_html, format_html_join
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.views.generic import (ListView, UpdateView, CreateView, DetailView, DeleteView, View,
+                                  FormView)
 
-from .forms import LeadForm
-from .models import Lead
+from .dedup import check_lead, merge_leads
+from .forms import LeadForm, LeadImportForm
+from .importer import LeadImporter, LeadImportError, read_table
+from .intake import authenticate, clean_item, find_known_keys, intake_buffer
+from .models import Lead, LeadDuplicate
+from .service import PHONE_SUFFIX_LENGTH, normalize_phone
+from ..contracts.models import Contract
+from ..core.handoff import handoff_url
+from ..core.mixins import KeysetPaginationMixin
+from ..core.views import AutocompleteView
+from ..customers.models import Customer
 
 
-class LeadListView(PermissionRequiredMixin, ListView):
+class LeadListView(PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     """Класс для отображения списка потенциальных клиентов."""
 
     permission_required = "leads.view_lead"
-    queryset = Lead.objects.filter(to_active=False)
+    queryset = Lead.objects.filter(to_active=False).only('first_name', 'last_name')
     template_name = 'leads/leads-list.html'
     context_object_name = 'leads'
 
@@ -26,21 +47,41 @@ class LeadDetailView(PermissionRequiredMixin, DetailView):
 
 
 class LeadCreateView(PermissionRequiredMixin, CreateView):
-    """Класс для создания потенциального клиента."""
+    """
+    Класс для создания потенциального клиента.
+
+    Новый лид сразу проверяется на дубли (см. check_lead), найденные
+    пары попадают в очередь на проверку и показываются в сообщении.
+    """
 
     permission_required = "leads.add_lead"
     form_class = LeadForm
     template_name = 'leads/leads-create.html'
     success_url = reverse_lazy('crm.leads:leads_list')
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        duplicates = check_lead(self.object)
+        if duplicates:
+            others = [duplicate.lead_id if duplicate.duplicate_id == self.object.pk
+                      else duplicate.duplicate_id for duplicate in duplicates]
+            links = format_html_join(', ', '<a href="{}" class="alert-link">{}</a>', (
+                (lead.get_absolute_url(), lead)
+                for lead in Lead.objects.filter(pk__in=others).only('first_name', 'last_name')))
+            messages.warning(self.request, format_html(
+                'Лид {} похож на уже созданных: {}. <a href="{}" class="alert-link">'
+                'Проверить дубли</a>', self.object, links,
+                reverse('crm.leads:leads_duplicates')))
+        return response
+
 
 class LeadUpdateView(PermissionRequiredMixin, UpdateView):
     """Класс для обновления данных потенциального клиента."""
 
     permission_required = "leads.change_lead"
     model = Lead
+    form_class = LeadForm
     template_name = 'leads/leads-edit.html'
-    fields = '__all__'
     success_url = reverse_lazy('crm.leads:leads_list')
 
 
@@ -59,9 +100,9 @@ class LeadTransferToActiveView(PermissionRequiredMixin, View):
     permission_required = "leads.can_transfer_to_active"
 
     def get(self, request, *args, **kwargs):
-        """Метод get сохраняет в кэш значение lead_id и запускает создание покупателя"""
-        cache.set('lead_id', kwargs['pk'], timeout=5)
-        return HttpResponseRedirect(reverse_lazy('crm.customers:customer_create'))
+        """Метод get передает значение lead_id в создание покупателя и запускает его"""
+        return HttpResponseRedirect(handoff_url(request, 'crm.customers:customer_create',
+                                                lead_id=kwargs['pk']))
 
 
 class LeadTransferToContractView(PermissionRequiredMixin, View):
@@ -70,6 +111,246 @@ class LeadTransferToContractView(PermissionRequiredMixin, View):
     permission_required = "contracts.add_contract"
 
     def get(self, request, *args, **kwargs):
-        """Метод get сохраняет в кэш значение lead_id и запускает создание контракта"""
-        cache.set('lead_id', kwargs['pk'], timeout=5)
-        return HttpResponseRedirect(reverse_lazy('crm.contracts:contract_create'))
+        """Метод get передает значение lead_id в создание контракта и запускает его"""
+        return HttpResponseRedirect(handoff_url(request, 'crm.contracts:contract_create',
+                                                lead_id=kwargs['pk']))
+
+
+class LeadAutocompleteView(AutocompleteView):
+    """
+    Класс для поиска потенциальных клиентов по началу фамилии, имени или телефона.
+
+    Параметр to_active=0 или to_active=1 ограничивает выдачу
+    потенциальными или переведенными в активные клиентами.
+    """
+
+    permission_required = "leads.view_lead"
+    queryset = Lead.objects.only('first_name', 'last_name')
+    search_fields = ('last_name', 'first_name', 'phone')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        to_active = self.request.GET.get('to_active')
+        if to_active in ('0', '1'):
+            queryset = queryset.filter(to_active=to_active == '1')
+        return queryset
+
+
+class LeadPhoneLookupView(PermissionRequiredMixin, View):
+    """
+    Класс JSON-эндпоинта поиска звонящего по номеру телефона (параметр phone).
+
+    Номер нормализуется (см. normalize_phone) и ищется по индексу
+    phone_normalized, а если совпадений нет — по индексу последних
+    PHONE_SUFFIX_LENGTH цифр, то есть без учета кода страны. Для найденных
+    потенциальных клиентов (не больше max_results, новые первыми)
+    возвращаются их покупатели и контракты. Всего выполняется не больше
+    четырех запросов по индексам.
+    """
+
+    permission_required = "leads.view_lead"
+    max_results = 20
+
+    def get(self, request, *args, **kwargs):
+        """Метод get возвращает найденных потенциальных клиентов с покупателями и контрактами."""
+        phone = normalize_phone(request.GET.get('phone', ''))
+        response = {'phone': phone, 'match': None, 'leads': []}
+        if len(phone) <= PHONE_SUFFIX_LENGTH:
+            return JsonResponse(response)
+        queryset = Lead.objects.order_by('-pk').values(
+            'pk', 'first_name', 'last_name', 'phone', 'ads_id', 'to_active')
+        leads = list(queryset.filter(phone_normalized=phone)[:self.max_results])
+        response['match'] = 'exact'
+        if not leads:
+            leads = list(queryset.alias(suffix=Right('phone_normalized', PHONE_SUFFIX_LENGTH))
+                         .filter(suffix=phone[-PHONE_SUFFIX_LENGTH:])[:self.max_results])
+            response['match'] = 'suffix' if leads else None
+        if not leads:
+            return JsonResponse(response)
+
+        lead_ids = [lead['pk'] for lead in leads]
+        customers, contracts = {}, {}
+        for customer in (Customer.objects.filter(lead_id__in=lead_ids)
+                         .values('pk', 'lead_id', 'contract_id')):
+            customers.setdefault(customer['lead_id'], []).append({
+                'id': customer['pk'],
+                'contract': customer['contract_id'],
+                'url': reverse('crm.customers:customer_detail', args=[customer['pk']]),
+            })
+        for contract in (Contract.objects.filter(lead_id__in=lead_ids).order_by('-end_day')
+                         .values('pk', 'lead_id', 'name', 'cost', 'start_day', 'end_day')):
+            contracts.setdefault(contract['lead_id'], []).append({
+                'id': contract['pk'],
+                'name': contract['name'],
+                'cost': str(contract['cost']),
+                'start_day': contract['start_day'],
+                'end_day': contract['end_day'],
+                'url': reverse('crm.contracts:contract_detail', args=[contract['pk']]),
+            })
+        response['leads'] = [{
+            'id': lead['pk'],
+            'name': f"{lead['first_name']} {lead['last_name']}".strip(),
+            'phone': lead['phone'],
+            'ads': lead['ads_id'],
+            'to_active': lead['to_active'],
+            'url': reverse('crm.leads:leads_detail', args=[lead['pk']]),
+            'customers': customers.get(lead['pk'], []),
+            'contracts': contracts.get(lead['pk'], []),
+        } for lead in leads]
+        return JsonResponse(response)
+
+
+class LeadDuplicateListView(PermissionRequiredMixin, KeysetPaginationMixin, ListView):
+    """
+    Класс для отображения очереди возможных дублей потенциальных клиентов
+    (см. dedup.py), самые похожие пары первыми.
+    """
+
+    permission_required = "leads.view_leadduplicate"
+    queryset = (LeadDuplicate.objects.filter(rejected=False)
+                .select_related('lead', 'duplicate'))
+    template_name = 'leads/leads-duplicates.html'
+    context_object_name = 'duplicates'
+    keyset_field = '-score'
+
+
+class LeadDuplicateResolveView(PermissionRequiredMixin, View):
+    """
+    Класс для решения по возможному дублю: action=merge объединяет лиды
+    (см. merge_leads), action=reject оставляет их раздельными.
+    """
+
+    permission_required = ("leads.change_leadduplicate", "leads.delete_lead")
+
+    def post(self, request, *args, **kwargs):
+        """Метод post применяет решение и возвращает к очереди дублей."""
+        suggestion = get_object_or_404(LeadDuplicate.objects.select_related('lead', 'duplicate'),
+                                       pk=kwargs['duplicate'], rejected=False)
+        action = request.POST.get('action')
+        if action == 'merge':
+            if merge_leads(suggestion):
+                messages.success(request, f'Лиды объединены в {suggestion.lead}.')
+            else:
+                messages.warning(request, 'Один из лидов уже удален или объединен.')
+        elif action == 'reject':
+            suggestion.rejected = True
+            suggestion.save(update_fields=['rejected'])
+        else:
+            return HttpResponseBadRequest('Unknown action')
+        return HttpResponseRedirect(reverse('crm.leads:leads_duplicates'))
+
+
+def get_import_report_path(report: uuid.UUID) -> str:
+    """Функция возвращает путь к файлу отчета об ошибках импорта report."""
+    return os.path.join(settings.LEAD_IMPORT_REPORT_DIR, f'{report.hex}.csv')
+
+
+class LeadImportView(PermissionRequiredMixin, FormView):
+    """
+    Класс для импорта потенциальных клиентов из файла CSV или XLSX.
+
+    Строки с ошибками не сохраняются и попадают в отчет, который можно
+    скачать со страницы результата импорта.
+    """
+
+    permission_required = "leads.add_lead"
+    form_class = LeadImportForm
+    template_name = 'leads/leads-import.html'
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        ads = form.cleaned_data['ads']
+        report = uuid.uuid4()
+        path = get_import_report_path(report)
+        os.makedirs(settings.LEAD_IMPORT_REPORT_DIR, exist_ok=True)
+        result = {}
+        try:
+            with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+                table = read_table(upload.file, upload.name, form.cleaned_data['encoding'])
+                importer = LeadImporter(ads.pk if ads else None, settings.LEAD_IMPORT_BATCH_SIZE)
+                result = importer.run(table, file)
+        except LeadImportError as error:
+            form.add_error('file', str(error))
+            return self.form_invalid(form)
+        finally:
+            # Отчет нужен только при ошибочных строках; при ошибке файла он удаляется.
+            if not result.get('errors'):
+                os.remove(path)
+        if result['errors']:
+            result['report'] = report
+        return self.render_to_response(self.get_context_data(form=form, result=result))
+
+
+class LeadImportReportView(PermissionRequiredMixin, View):
+    """Класс для скачивания отчета об ошибках импорта потенциальных клиентов."""
+
+    permission_required = "leads.add_lead"
+
+    def get(self, request, *args, **kwargs):
+        """Метод get возвращает CSV-файл строк, не прошедших проверку при импорте."""
+        path = get_import_report_path(kwargs['report'])
+        if not os.path.exists(path):
+            raise Http404
+        return FileResponse(open(path, 'rb'), as_attachment=True,
+                            filename='lead-import-errors.csv',
+                            content_type='text/csv')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class LeadIntakeView(View):
+    """
+    Класс JSON-эндпоинта приема лидов от рекламных площадок.
+
+    Площадка авторизуется ключом кампании (см. IntakeToken) в заголовке
+    "Authorization: Bearer <ключ>" и передает один лид (объект) или список
+    лидов с полями first_name, last_name, phone, email, comment. Ключ
+    идемпотентности лида задается полем idempotency_key или заголовком
+    Idempotency-Key (для списка к нему добавляется ":<номер лида>");
+    лид с уже принятым ключом не сохраняется повторно. Принятые лиды
+    сохраняются пачками (см. LeadIntakeBuffer), поэтому ответ — 202.
+    """
+
+    def post(self, request, *args, **kwargs):
+        """Метод post проверяет лиды, ставит корректные в очередь сохранения и возвращает итог."""
+        ads_id = authenticate(request)
+        if ads_id is None:
+            return JsonResponse({'error': 'Invalid or missing token.'}, status=401)
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'The body must be JSON.'}, status=400)
+        items = payload if isinstance(payload, list) else [payload]
+        if len(items) > settings.LEAD_INTAKE_MAX_BATCH:
+            return JsonResponse({'error': f'At most {settings.LEAD_INTAKE_MAX_BATCH} leads '
+                                          f'per request.'}, status=413)
+
+        header_key = request.headers.get('Idempotency-Key', '').strip()
+        results, entries = [], []
+        for index, item in enumerate(items):
+            lead, errors = clean_item(item, ads_id)
+            if lead is None:
+                results.append({'status': 'rejected', 'errors': errors})
+                continue
+            key = str(item.get('idempotency_key') or '').strip()
+            if not key and header_key:
+                key = f'{header_key}:{index}' if isinstance(payload, list) else header_key
+            results.append({'status': 'accepted'})
+            entries.append((f'{ads_id}:{key}'[:255] if key else None, lead, results[-1]))
+
+        keys = [key for key, _, _ in entries if key is not None]
+        known = intake_buffer.pending_keys(keys) | find_known_keys(keys)
+        accepted = []
+        for key, lead, result in entries:
+            if key in known:
+                result['status'] = 'duplicate'
+                continue
+            if key is not None:
+                known.add(key)
+            accepted.append((key, lead))
+        if accepted:
+            intake_buffer.add(accepted)
+
+        counts = {status: sum(result['status'] == status for result in results)
+                  for status in ('accepted', 'duplicate', 'rejected')}
+        status = 400 if counts['rejected'] == len(results) else 202
+        return JsonResponse({**counts, 'results': results}, status=status)
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.10 on 2026-10-18 21:05
+
+from django.db import migrations
+
+from ...core.db.search import AddSearchIndexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        AddSearchIndexes(model_name='product', full_text=['name'], trigram=['name']),
+    ]
@@ -1,3 +1,5 @@
+from urllib.parse import urlsplit
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.core.cache import cache
@@ -7,6 +9,7 @@ from django.test import TestCase
 from django.urls import reverse
 from django.urls import reverse_lazy
 
+from crm.core.testing import PerformanceBudgetMixin, performance_budget
 from crm.products.forms import ProductForm
 from crm.products.models import Product
 from crm.products.tests.test_models import ProductModelMixinTest
@@ -14,7 +17,7 @@ from crm.products.tests.test_models import ProductModelMixinTest
 User = get_user_model()
 
 
-class ProductMixinViewTest(ProductModelMixinTest, TestCase):
+class ProductMixinViewTest(PerformanceBudgetMixin, ProductModelMixinTest, TestCase):
     """Миксин для тестов классов ProductView."""
 
     @classmethod
@@ -34,6 +37,7 @@ class ProductCreateViewTest(ProductMixinViewTest, TestCase):
         self.user.user_permissions.add(*self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_url(self):
         """
         Тест проверяет, что после успешного создания нового
@@ -63,6 +67,7 @@ class ProductCreateViewTest(ProductMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.products:product_create'))
         self.assertTemplateUsed(response, 'products/products-create.html')
 
+    @performance_budget
     def test_with_permission_add_product(self):
         """
         Тест проверяет, что с разрешением add_product
@@ -87,6 +92,7 @@ class ProductListViewTest(ProductMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_count_products_in_list(self):
         """Тест проверяет, что список товаров (услуг) содержит 1 элемент."""
         response = self.client.get(reverse_lazy('crm.products:products_list'))
@@ -97,6 +103,7 @@ class ProductListViewTest(ProductMixinViewTest, TestCase):
         response = self.client.get(reverse('crm.products:products_list'))
         self.assertTemplateUsed(response, 'products/products-list.html')
 
+    @performance_budget
     def test_with_permission_view_product(self):
         """
         Тест проверяет, что с разрешением view_product
@@ -127,6 +134,7 @@ class ProductDetailViewTest(ProductMixinViewTest, TestCase):
                                            kwargs={'pk': self.product.pk}))
         self.assertTemplateUsed(response, 'products/products-detail.html')
 
+    @performance_budget
     def test_with_permission_view_product(self):
         """
         Тест проверяет, что с разрешением view_product
@@ -154,6 +162,7 @@ class ProductUpdateViewTest(ProductMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_update_product(self):
         """
         Тест проверяет, что после успешного обновления данных
@@ -180,6 +189,7 @@ class ProductUpdateViewTest(ProductMixinViewTest, TestCase):
                                            kwargs={'pk': self.product.pk}))
         self.assertTemplateUsed(response, 'products/products-edit.html')
 
+    @performance_budget
     def test_with_permission_change_product(self):
         """Тест проверяет, что с разрешением change_product пользователь может создавать новые товары."""
         response = self.client.get(reverse('crm.products:product_edit',
@@ -203,6 +213,7 @@ class ProductDeleteViewTest(ProductMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
+    @performance_budget
     def test_success_delete_product(self):
         """
         Тест проверяет, что после успешного удаления товара
@@ -222,6 +233,7 @@ class ProductDeleteViewTest(ProductMixinViewTest, TestCase):
                                            kwargs={'pk': self.product.pk}))
         self.assertTemplateUsed(response, 'products/products-delete.html')
 
+    @performance_budget
     def test_with_permission_delete_product(self):
         """Тест проверяет, что с разрешением delete_product пользователь может удалять товары."""
         response = self.client.get(reverse('crm.products:product_delete',
@@ -245,23 +257,21 @@ class ProductTransferToAdsViewTest(ProductMixinViewTest, TestCase):
         self.user.user_permissions.add(self.permission)
         self.client.login(username='test_user', password='test_password')
 
-    def test_product_id_cached_and_redirects(self):
+    def test_product_id_handed_off_and_redirects(self):
         """
-        Тест проверяет, что в кэш сохраняется значение product_id и
-        происходит перенаправление к созданию рекламной компании.
+        Тест проверяет, что значение product_id передается в запросе
+        и форма создания рекламной компании предзаполняется им.
         """
-        cache.clear()
-        cached_product_id = cache.get('product_id')
-        self.assertIsNone(cached_product_id)
-
         response = self.client.get(reverse('crm.products:product_to_ads',
                                            kwargs={'pk': self.product.pk}))
-        cached_product_id = cache.get('product_id')
-        self.assertEqual(cached_product_id, self.product.pk)
-
         self.assertIsInstance(response, HttpResponseRedirect)
-        self.assertEqual(response.url, reverse('crm.ads:ads_create'))
+        self.assertEqual(urlsplit(response.url).path, reverse('crm.ads:ads_create'))
+
+        cache.clear()
+        response = self.client.get(response.url)
+        self.assertEqual(response.context['form']['product'].value(), self.product.pk)
 
+    @performance_budget
     def test_with_permission_add_ads(self):
         """
         Тест проверяет, что с разрешением add_ads
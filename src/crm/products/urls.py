@@ -5,7 +5,8 @@ from .views import (ProductListView,
                     ProductDetailView,
                     ProductUpdateView,
                     ProductDeleteView,
-                    ProductTransferToAdsView)
+                    ProductTransferToAdsView,
+                    ProductAutocompleteView)
 
 app_name = 'crm.products'
 
@@ -15,5 +16,7 @@ urlpatterns = [
     path('<int:pk>/edit/', ProductUpdateView.as_view(), name='product_edit'),
     path('<int:pk>/delete/', ProductDeleteView.as_view(), name='product_delete'),
     path('<int:pk>/to_ads/', ProductTransferToAdsView.as_view(), name='product_to_ads'),
+    path('autocomplete/', ProductAutocompleteView.as_view(),
+         name='products_autocomplete'),
     path('', ProductListView.as_view(), name='products_list'),
 ]
@@ -1,5 +1,4 @@
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.cache import cache
 from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy
 from django.views import View
@@ -7,13 +6,16 @@ from django.views.generic import ListView, UpdateView, CreateView, DetailView, D
 
 from .forms import ProductForm
 from .models import Product
+from ..core.handoff import handoff_url
+from ..core.mixins import KeysetPaginationMixin
+from ..core.views import AutocompleteView
 
 
-class ProductListView(PermissionRequiredMixin, ListView):
+class ProductListView(PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     """Класс для отображения списка товаров (услуг)."""
 
     permission_required = "products.view_product"
-    model = Product
+    queryset = Product.objects.only('name')
     template_name = 'products/products-list.html'
     context_object_name = 'products'
 
@@ -59,6 +61,14 @@ class ProductTransferToAdsView(PermissionRequiredMixin, View):
     permission_required = "ads.add_ads"
 
     def get(self, request, *args, **kwargs):
-        """Метод get сохраняет в кэш значение product_id и запускает создание рекламной компании"""
-        cache.set('product_id', kwargs['pk'], timeout=5)
-        return HttpResponseRedirect(reverse_lazy('crm.ads:ads_create'))
+        """Метод get передает значение product_id в создание рекламной компании и запускает его"""
+        return HttpResponseRedirect(handoff_url(request, 'crm.ads:ads_create',
+                                                product_id=kwargs['pk']))
+
+
+class ProductAutocompleteView(AutocompleteView):
+    """Класс для поиска услуг по началу названия."""
+
+    permission_required = "products.view_product"
+    queryset = Product.objects.only('name')
+    search_fields = ('name',)
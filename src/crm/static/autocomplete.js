@@ -0,0 +1,65 @@
+// Поиск вариантов для select[data-autocomplete-url] через JSON-эндпоинт автодополнения.
+// Над списком добавляется поле ввода; введенный текст отправляется параметром q,
+// кнопка «Показать еще» подгружает следующую страницу по курсору next.
+(function () {
+    'use strict';
+
+    function setup(select) {
+        var url = select.dataset.autocompleteUrl;
+        var search = document.createElement('input');
+        var more = document.createElement('button');
+        var timer = null;
+        var next = null;
+
+        search.type = 'search';
+        search.className = 'form-control mb-1';
+        search.placeholder = 'Поиск';
+        more.type = 'button';
+        more.className = 'btn btn-link btn-sm px-0';
+        more.textContent = 'Показать еще';
+        more.hidden = true;
+        select.parentNode.insertBefore(search, select);
+        select.parentNode.insertBefore(more, select.nextSibling);
+
+        function load(append) {
+            var params = new URLSearchParams({q: search.value.trim()});
+            if (append && next !== null) {
+                params.set('after', next);
+            }
+            var separator = url.indexOf('?') === -1 ? '?' : '&';
+            fetch(url + separator + params.toString(), {credentials: 'same-origin'})
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    if (!append) {
+                        Array.prototype.slice.call(select.options).forEach(function (option) {
+                            if (option.value !== '' && !option.selected) {
+                                option.remove();
+                            }
+                        });
+                    }
+                    data.results.forEach(function (item) {
+                        if (!select.querySelector('option[value="' + item.id + '"]')) {
+                            select.add(new Option(item.text, item.id));
+                        }
+                    });
+                    next = data.next;
+                    more.hidden = next === null;
+                });
+        }
+
+        search.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () { load(false); }, 250);
+        });
+        select.addEventListener('focus', function () {
+            if (select.options.length <= 2) {
+                load(false);
+            }
+        }, {once: true});
+        more.addEventListener('click', function () { load(true); });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-autocomplete-url]').forEach(setup);
+    });
+})();
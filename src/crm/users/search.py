@@ -0,0 +1,266 @@
+import re
+from typing import Callable, NamedTuple
+
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower, Upper
+from django.urls import reverse
+
+from ..ads.models import Ads
+from ..contracts.models import Contract
+from ..core.db.search import get_search_query, get_search_vector, has_trigram_indexes
+from ..customers.models import Customer
+from ..leads.dedup import get_trigrams
+from ..leads.models import Lead
+from ..leads.service import TRANSLIT
+from ..products.models import Product
+
+# Запросы короче не выполняются: по одной букве совпадает почти все.
+SEARCH_MIN_LENGTH = 2
+
+# Нечеткий поиск (триграммные индексы) включается с этой длины: у более коротких
+# строк слишком мало триграмм.
+TRIGRAM_MIN_LENGTH = 3
+
+# Число записей каждого типа, которые читаются из базы и ранжируются.
+SEARCH_CANDIDATES = 100
+
+# Число последних записей таблицы, среди которых кандидаты ищутся сначала
+# (см. fetch_candidates).
+SEARCH_RECENT = 10000
+
+SEARCH_MAX_WORDS = 5
+
+WORDS = re.compile(r'[^\W_]+')
+
+
+class SearchResult(NamedTuple):
+    """Класс найденной записи глобального поиска."""
+
+    type: str
+    id: int
+    text: str
+    url: str
+    rank: float
+
+
+class SearchType(NamedTuple):
+    """
+    Класс типа записей глобального поиска: разрешение на просмотр, функция
+    поиска кандидатов (запрос, база, кандидаты уже найденных типов) ->
+    [(pk, текст)] и имя маршрута записи.
+    """
+
+    name: str
+    permission: str
+    find: Callable
+    url_name: str
+
+
+def get_words(text: str) -> list:
+    """Функция возвращает не больше SEARCH_MAX_WORDS слов текста в нижнем регистре."""
+    return WORDS.findall(text.casefold())[:SEARCH_MAX_WORDS]
+
+
+def get_text_query(term: str, prefix: bool) -> str:
+    """
+    Функция возвращает полнотекстовый запрос (синтаксис to_tsquery), в
+    котором каждое слово term ищется как есть и в латинице, а при prefix —
+    по началу, например "(иван:* | ivan:*) & (пет:* | pet:*)".
+    """
+    suffix = ':*' if prefix else ''
+    parts = []
+    for word in get_words(term):
+        variants = dict.fromkeys(variant for variant in (word, word.translate(TRANSLIT))
+                                 if variant)
+        parts.append('(' + ' | '.join(f'{variant}{suffix}' for variant in variants) + ')')
+    return ' & '.join(parts)
+
+
+def get_text_trigrams(text: str) -> frozenset:
+    """Функция возвращает триграммы слов текста в латинице (см. get_trigrams)."""
+    return get_trigrams(' '.join(WORDS.findall(text.casefold())).translate(TRANSLIT))
+
+
+def get_rank(query: frozenset, text: str) -> float:
+    """
+    Функция возвращает оценку совпадения text с запросом (триграммы query,
+    см. get_text_trigrams) от 0 до 1: среднее доли триграмм запроса,
+    найденных в тексте, и коэффициента Жаккара их триграмм.
+    """
+    found = get_text_trigrams(text)
+    if not query or not found:
+        return 0.0
+    common = len(query & found)
+    return round((common / len(query) + common / len(query | found)) / 2, 3)
+
+
+def get_words_condition(term: str, *fields) -> Q:
+    """
+    Функция возвращает условие, по которому каждое слово term содержится в
+    одном из полей fields (без учета регистра).
+    """
+    condition = Q()
+    for word in WORDS.findall(term)[:SEARCH_MAX_WORDS]:
+        word_condition = Q()
+        for field in fields:
+            word_condition |= Q(**{f'{field}__icontains': word})
+        condition &= word_condition
+    return condition
+
+
+def fetch_candidates(queryset, recent: Q, indexed: Q, *fields) -> list:
+    """
+    Функция возвращает (pk, *fields) не больше SEARCH_CANDIDATES записей queryset.
+
+    Сначала по условию recent проверяются последние SEARCH_RECENT записей
+    таблицы (обратным проходом по первичному ключу), и частое слово
+    находится там сразу: GIN-индекс не останавливается на LIMIT и для
+    такого слова прочитал бы сотни тысяч ссылок. Если кандидатов меньше
+    SEARCH_CANDIDATES, они дополняются записями всей таблицы по условию
+    indexed, которое должно выполняться по индексам.
+
+    Начало окна читается отдельным запросом: с границей-подзапросом
+    планировщик не знает размера окна и для частых слов выбирает чтение
+    GIN-индекса.
+    """
+    start = (queryset.model.objects.using(queryset.db).order_by('-pk')
+             .values_list('pk', flat=True)[SEARCH_RECENT - 1:SEARCH_RECENT].first() or 0)
+    rows = {row[0]: row for row in queryset.filter(recent, pk__gte=start).order_by('-pk')
+            .values_list('pk', *fields)[:SEARCH_CANDIDATES]}
+    if len(rows) < SEARCH_CANDIDATES:
+        for row in queryset.filter(indexed).order_by().values_list('pk', *fields)[
+                :SEARCH_CANDIDATES]:
+            rows.setdefault(row[0], row)
+    return list(rows.values())[:SEARCH_CANDIDATES]
+
+
+def find_by_name(queryset, field: str, term: str, database) -> list:
+    """
+    Функция возвращает (pk, значение field) записей queryset для запроса term.
+
+    Среди последних записей (см. fetch_candidates) ищутся значения со
+    всеми словами term. По всей таблице в PostgreSQL слова ищутся
+    полнотекстовым индексом field, а при наличии триграммного индекса field
+    ищется еще и по подстроке и сходству (опечатки) по нему (см.
+    AddSearchIndexes). В остальных базах по всей таблице, как и среди
+    последних записей, ищутся значения со всеми словами term.
+    """
+    recent = get_words_condition(term, field)
+    if database.vendor != 'postgresql':
+        return fetch_candidates(queryset, recent, recent, field)
+    queryset = queryset.alias(**{f'{field}_vector': get_search_vector(field)})
+    indexed = Q(**{f'{field}_vector': get_search_query(get_text_query(term, prefix=False))})
+    if len(term) >= TRIGRAM_MIN_LENGTH and has_trigram_indexes(database, queryset.model, field):
+        queryset = queryset.alias(**{f'{field}_upper': Upper(field)})
+        indexed |= (Q(**{f'{field}__icontains': term})
+                    | Q(**{f'{field}_upper__trigram_similar': term}))
+    return fetch_candidates(queryset, recent, indexed, field)
+
+
+def find_leads(term: str, database, found: dict) -> list:
+    """
+    Функция возвращает (pk, имя) потенциальных клиентов для запроса term.
+
+    В PostgreSQL слова ищутся в поле search_vector (имя и фамилия,
+    приведенные к основе, и ключ имени в латинице): среди последних
+    записей (см. fetch_candidates) — по началу, по всей таблице — целиком.
+    Почта ищется точным совпадением без учета регистра, а при наличии
+    триграммных индексов имя, фамилия и почта ищутся еще и по подстроке и
+    сходству. В остальных базах каждое слово term ищется по подстроке в
+    имени, фамилии или почте (см. get_words_condition).
+    """
+    queryset = Lead.objects.using(database.alias)
+    if database.vendor != 'postgresql':
+        condition = get_words_condition(term, 'first_name', 'last_name', 'email')
+        rows = fetch_candidates(queryset, condition, condition, 'first_name', 'last_name')
+    else:
+        queryset = queryset.alias(email_lower=Lower('email'))
+        recent = indexed = Q(email_lower=term.casefold())
+        recent |= Q(search_vector=get_search_query(get_text_query(term, prefix=True)))
+        indexed |= Q(search_vector=get_search_query(get_text_query(term, prefix=False)))
+        if len(term) >= TRIGRAM_MIN_LENGTH and has_trigram_indexes(
+                database, Lead, 'first_name', 'last_name', 'email'):
+            queryset = queryset.alias(first_name_upper=Upper('first_name'),
+                                      last_name_upper=Upper('last_name'))
+            indexed |= (Q(first_name_upper__trigram_similar=term)
+                        | Q(last_name_upper__trigram_similar=term) | Q(email__icontains=term))
+        rows = fetch_candidates(queryset, recent, indexed, 'first_name', 'last_name')
+    return [(pk, f'{first_name} {last_name}'.strip()) for pk, first_name, last_name in rows]
+
+
+def find_customers(term: str, database, found: dict) -> list:
+    """
+    Функция возвращает (pk, имя) покупателей среди найденных потенциальных
+    клиентов (см. find_leads).
+    """
+    names = dict(found['lead'] if 'lead' in found else find_leads(term, database, found))
+    return [(pk, names[lead_id]) for pk, lead_id in
+            Customer.objects.using(database.alias).filter(lead_id__in=names)
+            .values_list('pk', 'lead_id')[:SEARCH_CANDIDATES]]
+
+
+def find_contracts(term: str, database, found: dict) -> list:
+    """Функция возвращает (pk, название) контрактов для запроса term."""
+    return find_by_name(Contract.objects.using(database.alias), 'name', term, database)
+
+
+def find_products(term: str, database, found: dict) -> list:
+    """Функция возвращает (pk, название) услуг для запроса term."""
+    return find_by_name(Product.objects.using(database.alias), 'name', term, database)
+
+
+def find_ads(term: str, database, found: dict) -> list:
+    """Функция возвращает (pk, название) рекламных кампаний для запроса term."""
+    return find_by_name(Ads.objects.using(database.alias), 'name', term, database)
+
+
+SEARCH_TYPES = (
+    SearchType('lead', 'leads.view_lead', find_leads, 'crm.leads:leads_detail'),
+    SearchType('customer', 'customers.view_customer', find_customers,
+               'crm.customers:customer_detail'),
+    SearchType('contract', 'contracts.view_contract', find_contracts,
+               'crm.contracts:contract_detail'),
+    SearchType('product', 'products.view_product', find_products,
+               'crm.products:product_detail'),
+    SearchType('ads', 'ads.view_ads', find_ads, 'crm.ads:ads_detail'),
+)
+
+
+def search(term: str, user, limit: int = 20) -> list:
+    """
+    Функция ищет term во всех типах записей, которые пользователь user
+    может просматривать, и возвращает не больше limit результатов
+    (SearchResult), упорядоченных по оценке совпадения (см. get_rank).
+
+    На каждый тип выполняется не больше трех запросов (см.
+    fetch_candidates), каждый из которых возвращает не больше
+    SEARCH_CANDIDATES записей.
+    """
+    term = term.strip()
+    if len(term) < SEARCH_MIN_LENGTH or not get_words(term):
+        return []
+    database = connections[router.db_for_read(Lead)]
+    query = get_text_trigrams(term)
+    found, candidates = {}, []
+    with transaction.atomic(using=database.alias):
+        if database.vendor == 'postgresql':
+            # Долю совпадений полнотекстового запроса планировщик оценивает
+            # в проценты таблицы и с LIMIT выбирает чтение всей таблицы в
+            # расчете быстро набрать совпадения; если их нет, читаются все
+            # строки. Все условия поиска покрыты индексами. Каждый запрос
+            # читает не больше SEARCH_RECENT строк, и запуск параллельных
+            # процессов обходится дороже самого чтения.
+            with database.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL max_parallel_workers_per_gather = 0')
+        for search_type in SEARCH_TYPES:
+            if not user.has_perm(search_type.permission):
+                continue
+            found[search_type.name] = search_type.find(term, database, found)
+            candidates.extend((get_rank(query, text), search_type, pk, text)
+                              for pk, text in found[search_type.name])
+    candidates.sort(key=lambda candidate: -candidate[0])
+    return [SearchResult(search_type.name, pk, text, reverse(search_type.url_name, args=[pk]),
+                         rank)
+            for rank, search_type, pk, text in candidates[:limit]]
@@ -0,0 +1,99 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, router
+
+from ..ads.models import Ads, CampaignStats
+from ..core.metrics import record_cache
+from ..customers.models import Customer
+from ..leads.models import Lead
+from ..products.models import Product
+
+DASHBOARD_CACHE_KEY = 'dashboard_counters'
+DASHBOARD_LOCK_KEY = 'dashboard_counters:lock'
+LOCK_TIMEOUT = 10
+LOCK_WAIT_STEPS = 20
+LOCK_WAIT_INTERVAL = 0.05
+
+
+def get_counters_sql() -> list:
+    """
+    Функция возвращает список (название счетчика, точный SQL, таблица для оценки).
+    Счетчики лидов и клиентов берутся из таблицы CampaignStats.
+    """
+    def table(model) -> str:
+        return connection.ops.quote_name(model._meta.db_table)
+
+    return [
+        ('products_count', f'SELECT COUNT(*) FROM {table(Product)}', Product),
+        ('advertisements_count', f'SELECT COUNT(*) FROM {table(Ads)}', Ads),
+        ('leads_count',
+         f'SELECT COALESCE(SUM(leads_count), 0) FROM {table(CampaignStats)}', Lead),
+        ('customers_count',
+         f'SELECT COALESCE(SUM(active_customers_count), 0) FROM {table(CampaignStats)}',
+         Customer),
+    ]
+
+
+def fetch_dashboard_counters(approximate: bool = False) -> dict:
+    """
+    Функция получает все счетчики главной страницы одним запросом.
+
+    В приближенном режиме (только PostgreSQL) для таблиц, в которых по
+    оценке планировщика (pg_class.reltuples) не меньше
+    DASHBOARD_COUNTERS_APPROXIMATE_THRESHOLD строк, вместо точного
+    значения возвращается эта оценка.
+    """
+    database = connections[router.db_for_read(CampaignStats)]
+    approximate = approximate and database.vendor == 'postgresql'
+    threshold = settings.DASHBOARD_COUNTERS_APPROXIMATE_THRESHOLD
+    columns, params = [], []
+    for name, exact_sql, model in get_counters_sql():
+        if approximate:
+            estimate = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+            columns.append(f'CASE WHEN ({estimate}) >= %s THEN ({estimate}) '
+                           f'ELSE ({exact_sql}) END AS {name}')
+            params.extend([model._meta.db_table, threshold, model._meta.db_table])
+        else:
+            columns.append(f'({exact_sql}) AS {name}')
+
+    with database.cursor() as cursor:
+        cursor.execute(f'SELECT {", ".join(columns)}', params)
+        row = cursor.fetchone()
+    return {column[0]: int(value) for column, value in zip(cursor.description, row)}
+
+
+def get_dashboard_counters() -> dict:
+    """
+    Функция возвращает счетчики главной страницы из общего кэша.
+
+    Значение считается свежим DASHBOARD_COUNTERS_TIMEOUT секунд, но хранится
+    вдвое дольше. Пересчитывает устаревшее значение только процесс,
+    получивший блокировку в кэше, остальные отдают устаревшее значение,
+    поэтому одновременные запросы не приводят к лавине пересчетов.
+    """
+    timeout = settings.DASHBOARD_COUNTERS_TIMEOUT
+    cached = cache.get(DASHBOARD_CACHE_KEY)
+    record_cache(DASHBOARD_CACHE_KEY, cached is not None)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+
+    locked = cache.add(DASHBOARD_LOCK_KEY, True, LOCK_TIMEOUT)
+    if not locked:
+        if cached is not None:
+            return cached[0]
+        for _ in range(LOCK_WAIT_STEPS):
+            time.sleep(LOCK_WAIT_INTERVAL)
+            cached = cache.get(DASHBOARD_CACHE_KEY)
+            record_cache(DASHBOARD_CACHE_KEY, cached is not None)
+            if cached is not None:
+                return cached[0]
+
+    try:
+        counters = fetch_dashboard_counters(settings.DASHBOARD_COUNTERS_APPROXIMATE)
+        cache.set(DASHBOARD_CACHE_KEY, (counters, time.time() + timeout), timeout * 2)
+    finally:
+        if locked:
+            cache.delete(DASHBOARD_LOCK_KEY)
+    return counters
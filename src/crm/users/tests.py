@@ -1,5 +1,20 @@
+import time
+import unittest
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+
+from .search import get_rank, get_text_query, get_text_trigrams, search
+from ..contracts.models import Contract
+from ..core.db.search import TRIGRAM_EXTENSION, has_trigram_indexes
+from .service import (DASHBOARD_CACHE_KEY, DASHBOARD_LOCK_KEY,
+                      fetch_dashboard_counters, get_dashboard_counters)
+from ..customers.tests.test_models import CustomerModelMixinTest
+from ..leads.models import Lead
 
 
 class UsersManagersTests(TestCase):
@@ -58,3 +73,187 @@ class UsersManagersTests(TestCase):
                 password='123321',
                 is_superuser=False
             )
+
+
+class DashboardCountersTests(CustomerModelMixinTest, TestCase):
+    """
+    Тесты счетчиков главной страницы.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fetch_counters_in_one_query(self):
+        """
+        Тест проверяет, что все счетчики получаются одним запросом.
+        """
+        with self.assertNumQueries(1):
+            counters = fetch_dashboard_counters()
+        self.assertEqual(counters, {'products_count': 1, 'advertisements_count': 1,
+                                    'leads_count': 1, 'customers_count': 1})
+
+    def test_approximate_counters_below_threshold(self):
+        """
+        Тест проверяет, что для маленьких таблиц в приближенном режиме считаются точные значения.
+        """
+        with self.assertNumQueries(1):
+            counters = fetch_dashboard_counters(approximate=True)
+        self.assertEqual(counters['leads_count'], 1)
+
+    def test_counters_are_cached(self):
+        """
+        Тест проверяет, что повторный запрос счетчиков берется из кэша.
+        """
+        get_dashboard_counters()
+        with self.assertNumQueries(0):
+            counters = get_dashboard_counters()
+        self.assertEqual(counters['customers_count'], 1)
+
+    def test_stale_counters_served_while_locked(self):
+        """
+        Тест проверяет, что при чужой блокировке отдается устаревшее значение без запросов.
+        """
+        cache.set(DASHBOARD_CACHE_KEY, ({'leads_count': 7}, time.time() - 1))
+        cache.add(DASHBOARD_LOCK_KEY, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard_counters(), {'leads_count': 7})
+
+    def test_index_view(self):
+        """
+        Тест проверяет, что главная страница выводит счетчики.
+        """
+        get_user_model().objects.create_user('test_user', password='test_password')
+        self.client.login(username='test_user', password='test_password')
+        response = self.client.get(reverse('crm.users:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['leads_count'], 1)
+        self.assertEqual(response.context['products_count'], 1)
+
+
+class SearchTests(CustomerModelMixinTest, TestCase):
+    """
+    Тесты глобального поиска.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """Метод создает тестовые данные, суперпользователя и пользователя с разрешениями."""
+        super().setUpTestData()
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser('admin', password='admin_password')
+        cls.user = User.objects.create_user('test_user', password='test_password')
+        cls.user.user_permissions.add(*Permission.objects.filter(
+            codename__in=('view_contract', 'view_product')))
+
+    def test_text_query(self):
+        """
+        Тест проверяет полнотекстовый запрос с латинским вариантом слов и ранжирование.
+        """
+        self.assertEqual(get_text_query('Иван ivanov!', prefix=True),
+                         '(иван:* | ivan:*) & (ivanov:*)')
+        self.assertEqual(get_text_query('Пётр', prefix=False), '(пётр | petr)')
+        query = get_text_trigrams('Иван Иванов')
+        self.assertEqual(get_rank(query, 'Ivan Ivanov'), 1.0)
+        self.assertGreater(get_rank(query, 'Иван Петров'), get_rank(query, 'Test product'))
+
+    def test_search_types(self):
+        """
+        Тест проверяет, что поиск находит записи всех типов, а лучшие совпадения идут первыми.
+        """
+        results = search('Иван Иванов', self.admin)
+        self.assertEqual([(result.type, result.id) for result in results],
+                         [('lead', self.lead.pk), ('customer', self.customer.pk)])
+        self.assertEqual(results[0].url, self.lead.get_absolute_url())
+        self.assertEqual(results[0].rank, 1.0)
+        self.assertEqual([(result.type, result.id) for result in search('Договор', self.admin)],
+                         [('contract', self.contract.pk)])
+        self.assertLessEqual({'product', 'ads'},
+                             {result.type for result in search('Test', self.admin)})
+
+    def test_permissions(self):
+        """
+        Тест проверяет, что ищутся только типы записей, доступные пользователю.
+        """
+        self.assertEqual([result.type for result in search('Test', self.user)], ['product'])
+        self.assertEqual(search('Иван', self.user), [])
+
+    def test_short_query(self):
+        """
+        Тест проверяет, что слишком короткий запрос не выполняется.
+        """
+        with self.assertNumQueries(0):
+            self.assertEqual(search(' И ', self.admin), [])
+            self.assertEqual(search('!!', self.admin), [])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL specific')
+    def test_search_vector(self):
+        """
+        Тест проверяет заполнение search_vector триггером и поиск по латинице и формам слова.
+        """
+        lead = Lead.objects.create(first_name='Пётр', last_name='Щукин', phone='89991112233',
+                                   ads=self.ads)
+        self.assertEqual([result.id for result in search('petr schukin', self.admin)],
+                         [lead.pk])
+        self.assertEqual([result.id for result in search('Щукина', self.admin)], [lead.pk])
+        lead.last_name = 'Сидоров'
+        lead.save()
+        self.assertEqual(search('Щукин', self.admin), [])
+        self.assertEqual([result.id for result in search('Сидоров', self.admin)], [lead.pk])
+        self.assertEqual([result.id for result in search('TEST@test.com', self.admin)][:1],
+                         [self.lead.pk])
+
+    def has_trigram_extension(self) -> bool:
+        """Метод проверяет, доступно ли в тестовой базе расширение pg_trgm."""
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_available_extensions WHERE name = %s',
+                           [TRIGRAM_EXTENSION])
+            return cursor.fetchone() is not None
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL specific')
+    def test_trigram_indexes(self):
+        """
+        Тест проверяет, что нечеткий поиск включается по наличию триграммных индексов.
+        """
+        self.assertEqual(has_trigram_indexes(connection, Lead, 'first_name', 'last_name'),
+                         self.has_trigram_extension())
+        self.assertFalse(has_trigram_indexes(connection, Lead, 'comment'))
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL specific')
+    def test_trigram_search(self):
+        """
+        Тест проверяет поиск по подстроке и с опечатками по триграммным индексам.
+        """
+        if not self.has_trigram_extension():
+            self.skipTest(f'PostgreSQL extension {TRIGRAM_EXTENSION} is not available')
+        self.assertTrue(has_trigram_indexes(connection, Contract, 'name'))
+        self.assertEqual([result.id for result in search('Иваноф', self.admin)][:1],
+                         [self.lead.pk])
+        self.assertEqual([result.id for result in search('ванов', self.admin)][:1],
+                         [self.lead.pk])
+        self.assertEqual([result.id for result in search('Договр', self.admin)],
+                         [self.contract.pk])
+        self.assertEqual([result.id for result in search('est@test', self.admin)][:1],
+                         [self.lead.pk])
+
+    def test_view(self):
+        """
+        Тест проверяет страницу поиска и ответ в формате JSON.
+        """
+        self.client.login(username='admin', password='admin_password')
+        response = self.client.get(reverse('crm.users:search'), {'q': 'Иван Иванов'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['query'], 'Иван Иванов')
+        self.assertContains(response, self.lead.get_absolute_url())
+        response = self.client.get(reverse('crm.users:search'),
+                                   {'q': 'Договор', 'format': 'json'})
+        self.assertEqual(response.json(), {'query': 'Договор', 'results': [{
+            'type': 'contract', 'id': self.contract.pk, 'text': 'Договор',
+            'url': reverse('crm.contracts:contract_detail', args=[self.contract.pk]),
+            'rank': 1.0}]})
+
+    def test_view_requires_login(self):
+        """
+        Тест проверяет, что поиск недоступен без авторизации.
+        """
+        response = self.client.get(reverse('crm.users:search'), {'q': 'Иван'})
+        self.assertEqual(response.status_code, 302)
@@ -1,9 +1,10 @@
 from django.urls import path
 
-from .views import IndexView
+from .views import IndexView, SearchView
 
 app_name = 'crm.users'
 
 urlpatterns = [
     path('', IndexView.as_view(), name='index'),
+    path('search/', SearchView.as_view(), name='search'),
 ]
@@ -1,11 +1,10 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
 from django.views.generic import TemplateView
 
-from ..ads.models import Ads
+from .search import search
+from .service import get_dashboard_counters
 from ..crm import settings
-from ..customers.models import Customer
-from ..leads.models import Lead
-from ..products.models import Product
 
 
 class IndexView(LoginRequiredMixin, TemplateView):
@@ -13,11 +12,30 @@ class IndexView(LoginRequiredMixin, TemplateView):
 
     template_name = 'users/index.html'
     login_url = settings.LOGIN_URL
+    read_only = True
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["products_count"] = Product.objects.all().count()
-        context["advertisements_count"] = Ads.objects.all().count()
-        context["leads_count"] = Lead.objects.all().count()
-        context["customers_count"] = Customer.objects.all().count()
+        context.update(get_dashboard_counters())
         return context
+
+
+class SearchView(LoginRequiredMixin, TemplateView):
+    """
+    Класс глобального поиска (параметр q) по потенциальным клиентам,
+    покупателям, контрактам, услугам и рекламным кампаниям, которые
+    пользователь может просматривать (см. search). С параметром
+    format=json результаты возвращаются в формате JSON.
+    """
+
+    template_name = 'users/search.html'
+    login_url = settings.LOGIN_URL
+    read_only = True
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '').strip()
+        results = search(query, request.user)
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'query': query,
+                                 'results': [result._asdict() for result in results]})
+        return self.render_to_response(self.get_context_data(query=query, results=results))